@@ -1,15 +1,76 @@
-from utils import *
+import time
+
+import streamlit as st
+
+from utils import (
+    create_zip_file_for_resumes, get_blob_store, get_jd_summary_prompts,
+)
+from pipeline import generate_fit_summaries, get_cached_fit_summaries
+from cache import content_hash
+from extraction import generate_summary
+from prefilter import PREFILTER_TOP_N
+from metrics import METRICS
+from candidate_pool import CandidatePool
+from jobs import DONE, FAILED, QUEUED, READY, RUNNING, WorkerPool
+from result_store import RankedResults
+
+
+@st.cache_resource
+def get_candidate_pool():
+    """Return the persistent pool of previously ingested resumes."""
+    return CandidatePool()
+
+
+@st.cache_resource
+def get_job_workers():
+    """Return the worker pool that runs ranking jobs, started once per server."""
+    return WorkerPool()
+
 
 st.set_page_config(page_title="Candidate Recommendation Agent", layout="wide")
 
 st.title("Candidate Recommendation Agent 🤖")
+
+
+def show_model_status():
+    """Shows whether the ranking workers, which load the embedding model in the background, are ready."""
+    statuses = get_job_workers().model_status()
+    errors = [error for status, error in statuses if status == FAILED]
+    n_ready = sum(status == READY for status, _ in statuses)
+    if errors:
+        st.warning(f"The embedding model failed to load: {errors[0]}")
+    elif n_ready < len(statuses):
+        st.caption(f"⏳ Loading the embedding model ({n_ready} of {len(statuses)} workers ready)...")
+    else:
+        st.caption("✅ Embedding model ready")
+
+
+# The workers load the model while the form is filled in; polls until every worker has reported,
+# later reruns render the status once
+models_loading = any(status not in (READY, FAILED) for status, _ in get_job_workers().model_status())
+st.fragment(show_model_status, run_every=1 if models_loading else None)()
 st.markdown("Enter a job description and upload a resumes to find the best candidates.")
 
+n_roles = st.number_input(
+    "Open roles",
+    min_value=1,
+    max_value=10,
+    value=1,
+    help="With several roles, every resume is ranked against each job description and "
+         "routed to the role it fits best."
+)
+
 job_description = st.text_area(
-    "Job Description",
+    "Job Description" if n_roles == 1 else "Job Description 1",
     height=200,
-    placeholder="Paste the job description here..."
+    placeholder="Paste the job description here...",
+    key="job_description"
 )
+extra_job_descriptions = [
+    st.text_area(f"Job Description {number}", height=200, key=f"job_description_{number}")
+    for number in range(2, n_roles + 1)
+]
+job_descriptions = [job_description, *extra_job_descriptions]
 
 uploaded_files = st.file_uploader(
     "Upload Candidate Resumes (.txt or .pdf files)",
@@ -17,95 +78,324 @@ uploaded_files = st.file_uploader(
     accept_multiple_files=True
 )
 
+use_llm_cache = st.checkbox(
+    "Reuse cached LLM extractions",
+    value=True,
+    help="Untick to call the LLM again for documents that were already processed."
+)
+
+save_to_pool = st.checkbox(
+    "Add uploaded resumes to the candidate pool",
+    value=False,
+    help="Keep the processed resumes so later job descriptions can be matched against them."
+)
+
+shortlist_size = st.number_input(
+    "Resumes to analyse in depth",
+    min_value=0,
+    value=PREFILTER_TOP_N,
+    step=10,
+    help="Only the resumes that best match the job description on a quick full-text comparison go "
+         "through section extraction with the LLM. 0 analyses every resume."
+)
+
+with st.sidebar:
+    st.header("Debug")
+    show_metrics = st.checkbox("Show pipeline metrics", value=False)
+    profile_runs = st.checkbox(
+        "Profile ranking runs",
+        value=False,
+        help="Capture a cProfile report for each click on Find Top Candidates."
+    )
+
 if "results" not in st.session_state:
     st.session_state.results = None
+    st.session_state.results_jd = ""
+    st.session_state.fit_summaries = {}
+    st.session_state.role_results = None
+    # A refreshed page picks its ranking job up again from the URL
+    st.session_state.job_id = st.query_params.get("job")
+    st.session_state.loaded_job = None
+
+
+def role_title(number, text):
+    """Short label for a job description: its number and first non-empty line."""
+    first_line = next((line.strip() for line in text.splitlines() if line.strip()), "")
+    return f"{number}. {first_line[:60]}"
+
 
 if st.button("Find Top Candidates"):
-    if not job_description:
-        st.error("Please enter a job description.")
+    if not all(job_descriptions):
+        st.error("Please enter a job description." if n_roles == 1 else "Please enter every job description.")
     elif not uploaded_files:
         st.error("Please upload at least one resume.")
     else:
-        with st.spinner("Processing resumes and finding top candidates..."):
-            sbert_model = load_sbert_model()
-
-            resumes = []
-            for uploaded_file in uploaded_files:
-                full_text = read_text_file(uploaded_file)
-                if "unsupported" in full_text or "Failed to read" in full_text:
-                    st.warning(f"Skipping {uploaded_file.name}: {full_text}")
-                    continue
-
-                email = extract_contact_info(full_text)
-
-                resumes.append({
-                    "name": uploaded_file.name,
-                    "email": email,
-                    "full_text": full_text
-                })
-
-            if not resumes:
-                st.error("No valid resumes were processed.")
-                st.session_state.results = None
-            else:
-                candidate_list = []
+        # The ranking runs in a worker process, so reruns and refreshes of this page do not interrupt it
+        blob_store = get_blob_store()
+        # A new job continues from the last finished one of this page, so only changed uploads are processed
+        previous_job = st.session_state.job_id and get_job_workers().get(st.session_state.job_id)
+        session_key = (previous_job["result"] or {}).get("session") if previous_job else None
+        job_id = get_job_workers().submit({
+            "job_descriptions": job_descriptions,
+            "files": [(file.name, blob_store.put(file.getvalue())) for file in uploaded_files],
+            "top_n": shortlist_size,
+            "use_cache": use_llm_cache,
+            "save_to_pool": save_to_pool and n_roles == 1,
+            "profile": profile_runs,
+            "session": session_key,
+        })
+        st.session_state.job_id = job_id
+        st.query_params["job"] = job_id
+        st.session_state.results = None
+        st.session_state.role_results = None
+
 
-                jd_prompts = get_jd_summary_prompts(job_description)
-                jd_sections = generate_summary(jd_prompts)
+def show_job_progress():
+    """Shows the progress of the current ranking job and reruns the app once it has finished."""
+    job = get_job_workers().get(st.session_state.job_id)
+    if job is None:
+        st.error("The ranking job was not found.")
+    elif job["status"] in (QUEUED, RUNNING):
+        progress = job["progress"]
+        if progress is None:
+            st.progress(0.0, text="Waiting for a worker...")
+            return
+        verb = "Read" if progress["stage"] == "read" else "Ranked"
+        st.progress(
+            progress["done"] / progress["total"] if progress["total"] else 1.0,
+            text=f"{verb} {progress['done']} of {progress['total']} resumes",
+        )
+        if progress["leaderboard"]:
+            st.dataframe([
+                {"Rank": rank, "Candidate": c["name"], "Email": c["email"], "Score": round(c["score"], 4)}
+                for rank, c in enumerate(progress["leaderboard"], 1)
+            ], hide_index=True)
+    elif st.session_state.loaded_job != job["id"]:
+        st.rerun()
 
-                for resume in resumes:
-                    resume_prompts = get_resume_summary_prompts(resume['full_text'])
-                    resume_sections = generate_summary(resume_prompts)
 
-                    similarities = compute_section_similarity(resume_sections, jd_sections)
+def read_top_resumes_zip(results):
+    """Returns the ZIP archive of the top 10 resumes as bytes, closing the file it is read from."""
+    with open(create_zip_file_for_resumes(results.with_texts(results.page(0, 10))), "rb") as f:
+        return f.read()
 
-                    candidate_list.append({
-                        "name": resume["name"],
-                        "email": resume["email"],
-                        "score": similarities.get("Overall Score", 0.0),
-                        "text": resume["full_text"],
-                        "section_scores": similarities
-                    })
 
-                if not candidate_list:
-                    st.error("No candidates could be processed for scoring.")
-                    st.session_state.results = None
-                else:
-                    candidate_list.sort(key=lambda x: x["score"], reverse=True)
-                    st.session_state.results = candidate_list
-                    st.success("Analysis complete!")
+def load_job_results(job):
+    """Puts the results of a finished job into the session, once per job."""
+    st.session_state.loaded_job = job["id"]
+    result = job["result"]
+    if job["status"] == FAILED:
+        return
+    if result["profile"]:
+        st.session_state.last_profile = result["profile"]
+    if "rankings" in result:
+        if result["best_fit"]:
+            st.session_state.role_results = {
+                "job_descriptions": job["payload"]["job_descriptions"],
+                "rankings": [RankedResults.load(key) for key in result["rankings"]],
+                "best_fit": result["best_fit"],
+            }
+        return
+    if result["pool_candidates"]:
+        get_candidate_pool().add(result["pool_candidates"])
+    if result["ranked"]:
+        st.session_state.results = RankedResults.load(result["results"])
+        st.session_state.results_jd = job["payload"]["job_descriptions"][0]
+
+
+def show_job_outcome(job):
+    """Messages about a finished job, shown for as long as its results are."""
+    if job["status"] == FAILED:
+        st.error(job["error"])
+        return
+    result = job["result"]
+    if "rankings" in result:
+        for name, error in result["errors"]:
+            st.warning(f"Skipping {name}: {error}")
+        if result["best_fit"]:
+            st.success("Analysis complete!")
+        else:
+            st.error("No valid resumes were processed.")
+        return
+
+    update = result["summary"]
+    for name, error in update["errors"]:
+        st.warning(f"Skipping {name}: {error}")
+    if update["duplicates"]:
+        st.caption(f"{update['duplicates']} near-duplicate resumes are listed under the copy that was analysed")
+    distinct = update["resumes"] - update["duplicates"]
+    if update["shortlisted"] < distinct:
+        st.caption(f"Analysing the {update['shortlisted']} of {distinct} distinct resumes "
+                   f"that best match the job description")
+    if not result["ranked"]:
+        st.error("No valid resumes were processed.")
+    else:
+        st.success(f"Analysis complete! Read {update['read']} files, scored {update['scored']} resumes.")
+        cache_stats = result["llm_cache"]
+        st.caption(f"LLM cache: {cache_stats['hits']} hits, {cache_stats['misses']} misses")
+
+
+if st.session_state.job_id:
+    current_job = get_job_workers().get(st.session_state.job_id)
+    if current_job is not None and current_job["status"] in (DONE, FAILED):
+        if st.session_state.loaded_job != current_job["id"]:
+            load_job_results(current_job)
+        show_job_outcome(current_job)
+    else:
+        # Polls the queue while the job is waiting or running
+        st.fragment(show_job_progress, run_every=1)()
+
+if st.button("Search Candidate Pool"):
+    candidate_pool = get_candidate_pool()
+    if not job_description:
+        st.error("Please enter a job description.")
+    elif not len(candidate_pool):
+        st.error("The candidate pool is empty. Add resumes to it first.")
+    else:
+        with st.spinner(f"Searching {len(candidate_pool)} pooled candidates..."):
+            jd_sections = generate_summary(get_jd_summary_prompts(job_description), use_cache=use_llm_cache)
+        if not jd_sections.complete:
+            st.error(jd_sections.error)
+        else:
+            st.session_state.results = RankedResults.from_candidates(candidate_pool.search(jd_sections, k=10))
+            st.session_state.role_results = None
+            st.session_state.job_id = None
+            st.query_params.pop("job", None)
+            st.session_state.results_jd = job_description
+            st.success("Analysis complete!")
+
+render_start = time.perf_counter()
+
+role_results = st.session_state.role_results
+if role_results:
+    st.header("Best-fit Roles")
+    titles = [role_title(number, text) for number, text in enumerate(role_results["job_descriptions"], 1)]
+    st.dataframe([
+        {
+            "Candidate": fit["name"],
+            "Email": fit["email"],
+            "Best fit": titles[fit["best_fit"]],
+            "Score": round(fit["score"], 4),
+            "Duplicates": ", ".join(fit["duplicates"]),
+            **{title: round(score, 4) for title, score in zip(titles, fit["scores"])},
+        }
+        for fit in sorted(role_results["best_fit"], key=lambda x: x["score"], reverse=True)
+    ])
+
+    # The detailed view below shows the ranking for one role at a time
+    selected_role = st.selectbox("Show candidates for", range(len(titles)), format_func=titles.__getitem__)
+    st.session_state.results = role_results["rankings"][selected_role]
+    st.session_state.results_jd = role_results["job_descriptions"][selected_role]
+
+RESULTS_PAGE_SIZE = 10
 
 if st.session_state.results:
     st.header("Top Candidate Recommendation")
 
-    if st.session_state.results:
-        top_candidates = st.session_state.results[:10]
+    results = st.session_state.results
+    n_pages = -(-len(results) // RESULTS_PAGE_SIZE)
+    page = 1
+    if n_pages > 1:
+        page = st.number_input(f"Page (of {n_pages})", min_value=1, max_value=n_pages, value=1, key="results_page")
+    start = (page - 1) * RESULTS_PAGE_SIZE
+    # Only the shown page is read from the result store; resume texts are read when needed
+    page_candidates = results.page(start, RESULTS_PAGE_SIZE)
 
-        zip_data = create_zip_file_for_resumes(top_candidates)
-        st.download_button(
-            label="Download All Top Resumes",
-            data=zip_data,
-            file_name="top_candidates.zip",
-            mime="application/zip",
+    # The archive is only built when the button is clicked, and reused for the same shortlist
+    st.download_button(
+        label="Download All Top Resumes",
+        data=lambda: read_top_resumes_zip(results),
+        file_name="top_candidates.zip",
+        mime="application/zip",
+    )
+
+    # Fit summaries are memoized per (JD, resume) pair and only generated on request
+    results_jd = st.session_state.results_jd
+    fit_summaries = st.session_state.fit_summaries
+    jd_key = content_hash(results_jd)
+    summary_keys = [(jd_key, c['text_key']) for c in page_candidates]
+
+    missing = [i for i, key in enumerate(summary_keys) if key not in fit_summaries]
+    if missing and use_llm_cache:
+        stored = get_cached_fit_summaries(results_jd, [results.text(page_candidates[i]) for i in missing])
+        for position, summary in stored.items():
+            fit_summaries[summary_keys[missing[position]]] = summary
+
+    def fill_fit_summaries(indices):
+        # Failed calls come back as error messages instead of raising
+        generated = generate_fit_summaries(
+            results_jd, [results.text(page_candidates[i]) for i in indices], use_cache=use_llm_cache
         )
+        for i, (summary, error) in zip(indices, generated):
+            if error:
+                st.error(f"Failed to generate summary for {page_candidates[i]['name']}: {error}")
+            else:
+                fit_summaries[summary_keys[i]] = summary
 
-        for i, top_candidate in enumerate(top_candidates):
-            st.markdown(f"**{i+1}. {top_candidate['name']}, {top_candidate['email']}** ")
+    missing = [i for i, key in enumerate(summary_keys) if key not in fit_summaries]
+    if missing and st.button(f"Explain fit for all {len(missing)} remaining candidates on this page"):
+        with st.spinner("Generating fit summaries..."):
+            fill_fit_summaries(missing)
 
-            for section, score in top_candidate['section_scores'].items():
-                st.markdown(f"- **{section}:** `{score:.2%}`")
+    for i, candidate in enumerate(page_candidates):
+        rank = start + i + 1
+        st.markdown(f"**{rank}. {candidate['name']}, {candidate['email']}** ")
 
-            try:
-                summary_prompt = get_summary_prompt(job_description, top_candidate['text'])
-                summary = generate_summary(summary_prompt)['Summary']
-                st.success("Summary generated!")
-                st.write(summary)
-            except ValueError as e:
-                st.error(str(e))
-            except Exception as e:
-                st.error(f"Failed to generate summary: {e}")
+        for section, score in candidate['section_scores'].items():
+            st.markdown(f"- **{section}:** `{score:.2%}`")
 
-            with st.expander("View Full Resume"):
-                st.text(top_candidate['text'])
-    else:
-        st.warning("No candidates found after processing.")
\ No newline at end of file
+        if summary_keys[i] not in fit_summaries and st.button("Explain fit", key=f"fit_summary_{rank}"):
+            with st.spinner("Generating fit summary..."):
+                fill_fit_summaries([i])
+        if summary_keys[i] in fit_summaries:
+            st.write(fit_summaries[summary_keys[i]])
+
+        duplicates = candidate['duplicates']
+        if duplicates:
+            with st.expander(f"{len(duplicates)} near-duplicate uploads"):
+                for name in duplicates:
+                    st.markdown(f"- {name}")
+
+        if st.toggle("View Full Resume", key=f"full_resume_{rank}"):
+            st.text(results.text(candidate))
+METRICS.observe("render_seconds", time.perf_counter() - render_start)
+
+if show_metrics:
+    snapshot = METRICS.snapshot()
+    with st.sidebar:
+        st.subheader("Timings")
+        st.dataframe([
+            {
+                "span": histogram["name"].removesuffix("_seconds"),
+                "labels": ", ".join(f"{k}={v}" for k, v in histogram["labels"].items()),
+                "calls": histogram["count"],
+                "mean ms": round(histogram["mean"] * 1000, 2),
+                "total s": round(histogram["sum"], 3),
+            }
+            for histogram in snapshot["histograms"]
+        ])
+        st.subheader("Counters")
+        st.dataframe([
+            {
+                "counter": counter["name"],
+                "labels": ", ".join(f"{k}={v}" for k, v in counter["labels"].items()),
+                "value": counter["value"],
+            }
+            for counter in snapshot["counters"]
+        ])
+        st.download_button(
+            label="Download metrics (Prometheus)",
+            data=METRICS.to_prometheus(),
+            file_name="metrics.prom",
+            mime="text/plain",
+        )
+        st.download_button(
+            label="Download metrics (JSON)",
+            data=METRICS.to_json(),
+            file_name="metrics.json",
+            mime="application/json",
+        )
+
+if profile_runs and st.session_state.get("last_profile"):
+    with st.sidebar.expander("Last ranking run profile"):
+        st.code(st.session_state.last_profile)
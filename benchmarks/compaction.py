@@ -0,0 +1,57 @@
+"""
+Tokens saved by prompt compaction, per document.
+
+Examples:
+    python -m benchmarks.compaction --candidates 20
+    python -m benchmarks.compaction --jd jobs/*.pdf --resumes resumes/*.pdf --budget 2000
+
+Without --jd or --resumes it compacts a synthetic corpus. Token counts come
+from the local tokenizer in compaction.count_tokens.
+"""
+import argparse
+import random
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Report tokens saved by prompt compaction.")
+    parser.add_argument("--jd", nargs="*", default=[], help="Job description files.")
+    parser.add_argument("--resumes", nargs="*", default=[], help="Resume files.")
+    parser.add_argument("--candidates", type=int, default=10, help="Synthetic resumes when no files are given.")
+    parser.add_argument("--budget", type=int, help="Token budget per document (default: PROMPT_TOKEN_BUDGET).")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    from benchmarks.corpus import make_job_description, make_resume
+    from benchmarks.run import _named_file
+    from compaction import compact_text
+    from utils import read_files
+
+    documents = []
+    if args.jd or args.resumes:
+        for kind, paths in (("job description", args.jd), ("resume", args.resumes)):
+            files = [_named_file(path) for path in paths]
+            for file, (text, error) in zip(files, read_files(files)):
+                if error:
+                    print(f"Skipping {file.name}: {error}")
+                else:
+                    documents.append((kind, file.name, text))
+    else:
+        rng = random.Random(args.seed)
+        name, lines = make_job_description(rng, 0)
+        documents.append(("job description", name, "\n".join(lines)))
+        for index in range(args.candidates):
+            name, lines = make_resume(rng, index)
+            documents.append(("resume", name, "\n".join(lines)))
+
+    total_before = total_after = 0
+    for kind, name, text in documents:
+        _, before, after = compact_text(text, args.budget, boilerplate=kind == "job description")
+        total_before += before
+        total_after += after
+        print(f"  {name:30} {kind:16} {before:7d} -> {after:7d} tokens  saved {1 - after / max(before, 1):6.1%}")
+    print(f"{len(documents)} documents: {total_before} -> {total_after} tokens, "
+          f"saved {total_before - total_after} ({1 - total_after / max(total_before, 1):.1%})")
+
+
+if __name__ == "__main__":
+    main()
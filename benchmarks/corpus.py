@@ -0,0 +1,174 @@
+"""
+Synthetic resume and job description corpora for benchmarking.
+
+Documents are generated from a fixed vocabulary with a seeded random
+generator, so the same size and seed always produce the same corpus.
+"""
+import os
+import random
+
+from section_parser import parse_resume_sections
+
+ROLES = {
+    "Data Analyst": ["SQL", "Python", "Tableau", "Power BI", "Excel", "statistics", "dashboards", "ETL"],
+    "Data Engineer": ["Python", "Spark", "Airflow", "Kafka", "AWS", "Snowflake", "dbt", "ETL pipelines"],
+    "Backend Engineer": ["Java", "Go", "PostgreSQL", "Docker", "Kubernetes", "REST APIs", "gRPC", "Redis"],
+    "Frontend Engineer": ["JavaScript", "TypeScript", "React", "CSS", "GraphQL", "Webpack", "accessibility"],
+    "ML Engineer": ["Python", "PyTorch", "TensorFlow", "MLOps", "NLP", "feature stores", "model serving"],
+    "Financial Analyst": ["Excel", "financial modeling", "forecasting", "SAP", "variance analysis", "budgeting"],
+    "Registered Nurse": ["patient care", "EHR", "triage", "BLS", "medication administration", "charting"],
+}
+DEGREES = ["B.S. in Computer Science", "M.S. in Data Science", "B.A. in Economics", "MBA",
+           "B.S. in Nursing", "M.S. in Statistics", "B.Eng. in Software Engineering"]
+SCHOOLS = ["State University", "Institute of Technology", "City College", "Polytechnic University"]
+CERTIFICATIONS = ["AWS Certified Solutions Architect", "Tableau Desktop Specialist", "CFA Level I",
+                  "Certified Kubernetes Administrator", "Google Data Analytics Certificate", "BLS Certification"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Health", "Stark Industries", "Wayne Financial"]
+VERBS = ["Built", "Designed", "Led", "Automated", "Migrated", "Optimized", "Delivered", "Maintained"]
+OUTCOMES = ["reducing processing time by {n}%", "improving accuracy by {n}%", "serving {n}k users",
+            "cutting costs by {n}%", "supporting {n} stakeholders"]
+FIRST_NAMES = ["Alex", "Sam", "Jordan", "Taylor", "Morgan", "Casey", "Riley", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Smith", "Patel", "Garcia", "Kim", "Nguyen", "Okafor", "Rossi", "Cohen", "Silva", "Berg"]
+
+
+def _bullets(rng, skills, count):
+    lines = []
+    for _ in range(count):
+        outcome = rng.choice(OUTCOMES).format(n=rng.randint(5, 60))
+        lines.append(f"- {rng.choice(VERBS)} {rng.choice(skills)} solutions using {rng.choice(skills)}, {outcome}.")
+    return lines
+
+
+def make_resume(rng, index):
+    """Returns (name, lines) for one synthetic resume."""
+    role, skills = rng.choice(list(ROLES.items()))
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    lines = [
+        f"{first} {last}",
+        f"{first.lower()}.{last.lower()}{index}@example.com | (555) 010-{index % 10000:04d}",
+        f"{role}",
+        "",
+        "EDUCATION",
+        f"{rng.choice(DEGREES)}, {rng.choice(SCHOOLS)}, {rng.randint(2005, 2023)}",
+        "",
+        "SKILLS",
+        ", ".join(rng.sample(skills, k=min(len(skills), rng.randint(4, 7)))),
+        "",
+        "CERTIFICATIONS",
+        rng.choice(CERTIFICATIONS),
+        "",
+        "EXPERIENCE",
+    ]
+    for _ in range(rng.randint(2, 4)):
+        lines.append(f"{role}, {rng.choice(COMPANIES)} ({rng.randint(2010, 2020)} - {rng.randint(2021, 2025)})")
+        lines.extend(_bullets(rng, skills, rng.randint(3, 6)))
+    lines += ["", "PROJECTS"]
+    lines.extend(_bullets(rng, skills, rng.randint(2, 4)))
+    return f"resume_{index:05d}", lines
+
+
+def make_job_description(rng, index):
+    """Returns (name, lines) for one synthetic job description."""
+    role, skills = rng.choice(list(ROLES.items()))
+    company = rng.choice(COMPANIES)
+    lines = [
+        f"{role} - {company}",
+        "",
+        "About Us",
+        f"{company} is a leading company serving customers across {rng.randint(3, 40)} countries.",
+        "",
+        "Role Overview",
+        f"We are looking for a {role} to join our growing team.",
+        "",
+        "Responsibilities",
+    ]
+    lines.extend(_bullets(rng, skills, rng.randint(4, 7)))
+    lines += [
+        "",
+        "Required Skills",
+        ", ".join(rng.sample(skills, k=min(len(skills), 5))),
+        "",
+        "Qualifications",
+        f"{rng.choice(DEGREES)} or equivalent experience.",
+        "",
+        f"{company} is an Equal Opportunity Employer. All qualified applicants will receive consideration "
+        "for employment without regard to race, color, religion, sex, national origin, disability or veteran status.",
+    ]
+    return f"jd_{index:03d}", lines
+
+
+def make_section_corpus(n_candidates, seed=0):
+    """
+    Returns (list of resume section dicts, JD section dict) for scoring
+    benchmarks that start after section extraction.
+    """
+    rng = random.Random(seed)
+    resumes = [parse_resume_sections("\n".join(make_resume(rng, i)[1]))[0] for i in range(n_candidates)]
+    jd_lines = make_job_description(rng, 0)[1]
+    jd_sections = {
+        "Qualifications and Education": jd_lines[-3],
+        "Required Skills and Technologies": jd_lines[-6],
+        "Responsibilities and Duties": "\n".join(line for line in jd_lines if line.startswith("- ")),
+    }
+    return resumes, jd_sections
+
+
+def _pdf_escape(line):
+    line = line.encode("latin-1", "replace").decode("latin-1")
+    return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_pdf(lines, lines_per_page=50):
+    """Renders text lines into a minimal multi-page PDF using the built-in Helvetica font."""
+    pages = [lines[i:i + lines_per_page] for i in range(0, len(lines), lines_per_page)] or [[]]
+    font_id = 3 + 2 * len(pages)
+    objects = [
+        "<< /Type /Catalog /Pages 2 0 R >>",
+        "<< /Type /Pages /Kids [{}] /Count {} >>".format(
+            " ".join(f"{3 + 2 * i} 0 R" for i in range(len(pages))), len(pages)
+        ),
+    ]
+    for i, page_lines in enumerate(pages):
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>"
+        )
+        content = "BT /F1 10 Tf 14 TL 50 760 Td " + " ".join(f"({_pdf_escape(l)}) '" for l in page_lines) + " ET"
+        objects.append(f"<< /Length {len(content.encode('latin-1'))} >>\nstream\n{content}\nendstream")
+    objects.append("<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    output = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, 1):
+        offsets.append(len(output))
+        output += f"{number} 0 obj\n{obj}\nendobj\n".encode("latin-1")
+    xref_offset = len(output)
+    output += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    output += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    output += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref_offset}\n%%EOF\n".encode()
+    return output
+
+
+def generate_corpus(directory, n_resumes, n_jds=1, file_format="txt", seed=0):
+    """
+    Writes a corpus to directory/resumes and directory/jds.
+
+    Returns:
+        tuple of (list of resume paths, list of job description paths)
+    """
+    rng = random.Random(seed)
+    paths = {"resumes": [], "jds": []}
+    for kind, count, make in (("jds", n_jds, make_job_description), ("resumes", n_resumes, make_resume)):
+        os.makedirs(os.path.join(directory, kind), exist_ok=True)
+        for index in range(count):
+            name, lines = make(rng, index)
+            extension = "txt" if kind == "jds" else file_format
+            path = os.path.join(directory, kind, f"{name}.{extension}")
+            if extension == "pdf":
+                with open(path, "wb") as f:
+                    f.write(write_pdf(lines))
+            else:
+                with open(path, "w", encoding="utf-8") as f:
+                    f.write("\n".join(lines))
+            paths[kind].append(path)
+    return paths["resumes"], paths["jds"]
@@ -0,0 +1,117 @@
+"""
+Score drift of an alternative embedding backend against the float PyTorch model.
+
+Examples:
+    python -m benchmarks.embedding_parity --export models/minilm
+    SBERT_THREADS=4 python -m benchmarks.embedding_parity --model-path models/minilm --backend onnx-int8
+
+--export downloads the model once and saves it, its ONNX export and a
+dynamically int8-quantized ONNX file into a local directory, so later runs
+and the app (through SBERT_MODEL_PATH) load it without downloading. The
+parity check only loads such a local directory. It encodes the sections of
+a fixed synthetic corpus with both backends and reports how far embeddings,
+section scores and the candidate ranking move, and how long encoding took.
+"""
+import argparse
+import os
+import time
+
+import numpy as np
+
+
+def export_model(model_name, directory):
+    """Saves the model, its ONNX export and an int8-quantized ONNX file into directory."""
+    from sentence_transformers import SentenceTransformer, export_dynamic_quantized_onnx_model
+
+    SentenceTransformer(model_name).save(directory)
+    onnx_model = SentenceTransformer(directory, backend="onnx")
+    onnx_model.save(directory)
+    export_dynamic_quantized_onnx_model(onnx_model, "avx512_vnni", directory)
+
+
+def section_scores(model, resumes, jd_sections):
+    """Encodes every section pair and returns (candidates × sections scores, resume embeddings, seconds)."""
+    from utils import SECTION_PAIRS, normalize_rows
+
+    texts, positions = [], []
+    for row, sections in enumerate(resumes):
+        for col, resume_key in enumerate(SECTION_PAIRS):
+            if sections.get(resume_key):
+                texts.append(sections[resume_key])
+                positions.append((row, col))
+
+    start = time.perf_counter()
+    resume_embeddings = normalize_rows(model.encode(texts))
+    job_embeddings = normalize_rows(model.encode([jd_sections[job_key] for job_key in SECTION_PAIRS.values()]))
+    seconds = time.perf_counter() - start
+
+    scores = np.zeros((len(resumes), len(SECTION_PAIRS)), dtype=np.float32)
+    for (row, col), embedding in zip(positions, resume_embeddings):
+        scores[row, col] = embedding @ job_embeddings[col]
+    return scores, resume_embeddings, seconds
+
+
+def compare_backends(reference, candidate, resumes, jd_sections, top_k=10):
+    """
+    Scores the corpus with both models.
+
+    Returns:
+        dict with the per-section embedding cosine between the models, the
+        absolute section score drift, the overlap of their top_k candidates
+        and both encode times in seconds
+    """
+    # Warm both up so one-off initialization is not timed
+    reference.encode(["warm up"])
+    candidate.encode(["warm up"])
+
+    reference_scores, reference_embeddings, reference_seconds = section_scores(reference, resumes, jd_sections)
+    candidate_scores, candidate_embeddings, candidate_seconds = section_scores(candidate, resumes, jd_sections)
+
+    reference_top = set(np.argsort(-reference_scores.mean(axis=1), kind="stable")[:top_k].tolist())
+    candidate_top = set(np.argsort(-candidate_scores.mean(axis=1), kind="stable")[:top_k].tolist())
+    return {
+        "embedding_cosine": np.sum(reference_embeddings * candidate_embeddings, axis=1),
+        "drift": np.abs(reference_scores - candidate_scores),
+        "top_overlap": len(reference_top & candidate_top),
+        "reference_seconds": reference_seconds,
+        "candidate_seconds": candidate_seconds,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check an embedding backend against the float model.")
+    parser.add_argument("--backend", default="onnx-int8", help="Backend to compare against torch.")
+    parser.add_argument("--model-path", default=os.getenv("SBERT_MODEL_PATH"),
+                        help="Local model directory (default: SBERT_MODEL_PATH).")
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--export", metavar="DIR", help="Export the model for offline and ONNX use, then exit.")
+    args = parser.parse_args(argv)
+    if not args.export and not (args.model_path and os.path.isdir(args.model_path)):
+        parser.error("--model-path must be a local model directory; create one with --export DIR first")
+
+    from benchmarks.corpus import make_section_corpus
+    from utils import SBERT_MODEL_NAME, load_sbert_model
+
+    if args.export:
+        export_model(args.model_path or SBERT_MODEL_NAME, args.export)
+        print(f"Exported {args.model_path or SBERT_MODEL_NAME} to {args.export}")
+        return
+
+    resumes, jd_sections = make_section_corpus(args.candidates, args.seed)
+    reference = load_sbert_model("torch", args.model_path)
+    candidate = load_sbert_model(args.backend, args.model_path)
+    report = compare_backends(reference, candidate, resumes, jd_sections, args.top_k)
+
+    embedding_cosine, drift = report["embedding_cosine"], report["drift"]
+    print(f"{args.backend} vs torch on {args.candidates} candidates ({len(embedding_cosine)} sections)")
+    print(f"  embedding cosine:    min {embedding_cosine.min():.4f}  mean {embedding_cosine.mean():.4f}")
+    print(f"  section score drift: max {drift.max():.4f}  mean {drift.mean():.4f}")
+    print(f"  top-{args.top_k} overlap:      {report['top_overlap']}/{args.top_k}")
+    print(f"  encode time:         torch {report['reference_seconds']:.3f}s  "
+          f"{args.backend} {report['candidate_seconds']:.3f}s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""
+Throughput of section scoring: the original per-section two-text encode calls
+against the chunked, length-sorted batch encoder in utils.score_candidates.
+
+Example:
+    python -m benchmarks.encoder --candidates 500 --batch-size 64
+
+The embedding store is disabled, so both sides encode every text. Besides
+wall-clock throughput, it reports how many word pieces the original calls
+lose to the encoder's input limit and how much of each batch is padding,
+counted in word pieces, with and without sorting by length.
+"""
+import argparse
+import functools
+import os
+import time
+
+
+def padding_ratio(lengths, batch_size):
+    """Share of padded positions when texts of these lengths are encoded in batches, in order."""
+    padded = sum(
+        max(lengths[i:i + batch_size]) * len(lengths[i:i + batch_size]) for i in range(0, len(lengths), batch_size)
+    )
+    return 1 - sum(lengths) / padded if padded else 0.0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare section scoring encoders.")
+    parser.add_argument("--candidates", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.environ["EMBEDDING_STORE_ENABLED"] = "0"
+    # Imported after the store is disabled
+    from benchmarks.corpus import make_section_corpus
+    from utils import (
+        SECTION_PAIRS, chunk_budget, chunk_text, count_word_tokens, load_sbert_model, normalize_rows,
+        score_candidates,
+    )
+
+    resume_sections, jd_sections = make_section_corpus(args.candidates, args.seed)
+    model = load_sbert_model()
+    model.encode(["warm up"])
+
+    start = time.perf_counter()
+    pairs = 0
+    for sections in resume_sections:
+        for resume_key, job_key in SECTION_PAIRS.items():
+            if sections.get(resume_key) and jd_sections.get(job_key):
+                resume_embedding, job_embedding = normalize_rows(
+                    model.encode([sections[resume_key], jd_sections[job_key]])
+                )
+                float(resume_embedding @ job_embedding)
+                pairs += 1
+    pairwise_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    score_candidates(resume_sections, jd_sections, batch_size=args.batch_size)
+    chunked_seconds = time.perf_counter() - start
+
+    texts = [
+        sections[resume_key] for sections in resume_sections
+        for resume_key, job_key in SECTION_PAIRS.items() if sections.get(resume_key) and jd_sections.get(job_key)
+    ]
+    limit, budget = model.get_max_seq_length() - 2, chunk_budget(model)
+    count_tokens = functools.partial(count_word_tokens, model)
+    tokens = [sum(count_tokens(text.split())) for text in texts]
+    chunk_tokens = [
+        sum(count_tokens(chunk.split())) for text in texts for chunk in chunk_text(text, budget, count_tokens)
+    ]
+
+    print(f"{args.candidates} candidates, {pairs} section pairs")
+    print(f"  two-text encode calls: {pairwise_seconds:8.3f}s  {pairs / pairwise_seconds:10.1f} sections/s")
+    print(f"  chunked batch encode:  {chunked_seconds:8.3f}s  {pairs / chunked_seconds:10.1f} sections/s  "
+          f"({len(chunk_tokens)} chunks)")
+    print(f"  sections over {limit} word pieces: {sum(t > limit for t in tokens)}, "
+          f"word pieces past the limit: {sum(max(0, t - limit) for t in tokens)} of {sum(tokens)}")
+    print(f"  padding at batch size {args.batch_size}: unsorted "
+          f"{padding_ratio(chunk_tokens, args.batch_size):.1%}, sorted by length "
+          f"{padding_ratio(sorted(chunk_tokens, reverse=True), args.batch_size):.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Local stand-in for the Groq chat-completions API.
+
+Point the app at it with GROQ_BASE_URL=http://127.0.0.1:<port>. Every
+response is delayed by a configurable latency, and requests over the
+requests-per-minute or tokens-per-minute limits get a 429 with Retry-After,
+like the real service. JSON-mode requests are answered with an object that
+has every key the prompt asks for; other prompts echo the document text
+between the dashed delimiters, so embeddings downstream stay meaningful.
+"""
+import argparse
+import collections
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DOCUMENT_PATTERN = re.compile(r"-{20}\n(.*?)\n\s*-{20}", re.S)
+JSON_KEY_PATTERN = re.compile(r'^\s*"([^"]+)":', re.M)
+
+
+def _estimate_tokens(text):
+    return len(text) // 4 + 1
+
+
+def make_completion(prompt, json_mode):
+    """Builds a deterministic answer for a prompt."""
+    match = DOCUMENT_PATTERN.search(prompt)
+    document = match.group(1).strip() if match else ""
+    if json_mode:
+        lines = [line.strip() for line in document.splitlines() if line.strip()]
+        keys = JSON_KEY_PATTERN.findall(prompt[match.end():] if match else prompt)
+        step = max(1, len(lines) // max(1, len(keys)))
+        return json.dumps({key: "\n".join(lines[i * step:(i + 1) * step]) for i, key in enumerate(keys)})
+    if document:
+        return document[:1500]
+    return "This candidate matches the role's required skills and relevant experience."
+
+
+class FakeLLMServer:
+    """Threaded chat-completions server with configurable latency and rate limits."""
+
+    def __init__(self, host="127.0.0.1", port=0, latency=0.2, jitter=0.05,
+                 requests_per_minute=0, tokens_per_minute=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.requests = 0
+        self.rate_limited = 0
+        self.prompt_tokens = 0
+        self._window = collections.deque()
+        self._lock = threading.Lock()
+
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["content-length"])))
+                prompt = "\n".join(message["content"] for message in body["messages"])
+                tokens = _estimate_tokens(prompt)
+
+                retry_after = server._admit(tokens)
+                if retry_after is not None:
+                    payload = json.dumps({"error": {"message": "Rate limit reached", "type": "tokens"}}).encode()
+                    self.send_response(429)
+                    self.send_header("retry-after", f"{retry_after:.2f}")
+                else:
+                    time.sleep(max(0.0, server.latency + random.uniform(-server.jitter, server.jitter)))
+                    json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+                    content = make_completion(prompt, json_mode)
+                    payload = json.dumps({
+                        "id": f"chatcmpl-{server.requests}",
+                        "object": "chat.completion",
+                        "created": int(time.time()),
+                        "model": body["model"],
+                        "choices": [{
+                            "index": 0,
+                            "finish_reason": "stop",
+                            "message": {"role": "assistant", "content": content},
+                        }],
+                        "usage": {
+                            "prompt_tokens": tokens,
+                            "completion_tokens": _estimate_tokens(content),
+                            "total_tokens": tokens + _estimate_tokens(content),
+                        },
+                    }).encode()
+                    self.send_response(200)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, *args):
+                pass
+
+        self._httpd = ThreadingHTTPServer((host, port), Handler)
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _admit(self, tokens):
+        """Records a request, or returns the seconds to wait if it is over the limits."""
+        with self._lock:
+            now = time.monotonic()
+            while self._window and now - self._window[0][0] >= 60:
+                self._window.popleft()
+
+            over_requests = self.requests_per_minute and len(self._window) >= self.requests_per_minute
+            over_tokens = self.tokens_per_minute and (
+                sum(t for _, t in self._window) + tokens > self.tokens_per_minute
+            )
+            if (over_requests or over_tokens) and self._window:
+                self.rate_limited += 1
+                return 60 - (now - self._window[0][0])
+
+            self._window.append((now, tokens))
+            self.requests += 1
+            self.prompt_tokens += tokens
+            return None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a local stand-in chat-completions server.")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--latency", type=float, default=0.2, help="Seconds added to every response.")
+    parser.add_argument("--rpm", type=int, default=0, help="Requests per minute, 0 for unlimited.")
+    parser.add_argument("--tpm", type=int, default=0, help="Prompt tokens per minute, 0 for unlimited.")
+    args = parser.parse_args(argv)
+
+    server = FakeLLMServer(port=args.port, latency=args.latency,
+                           requests_per_minute=args.rpm, tokens_per_minute=args.tpm)
+    print(f"Serving on {server.base_url} (set GROQ_BASE_URL to this)")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
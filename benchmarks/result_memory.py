@@ -0,0 +1,82 @@
+"""
+Memory a ranked result list takes in a Streamlit session.
+
+Example:
+    python -m benchmarks.result_memory --candidates 10000
+
+Builds candidate dicts like the ranking steps return them for a synthetic
+corpus, then measures with tracemalloc how much memory the list of dicts
+holds compared to RankedResults, which keeps a structured array in memory
+and spills records and resume texts to the blob store. It also times reading
+one page of results back.
+"""
+import argparse
+import os
+import random
+import tempfile
+import time
+import tracemalloc
+
+
+def make_candidates(n, seed=0):
+    """Candidate dicts with the fields and section scores of a real ranking, best first."""
+    from benchmarks.corpus import make_resume
+
+    rng = random.Random(seed)
+    sections = ["Qualifications and Education", "Required Skills and Technologies", "Responsibilities and Duties"]
+    candidates = []
+    for index in range(n):
+        name, lines = make_resume(rng, index)
+        section_scores = {section: rng.random() for section in sections}
+        section_scores["Overall Score"] = sum(section_scores.values()) / len(sections)
+        candidates.append({
+            "name": f"{name}.pdf",
+            "email": lines[1].split()[0],
+            "score": section_scores["Overall Score"],
+            "text": "\n".join(lines),
+            "file_hash": f"{rng.getrandbits(256):064x}",
+            "section_scores": section_scores,
+            "duplicates": [],
+        })
+    candidates.sort(key=lambda c: c["score"], reverse=True)
+    return candidates
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare the session memory of ranked result lists.")
+    parser.add_argument("--candidates", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    # The spilled records go to a throwaway blob store
+    os.environ["CACHE_DIR"] = tempfile.mkdtemp(prefix="result-memory-")
+    from result_store import RankedResults
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    candidates = make_candidates(args.candidates, args.seed)
+    dict_bytes = tracemalloc.get_traced_memory()[0] - baseline
+
+    start = time.perf_counter()
+    key = RankedResults.from_candidates(candidates).save()
+    spill_seconds = time.perf_counter() - start
+    del candidates
+
+    baseline = tracemalloc.get_traced_memory()[0]
+    results = RankedResults.load(key)
+    compact_bytes = tracemalloc.get_traced_memory()[0] - baseline
+    tracemalloc.stop()
+
+    start = time.perf_counter()
+    page = results.page(len(results) // 2, 10)
+    results.text(page[0])
+    page_seconds = time.perf_counter() - start
+
+    print(f"{args.candidates} ranked candidates")
+    print(f"  list of dicts:   {dict_bytes / 2**20:8.2f} MiB  ({dict_bytes / args.candidates:7.0f} B/candidate)")
+    print(f"  RankedResults:   {compact_bytes / 2**20:8.2f} MiB  ({compact_bytes / args.candidates:7.0f} B/candidate)")
+    print(f"  spilling to the blob store took {spill_seconds:.2f}s, reading a page and one text {page_seconds * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
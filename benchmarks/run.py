@@ -0,0 +1,301 @@
+"""
+End-to-end pipeline benchmark on a synthetic corpus with a local LLM stand-in.
+
+Example:
+    python -m benchmarks.run --sizes 10 1000 --format pdf --latency 0.2 --rpm 600
+    python -m benchmarks.run --sizes 1000 --shortlist 25 50 100
+
+Each size runs in a fresh process that generates a corpus, starts a
+FakeLLMServer and runs ingest → extract → embed → score → summarize with
+empty caches. The first repeat is reported as cold; later repeats run
+against the warm caches.
+With --shortlist, the prefilter is also run for each shortlist size and its
+recall of the full pipeline's top candidates is reported.
+Results are written as JSON to benchmarks/results, and --compare prints the
+change against an earlier result file.
+"""
+import argparse
+import contextlib
+import datetime
+import io
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.corpus import generate_corpus
+from benchmarks.fake_llm import FakeLLMServer
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The modules app.py imports besides streamlit; heavy libraries must stay out of their import path
+IMPORT_MODULES = ("utils", "pipeline", "candidate_pool", "prefilter", "extraction")
+IMPORT_TIME_BUDGET_SECONDS = 1.0
+
+
+def percentile(values, q):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, max(0, int(round(q / 100 * len(ordered) + 0.5)) - 1))]
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process and of its finished children, in MB."""
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return {
+        "self": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale,
+        "children": resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / scale,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=REPO_DIR,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def measure_import_seconds(modules=IMPORT_MODULES, repeats=3):
+    """Median wall time to import modules in a fresh interpreter."""
+    code = f"import time; start = time.perf_counter(); import {', '.join(modules)}; print(time.perf_counter() - start)"
+    durations = []
+    for _ in range(repeats):
+        output = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True, check=True, cwd=REPO_DIR,
+        ).stdout
+        durations.append(float(output.strip().splitlines()[-1]))
+    return percentile(durations, 50)
+
+
+class StageTimer:
+    """Collects wall-clock durations per stage across repeats."""
+
+    def __init__(self):
+        self.durations = {}
+        self.items = {}
+
+    @contextlib.contextmanager
+    def stage(self, name, items):
+        start = time.perf_counter()
+        yield
+        self.durations.setdefault(name, []).append(time.perf_counter() - start)
+        self.items[name] = items
+
+    def report(self):
+        report = {}
+        for name, durations in self.durations.items():
+            cold, warm = durations[0], durations[1:] or durations
+            items = self.items[name]
+            report[name] = {
+                "items": items,
+                "cold_seconds": cold,
+                "cold_items_per_second": items / cold if cold else None,
+                "warm_p50_seconds": percentile(warm, 50),
+                "warm_p99_seconds": percentile(warm, 99),
+                "warm_items_per_second": items / percentile(warm, 50) if percentile(warm, 50) else None,
+            }
+        return report
+
+
+def _named_file(path):
+    with open(path, "rb") as f:
+        file = io.BytesIO(f.read())
+    file.name = os.path.basename(path)
+    return file
+
+
+def run_pipeline(resume_paths, jd_path, timer, top_k=10):
+    """Runs every pipeline stage once, timing each one."""
+    # Imported here so the cache and API settings chosen in main() are picked up
+    from pipeline import extract_sections, generate_fit_summaries, make_resume, score_resumes
+    from utils import embed_texts, read_files
+
+    with open(jd_path, encoding="utf-8") as f:
+        jd_text = f.read()
+
+    with timer.stage("ingest", len(resume_paths)):
+        files = [_named_file(path) for path in resume_paths]
+        resumes = [
+            make_resume(file.name, text)
+            for file, (text, error) in zip(files, read_files(files)) if not error
+        ]
+
+    with timer.stage("extract", len(resumes) + 1):
+        (jd_sections,), all_resume_sections = extract_sections(
+            [jd_text], [resume["full_text"] for resume in resumes]
+        )
+
+    section_texts = [
+        text for sections in [jd_sections, *all_resume_sections] if isinstance(sections, dict)
+        for text in sections.values() if text
+    ]
+    with timer.stage("embed", len(section_texts)):
+        embed_texts(section_texts)
+
+    with timer.stage("score", len(resumes)):
+        candidates = score_resumes(resumes, all_resume_sections, jd_sections)
+        candidates.sort(key=lambda x: x["score"], reverse=True)
+
+    top_candidates = candidates[:top_k]
+    with timer.stage("summarize", len(top_candidates)):
+        generate_fit_summaries(jd_text, [c["text"] for c in top_candidates])
+
+    return candidates
+
+
+def prefilter_recall(jd_path, candidates, shortlist_sizes, timer, top_k=10):
+    """
+    Recall of the full pipeline's top_k candidates within the prefilter
+    shortlist of each size. Scores do not depend on which other resumes are
+    ranked, so this is also the top_k recall of the two-stage pipeline.
+    """
+    from prefilter import shortlist
+
+    with open(jd_path, encoding="utf-8") as f:
+        jd_text = f.read()
+    texts = [candidate["text"] for candidate in candidates]
+    top = set(range(min(top_k, len(candidates))))
+
+    recall = {}
+    for top_n in shortlist_sizes:
+        with timer.stage(f"prefilter@{top_n}", len(texts)):
+            kept = set(shortlist(jd_text, texts, top_n=top_n))
+        recall[str(top_n)] = len(top & kept) / len(top) if top else None
+    return recall
+
+
+def run_benchmark(size, file_format="txt", latency=0.2, requests_per_minute=0, tokens_per_minute=0,
+                  repeats=3, seed=0, shortlist_sizes=(), top_k=10):
+    """Benchmarks the full pipeline on a corpus of the given size and returns the result dict."""
+    with tempfile.TemporaryDirectory() as workdir, FakeLLMServer(
+        latency=latency, requests_per_minute=requests_per_minute, tokens_per_minute=tokens_per_minute,
+    ) as server:
+        os.environ["CACHE_DIR"] = os.path.join(workdir, "cache")
+        os.environ["GROQ_BASE_URL"] = server.base_url
+        os.environ.setdefault("GROQ_API_KEY", "benchmark")
+
+        corpus_start = time.perf_counter()
+        resume_paths, jd_paths = generate_corpus(os.path.join(workdir, "corpus"), size, 1, file_format, seed)
+        corpus_seconds = time.perf_counter() - corpus_start
+
+        timer = StageTimer()
+        total_durations = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            candidates = run_pipeline(resume_paths, jd_paths[0], timer, top_k)
+            total_durations.append(time.perf_counter() - start)
+
+        recall = prefilter_recall(jd_paths[0], candidates, shortlist_sizes, timer, top_k)
+
+        return {
+            "commit": git_commit(),
+            "timestamp": datetime.datetime.now().isoformat(timespec="seconds"),
+            "config": {
+                "size": size,
+                "format": file_format,
+                "latency": latency,
+                "requests_per_minute": requests_per_minute,
+                "tokens_per_minute": tokens_per_minute,
+                "repeats": repeats,
+                "seed": seed,
+                "top_k": top_k,
+            },
+            "corpus_seconds": corpus_seconds,
+            "total_cold_seconds": total_durations[0],
+            "total_warm_p50_seconds": percentile(total_durations[1:] or total_durations, 50),
+            "stages": timer.report(),
+            "prefilter_recall_at_k": recall,
+            "llm_requests": server.requests,
+            "llm_rate_limited": server.rate_limited,
+            "peak_rss_mb": peak_rss_mb(),
+        }
+
+
+def compare(baseline, result):
+    """Returns printable lines comparing per-stage timings of two results."""
+    lines = [f"{'stage':<12}{'metric':<18}{'baseline':>12}{'current':>12}{'change':>10}"]
+    for name, stage in result["stages"].items():
+        old_stage = baseline.get("stages", {}).get(name)
+        if not old_stage:
+            continue
+        for metric in ("cold_seconds", "warm_p50_seconds"):
+            old, new = old_stage[metric], stage[metric]
+            change = f"{(new - old) / old:+.1%}" if old else "n/a"
+            lines.append(f"{name:<12}{metric:<18}{old:>12.4f}{new:>12.4f}{change:>10}")
+    if "import_seconds" in baseline and "import_seconds" in result:
+        old, new = baseline["import_seconds"], result["import_seconds"]
+        lines.append(f"{'import':<12}{'seconds':<18}{old:>12.4f}{new:>12.4f}{(new - old) / old:>+10.1%}")
+    return lines
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the ranking pipeline end to end.")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10], help="Corpus sizes, e.g. 10 1000 10000.")
+    parser.add_argument("--format", choices=["txt", "pdf"], default="txt", help="Resume file format.")
+    parser.add_argument("--latency", type=float, default=0.2, help="Fake LLM latency in seconds.")
+    parser.add_argument("--rpm", type=int, default=0, help="Fake LLM requests per minute, 0 for unlimited.")
+    parser.add_argument("--tpm", type=int, default=0, help="Fake LLM tokens per minute, 0 for unlimited.")
+    parser.add_argument("--repeats", type=int, default=3, help="Pipeline runs per size; the first is cold.")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--shortlist", type=int, nargs="*", default=[],
+                        help="Prefilter shortlist sizes whose recall of the full pipeline's top candidates "
+                             "is reported.")
+    parser.add_argument("--top-k", type=int, default=10, help="Top candidates that get fit summaries.")
+    parser.add_argument("--output-dir", default=RESULTS_DIR)
+    parser.add_argument("--compare", help="Earlier result JSON file to compare against.")
+    parser.add_argument("--import-budget", type=float, default=IMPORT_TIME_BUDGET_SECONDS,
+                        help="Seconds the app's modules may take to import; exceeding it fails the run.")
+    args = parser.parse_args(argv)
+
+    import_seconds = measure_import_seconds()
+    print(f"import time {import_seconds:.3f}s (budget {args.import_budget:.3f}s)")
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    for size in args.sizes:
+        # A fresh process per size keeps caches and peak RSS from leaking between runs
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+            result = executor.submit(
+                run_benchmark, size, args.format, args.latency, args.rpm, args.tpm, args.repeats, args.seed,
+                args.shortlist, args.top_k,
+            ).result()
+        result["import_seconds"] = import_seconds
+        result["import_budget_seconds"] = args.import_budget
+        path = os.path.join(
+            args.output_dir,
+            f"{result['timestamp'].replace(':', '')}_{result['commit']}_{size}{args.format}.json",
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+
+        print(f"size={size} format={args.format}: cold {result['total_cold_seconds']:.2f}s, "
+              f"warm {result['total_warm_p50_seconds']:.2f}s, peak RSS {result['peak_rss_mb']['self']:.0f} MB")
+        for name, stage in result["stages"].items():
+            print(f"  {name:<14} {stage['items']:>7} items  cold {stage['cold_seconds']:8.3f}s  "
+                  f"warm p50 {stage['warm_p50_seconds']:8.3f}s  p99 {stage['warm_p99_seconds']:8.3f}s")
+        for top_n, recall in result["prefilter_recall_at_k"].items():
+            print(f"  prefilter shortlist of {top_n}: recall@{args.top_k} {recall:.2f}")
+        if baseline is not None:
+            print("\n".join(compare(baseline, result)))
+        print(f"  written to {path}")
+
+    if import_seconds > args.import_budget:
+        print(f"Import time {import_seconds:.3f}s is over the {args.import_budget:.3f}s budget", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+from metrics import METRICS
+
+CACHE_DIR = os.getenv("CACHE_DIR", ".cache")
+
+
+def content_hash(*parts):
+    """Returns a stable SHA-256 hex digest of the given strings or bytes."""
+    digest = hashlib.sha256()
+    for part in parts:
+        if isinstance(part, str):
+            part = part.encode("utf-8")
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Disk-backed key-value cache of strings in SQLite.
+
+    Entries older than max_age_seconds are dropped and the least recently used
+    entries are evicted once the cache grows past max_entries. A disabled cache
+    never returns hits and never stores anything.
+    """
+
+    filename = "cache.sqlite"
+    metric_name = "disk"
+
+    def __init__(self, path=None, max_entries=100_000, max_age_seconds=30 * 24 * 3600,
+                 enabled=True):
+        self.path = path or os.path.join(CACHE_DIR, self.filename)
+        self.max_entries = max_entries
+        self.max_age_seconds = max_age_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        if self.path != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)")
+        self._conn.commit()
+
+    def lookup(self, key):
+        """Returns the cached value for key, or None on a miss or when the cache is disabled."""
+        if not self.enabled:
+            return None
+
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or now - row[1] > self.max_age_seconds:
+                self.misses += 1
+                METRICS.increment("cache_misses_total", cache=self.metric_name)
+                return None
+            self._conn.execute("UPDATE entries SET last_used = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self.hits += 1
+            METRICS.increment("cache_hits_total", cache=self.metric_name)
+            return row[0]
+
+    def store(self, key, value):
+        """Stores a value, evicting old entries every few hundred writes."""
+        if not self.enabled:
+            return
+
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, created_at, last_used) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._conn.commit()
+            self._writes += 1
+            if self._writes % 256 == 0:
+                self._evict(now)
+
+    def evict(self):
+        """Drops expired entries and trims the cache down to max_entries."""
+        with self._lock:
+            self._evict(time.time())
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM entries WHERE created_at < ?", (now - self.max_age_seconds,))
+        self._conn.execute(
+            """
+            DELETE FROM entries WHERE key IN (
+                SELECT key FROM entries ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+            """,
+            (self.max_entries,),
+        )
+        self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM entries")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def stats(self):
+        """Returns hit/miss counters and the number of stored entries."""
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self), "enabled": self.enabled}
+
+
+class LLMCache(DiskCache):
+    """Cache of LLM completions keyed by a hash of the prompt text, model name and temperature."""
+
+    filename = "llm_cache.sqlite"
+    metric_name = "llm"
+
+    @staticmethod
+    def make_key(prompt, model, temperature):
+        return content_hash(prompt, model, repr(float(temperature)))
+
+    def get(self, prompt, model, temperature):
+        return self.lookup(self.make_key(prompt, model, temperature))
+
+    def set(self, prompt, model, temperature, value):
+        self.store(self.make_key(prompt, model, temperature), value)
+
+
+class DocumentTextCache(DiskCache):
+    """Cache of text extracted from uploaded files, keyed by a hash of the file content."""
+
+    filename = "document_text.sqlite"
+    metric_name = "document_text"
+
+    @staticmethod
+    def make_key(data, max_pages=None, max_chars=None):
+        return content_hash(data, repr(max_pages), repr(max_chars))
+
+    def get(self, data, max_pages=None, max_chars=None):
+        return self.lookup(self.make_key(data, max_pages, max_chars))
+
+    def set(self, data, value, max_pages=None, max_chars=None):
+        self.store(self.make_key(data, max_pages, max_chars), value)
+
+
+class FitSummaryCache(DiskCache):
+    """Cache of candidate fit summaries keyed by the hashes of the job description and resume texts."""
+
+    filename = "fit_summaries.sqlite"
+    metric_name = "fit_summary"
+
+    @staticmethod
+    def make_key(jd_text, resume_text):
+        return content_hash(content_hash(jd_text), content_hash(resume_text))
+
+    def get(self, jd_text, resume_text):
+        return self.lookup(self.make_key(jd_text, resume_text))
+
+    def set(self, jd_text, resume_text, value):
+        self.store(self.make_key(jd_text, resume_text), value)
+
+
+class BlobStore:
+    """
+    Content-addressed store of raw bytes on disk, one file per SHA-256 digest.
+    Writes are atomic, so a blob is either complete or absent. Putting a blob
+    that is already stored refreshes its age for remove_older_than().
+    """
+
+    def __init__(self, path=None):
+        self.path = path or os.path.join(CACHE_DIR, "blobs")
+        os.makedirs(self.path, exist_ok=True)
+
+    def blob_path(self, key):
+        return os.path.join(self.path, key[:2], key)
+
+    def __contains__(self, key):
+        return os.path.exists(self.blob_path(key))
+
+    def put(self, data):
+        """Stores data if it is not stored yet and returns its key."""
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        key = hashlib.sha256(data).hexdigest()
+        path = self.blob_path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return key
+
+    def get(self, key):
+        with open(self.blob_path(key), "rb") as f:
+            return f.read()
+
+    def remove_older_than(self, max_age_seconds):
+        """Deletes the blobs, and leftover partial writes, last put more than max_age_seconds ago."""
+        cutoff = time.time() - max_age_seconds
+        removed = 0
+        for directory in os.scandir(self.path):
+            if not directory.is_dir():
+                continue
+            for entry in os.scandir(directory.path):
+                try:
+                    if entry.stat().st_mtime < cutoff:
+                        os.remove(entry.path)
+                        removed += 1
+                except FileNotFoundError:
+                    pass  # Removed by another process
+        METRICS.increment("blobs_removed_total", removed)
+        return removed
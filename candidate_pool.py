@@ -0,0 +1,348 @@
+import json
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from cache import CACHE_DIR, content_hash
+from pipeline import extract_sections
+from utils import (
+    SBERT_MODEL_VERSION, SECTION_PAIRS, embed_texts, extract_contact_info, normalize_rows, score_candidates,
+    section_scores_to_dict,
+)
+
+
+class IVFIndex:
+    """
+    Inverted-file index for maximum inner product search over normalized vectors.
+
+    Vectors are clustered with spherical k-means and a query only scans the
+    n_probe lists whose centroids are closest to it. Until enough vectors are
+    added to train the clusters, every vector sits in a single list and search
+    is exact. Vectors are kept as float16, which is enough to pick a shortlist
+    that is then re-scored exactly.
+    """
+
+    min_train_size = 256
+
+    def __init__(self, dim, n_probe=None):
+        self.dim = dim
+        self.n_probe = n_probe
+        self.centroids = np.zeros((1, dim), dtype=np.float32)
+        self.ids = np.zeros(0, dtype=np.int64)
+        self.vectors = np.zeros((0, dim), dtype=np.float16)
+        self.assignments = np.zeros(0, dtype=np.int32)
+        self.trained_size = 0
+
+    def __len__(self):
+        return len(self.ids)
+
+    @property
+    def n_lists(self):
+        return len(self.centroids)
+
+    def _assign(self, vectors):
+        if self.n_lists == 1:
+            return np.zeros(len(vectors), dtype=np.int32)
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def train(self, iterations=10, max_samples=20_000, seed=0):
+        """Clusters the stored vectors into about 4·√n lists and reassigns every vector."""
+        n = len(self.ids)
+        n_lists = int(min(1024, max(1, 4 * np.sqrt(n))))
+        if n < self.min_train_size or n_lists < 2:
+            return
+
+        rng = np.random.default_rng(seed)
+        sample_rows = rng.choice(n, size=min(n, max_samples), replace=False)
+        sample = self.vectors[sample_rows].astype(np.float32)
+        centroids = sample[rng.choice(len(sample), size=n_lists, replace=False)]
+
+        for _ in range(iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            empty = np.bincount(labels, minlength=n_lists) == 0
+            # Empty clusters are reseeded from random samples
+            sums[empty] = sample[rng.choice(len(sample), size=int(empty.sum()))]
+            centroids = normalize_rows(sums)
+
+        self.centroids = centroids
+        self.assignments = self._assign(self.vectors.astype(np.float32))
+        self.trained_size = n
+
+    def add(self, ids, vectors):
+        vectors = np.asarray(vectors, dtype=np.float32)
+        self.remove(ids)
+        self.ids = np.concatenate([self.ids, np.asarray(ids, dtype=np.int64)])
+        self.vectors = np.concatenate([self.vectors, vectors.astype(np.float16)])
+        self.assignments = np.concatenate([self.assignments, self._assign(vectors)])
+
+        # Retrain once the index has doubled since the clusters were fitted
+        if len(self.ids) >= max(self.min_train_size, 2 * self.trained_size):
+            self.train()
+
+    def remove(self, ids):
+        keep = ~np.isin(self.ids, np.asarray(ids, dtype=np.int64))
+        if not keep.all():
+            self.ids = self.ids[keep]
+            self.vectors = self.vectors[keep]
+            self.assignments = self.assignments[keep]
+
+    def search(self, query, k=10):
+        """
+        Returns the ids and approximate inner products of the k best vectors.
+        """
+        if not len(self.ids):
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.float32)
+
+        query = np.asarray(query, dtype=np.float32)
+        n_probe = self.n_probe or max(16, self.n_lists // 8)
+        if n_probe < self.n_lists:
+            probe = np.argsort(self.centroids @ query)[-n_probe:]
+            rows = np.flatnonzero(np.isin(self.assignments, probe))
+        else:
+            rows = np.arange(len(self.ids))
+
+        scores = self.vectors[rows].astype(np.float32) @ query
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return self.ids[rows[top]], scores[top]
+
+    def save(self, path):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(
+            tmp_path,
+            centroids=self.centroids,
+            ids=self.ids,
+            vectors=self.vectors,
+            assignments=self.assignments,
+            trained_size=self.trained_size,
+        )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, n_probe=None):
+        with np.load(path) as data:
+            index = cls(data["centroids"].shape[1], n_probe=n_probe)
+            index.centroids = data["centroids"]
+            index.ids = data["ids"]
+            index.vectors = data["vectors"]
+            index.assignments = data["assignments"]
+            index.trained_size = int(data["trained_size"])
+        return index
+
+
+def candidate_vector(section_embeddings):
+    """
+    Concatenates normalized section embeddings in SECTION_PAIRS order.
+
+    The inner product of a candidate vector with a job description vector,
+    divided by the number of sections, is the candidate's overall score.
+    """
+    return normalize_rows(section_embeddings).reshape(-1)
+
+
+class CandidatePool:
+    """
+    Standing pool of ingested resumes that can be ranked against new job descriptions.
+
+    Candidate records and extracted sections live in SQLite, section embeddings
+    in the shared embedding store, and an IVFIndex over the concatenated
+    section embeddings finds a shortlist that is then re-scored exactly with
+    score_candidates.
+
+    The index is tagged with the embedding model version. Opening the pool
+    with a different version re-embeds every candidate before the next add or
+    search, so vectors of two models are never compared.
+    """
+
+    def __init__(self, path=None, n_probe=None, model_version=SBERT_MODEL_VERSION):
+        self.path = path or os.path.join(CACHE_DIR, "candidate_pool")
+        os.makedirs(self.path, exist_ok=True)
+        self._lock = threading.Lock()
+
+        self._conn = sqlite3.connect(os.path.join(self.path, "candidates.sqlite"), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS candidates (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                text_hash TEXT NOT NULL UNIQUE,
+                text TEXT NOT NULL,
+                sections TEXT NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+
+        self.model_version = model_version
+        self.n_probe = n_probe
+        self._index_path = os.path.join(self.path, "index.npz")
+        self.index = None
+        stored_version = self._conn.execute("SELECT value FROM meta WHERE name = 'model_version'").fetchone()
+        self._stale = stored_version != (model_version,)
+        if not self._stale and os.path.exists(self._index_path):
+            self.index = IVFIndex.load(self._index_path, n_probe=n_probe)
+
+    def __len__(self):
+        return self._conn.execute("SELECT COUNT(*) FROM candidates").fetchone()[0]
+
+    def _section_vectors(self, sections_list):
+        """Returns one concatenated candidate vector per sections dict."""
+        section_keys = list(SECTION_PAIRS)
+        texts = [sections.get(key, "") for sections in sections_list for key in section_keys]
+        dim = self.index.dim // len(section_keys) if self.index is not None else 0
+        embeddings = np.zeros((len(texts), dim), dtype=np.float32)
+        present = [i for i, text in enumerate(texts) if text]
+        if present:
+            found = embed_texts([texts[i] for i in present])
+            embeddings = np.zeros((len(texts), found.shape[1]), dtype=np.float32)
+            embeddings[present] = found
+        return [
+            candidate_vector(embeddings[i:i + len(section_keys)])
+            for i in range(0, len(texts), len(section_keys))
+        ]
+
+    def _refresh_index(self):
+        """Rebuilds the index from the stored sections if it was built with another model version."""
+        with self._lock:
+            if not self._stale:
+                return
+            rows = self._conn.execute("SELECT id, sections FROM candidates ORDER BY id").fetchall()
+            index = None
+            for start in range(0, len(rows), 500):
+                chunk = rows[start:start + 500]
+                vectors = self._section_vectors([json.loads(sections) for _, sections in chunk])
+                if index is None:
+                    index = IVFIndex(len(vectors[0]), n_probe=self.n_probe)
+                index.add([candidate_id for candidate_id, _ in chunk], np.stack(vectors))
+
+            if index is not None:
+                index.save(self._index_path)
+            elif os.path.exists(self._index_path):
+                os.remove(self._index_path)
+            self.index = index
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meta (name, value) VALUES ('model_version', ?)", (self.model_version,)
+            )
+            self._conn.commit()
+            self._stale = False
+
+    def add(self, candidates):
+        """
+        Adds already extracted candidates to the pool.
+
+        Args:
+            candidates: list of dicts with name, email, text and sections
+
+        Returns:
+            list of candidate ids; re-adding a known resume text updates it in place
+        """
+        candidates = [c for c in candidates if isinstance(c.get("sections"), dict)]
+        if not candidates:
+            return []
+
+        self._refresh_index()
+        vectors = self._section_vectors([c["sections"] for c in candidates])
+        with self._lock:
+            ids = []
+            for candidate in candidates:
+                text_hash = content_hash(candidate["text"])
+                self._conn.execute(
+                    """
+                    INSERT INTO candidates (name, email, text_hash, text, sections) VALUES (?, ?, ?, ?, ?)
+                    ON CONFLICT (text_hash) DO UPDATE SET
+                        name = excluded.name, email = excluded.email, sections = excluded.sections
+                    """,
+                    (candidate["name"], candidate["email"], text_hash,
+                     candidate["text"], json.dumps(candidate["sections"])),
+                )
+                ids.append(self._conn.execute(
+                    "SELECT id FROM candidates WHERE text_hash = ?", (text_hash,)
+                ).fetchone()[0])
+            self._conn.commit()
+
+            if self.index is None:
+                self.index = IVFIndex(len(vectors[0]), n_probe=self.n_probe)
+            self.index.add(ids, np.stack(vectors))
+            self.index.save(self._index_path)
+        return ids
+
+    def ingest(self, documents, use_cache=True):
+        """
+        Extracts resume sections for (name, text) pairs and adds them to the pool.
+        Resumes whose extraction failed are skipped.
+        """
+        _, all_sections = extract_sections([], [text for _, text in documents], use_cache=use_cache)
+        return self.add([
+            {"name": name, "email": extract_contact_info(text), "text": text, "sections": dict(sections)}
+            for (name, text), sections in zip(documents, all_sections)
+            if sections.complete
+        ])
+
+    def remove(self, ids):
+        self._refresh_index()
+        with self._lock:
+            self._conn.executemany("DELETE FROM candidates WHERE id = ?", [(int(i),) for i in ids])
+            self._conn.commit()
+            if self.index is not None:
+                self.index.remove(ids)
+                self.index.save(self._index_path)
+
+    def get(self, ids):
+        """Returns candidate records by id, in the given order."""
+        rows = {}
+        for start in range(0, len(ids), 500):
+            chunk = [int(i) for i in ids[start:start + 500]]
+            placeholders = ",".join("?" * len(chunk))
+            for row in self._conn.execute(
+                f"SELECT id, name, email, text, sections FROM candidates WHERE id IN ({placeholders})", chunk
+            ):
+                rows[row[0]] = {
+                    "id": row[0], "name": row[1], "email": row[2], "text": row[3], "sections": json.loads(row[4]),
+                }
+        return [rows[int(i)] for i in ids if int(i) in rows]
+
+    def search(self, jd_sections, k=10, shortlist_size=None):
+        """
+        Ranks the pool against a job description.
+
+        The index returns a shortlist of shortlist_size candidates (5·k by
+        default), which is re-scored exactly and cut down to the top k.
+
+        Returns:
+            list of candidate dicts sorted by score, in the same shape app.py displays
+        """
+        self._refresh_index()
+        if self.index is None or not len(self.index):
+            return []
+
+        jd_embeddings = np.zeros((len(SECTION_PAIRS), self.index.dim // len(SECTION_PAIRS)), dtype=np.float32)
+        job_keys = [key for key in SECTION_PAIRS.values() if jd_sections.get(key)]
+        if job_keys:
+            rows = [list(SECTION_PAIRS.values()).index(key) for key in job_keys]
+            jd_embeddings[rows] = embed_texts([jd_sections[key] for key in job_keys])
+        query = candidate_vector(jd_embeddings)
+
+        ids, _ = self.index.search(query, k=shortlist_size or max(5 * k, 50))
+        shortlist = self.get(ids)
+        scores, section_names = score_candidates([c["sections"] for c in shortlist], jd_sections)
+
+        results = []
+        for candidate, score_row in zip(shortlist, scores):
+            similarities = section_scores_to_dict(score_row, section_names)
+            results.append({
+                "id": candidate["id"],
+                "name": candidate["name"],
+                "email": candidate["email"],
+                "score": similarities["Overall Score"],
+                "text": candidate["text"],
+                "section_scores": similarities,
+            })
+        results.sort(key=lambda x: x["score"], reverse=True)
+        return results[:k]
@@ -0,0 +1,251 @@
+"""
+Headless batch ranking of resumes against one or more job descriptions.
+
+Example:
+    python cli.py --resumes resumes/ --resumes "exports/*.jsonl" \
+        --jd jobs/data_analyst.txt --jd jobs/data_engineer.pdf --output results.csv
+
+Resumes can be directories of .txt/.pdf files, individual files, glob patterns,
+or JSONL files with one {"name": ..., "text": ...} record per line. Results are
+appended to the output file (CSV or JSONL, by extension) as each batch
+finishes, and each row also names the job description the resume fits best.
+Finished resumes are recorded next to the output, so an interrupted
+run picks up where it stopped when started again with the same arguments.
+"""
+import argparse
+import csv
+import glob
+import io
+import json
+import os
+import sqlite3
+import sys
+
+from cache import content_hash
+from metrics import METRICS
+from pipeline import extract_sections, make_resume, score_resumes_multi
+from utils import SECTION_PAIRS, read_document, read_files
+
+
+def _named_file(path):
+    """Loads a local file into an in-memory file object with a name, like an upload."""
+    with open(path, "rb") as f:
+        file = io.BytesIO(f.read())
+    file.name = path
+    return file
+
+
+def iter_resume_sources(sources):
+    """
+    Yields (name, loader) pairs for every resume in the given sources, where
+    loader returns either a file object or the resume text.
+    """
+    for source in sources:
+        paths = sorted(glob.glob(source)) if glob.has_magic(source) else [source]
+        for path in paths:
+            if os.path.isdir(path):
+                for name in sorted(os.listdir(path)):
+                    file_path = os.path.join(path, name)
+                    if name.lower().endswith((".txt", ".pdf")) and os.path.isfile(file_path):
+                        yield file_path, lambda file_path=file_path: _named_file(file_path)
+            elif path.lower().endswith(".jsonl"):
+                with open(path, encoding="utf-8") as f:
+                    for line_number, line in enumerate(f, 1):
+                        if not line.strip():
+                            continue
+                        record = json.loads(line)
+                        name = str(record.get("name") or f"{path}:{line_number}")
+                        yield name, lambda text=record["text"]: text
+            else:
+                yield path, lambda path=path: _named_file(path)
+
+
+def read_job_description(path):
+    with open(path, "rb") as f:
+        text, error = read_document(path, f.read())
+    if error:
+        raise ValueError(f"Could not read job description {path}: {error}")
+    return text
+
+
+class Progress:
+    """Records which resumes are finished for a given set of job descriptions."""
+
+    def __init__(self, path, jd_texts):
+        self._conn = sqlite3.connect(path)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS done (key TEXT PRIMARY KEY)")
+        self._conn.commit()
+        self._run_key = content_hash(*jd_texts)
+
+    def key(self, name):
+        return content_hash(self._run_key, name)
+
+    def is_done(self, name):
+        return self._conn.execute("SELECT 1 FROM done WHERE key = ?", (self.key(name),)).fetchone() is not None
+
+    def mark_done(self, names):
+        self._conn.executemany("INSERT OR IGNORE INTO done (key) VALUES (?)", [(self.key(n),) for n in names])
+        self._conn.commit()
+
+
+class ResultWriter:
+    """
+    Appends result rows to a CSV or JSONL file and flushes after every batch.
+
+    Rows already in the file are not written again, so a run that stopped
+    after writing a batch but before recording it as done does not duplicate
+    it when resumed. A last line cut off by a crash is dropped.
+    """
+
+    def __init__(self, path):
+        self.format = "csv" if path.lower().endswith(".csv") else "jsonl"
+        self.fieldnames = [
+            "job_description", "name", "email", "Overall Score", *SECTION_PAIRS.values(), "best_fit_job_description",
+        ]
+        self._written = self._read_written(path)
+        is_new = not os.path.exists(path) or os.path.getsize(path) == 0
+        self._file = open(path, "a", newline="", encoding="utf-8")
+        if self.format == "csv":
+            self._writer = csv.DictWriter(self._file, fieldnames=self.fieldnames, extrasaction="ignore")
+            if is_new:
+                self._writer.writeheader()
+
+    def _read_written(self, path):
+        """Returns the (job description, name) pairs in the file, after cutting off an incomplete last line."""
+        if not os.path.exists(path):
+            return set()
+        with open(path, "rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+        with open(path, newline="", encoding="utf-8") as f:
+            rows = csv.DictReader(f) if self.format == "csv" else (json.loads(line) for line in f if line.strip())
+            return {(row["job_description"], row["name"]) for row in rows}
+
+    def write(self, rows):
+        for row in rows:
+            key = (row["job_description"], row["name"])
+            if key in self._written:
+                continue
+            self._written.add(key)
+            if self.format == "csv":
+                self._writer.writerow(row)
+            else:
+                self._file.write(json.dumps(row) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self):
+        self._file.close()
+
+
+def rank(resume_sources, jd_paths, output, batch_size=50, progress_path=None, use_cache=True, log=print):
+    """
+    Ranks every resume against every job description, appending one result row
+    per (job description, resume) pair to output as batches finish.
+
+    Returns:
+        number of resumes processed in this run
+    """
+    jd_texts = [read_job_description(path) for path in jd_paths]
+    all_jd_sections, _ = extract_sections(jd_texts, [], use_cache=use_cache)
+    for path, jd_sections in zip(jd_paths, all_jd_sections):
+        if not jd_sections.complete:
+            raise RuntimeError(f"Could not extract sections from {path}: {jd_sections.error}")
+
+    progress = Progress(progress_path or f"{output}.progress.sqlite", jd_texts)
+    writer = ResultWriter(output)
+    processed = 0
+
+    def run_batch(batch):
+        loaded = [(name, loader()) for name, loader in batch]
+        files = [item for _, item in loaded if not isinstance(item, str)]
+        file_texts = iter(read_files(files))
+
+        resumes = []
+        for name, item in loaded:
+            if isinstance(item, str):
+                resumes.append(make_resume(name, item))
+                continue
+            text, error = next(file_texts)
+            if error:
+                log(f"Skipping {name}: {error}", file=sys.stderr)
+            else:
+                resumes.append(make_resume(name, text))
+
+        _, all_resume_sections = extract_sections([], [r["full_text"] for r in resumes], use_cache=use_cache)
+        extracted = [
+            (resume, sections) for resume, sections in zip(resumes, all_resume_sections)
+            if sections.complete
+        ]
+        for resume, sections in zip(resumes, all_resume_sections):
+            if not sections.complete:
+                log(f"Skipping {resume['name']}: {sections.error}", file=sys.stderr)
+
+        # Every resume is scored against every job description in one pass
+        rankings, best_fit = score_resumes_multi(
+            [r for r, _ in extracted], [s for _, s in extracted], all_jd_sections
+        )
+        best_fit_paths = {fit["name"]: jd_paths[fit["best_fit"]] for fit in best_fit}
+        rows = []
+        for jd_path, candidates in zip(jd_paths, rankings):
+            for candidate in candidates:
+                rows.append({
+                    "job_description": jd_path,
+                    "name": candidate["name"],
+                    "email": candidate["email"],
+                    **{section: round(score, 6) for section, score in candidate["section_scores"].items()},
+                    "best_fit_job_description": best_fit_paths[candidate["name"]],
+                })
+        writer.write(rows)
+
+        # Resumes whose extraction failed are retried on the next run; unreadable files are not
+        read_names = {r["name"] for r in resumes}
+        unreadable = [name for name, _ in loaded if name not in read_names]
+        progress.mark_done([r["name"] for r, _ in extracted] + unreadable)
+        return len(batch)
+
+    try:
+        batch = []
+        for name, loader in iter_resume_sources(resume_sources):
+            if progress.is_done(name):
+                continue
+            batch.append((name, loader))
+            if len(batch) >= batch_size:
+                processed += run_batch(batch)
+                log(f"Processed {processed} resumes", file=sys.stderr)
+                batch = []
+        if batch:
+            processed += run_batch(batch)
+            log(f"Processed {processed} resumes", file=sys.stderr)
+    finally:
+        writer.close()
+
+    return processed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Rank resumes against job descriptions without the web UI.")
+    parser.add_argument("--resumes", action="append", required=True,
+                        help="Resume directory, file, glob pattern or JSONL file. Can be repeated.")
+    parser.add_argument("--jd", action="append", required=True,
+                        help="Job description .txt or .pdf file. Can be repeated.")
+    parser.add_argument("--output", required=True, help="Result file; .csv writes CSV, anything else JSONL.")
+    parser.add_argument("--batch-size", type=int, default=50, help="Resumes processed per batch.")
+    parser.add_argument("--progress", help="Progress database (default: <output>.progress.sqlite).")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the LLM completion cache.")
+    parser.add_argument("--metrics", help="Write pipeline metrics here at the end; .json writes JSON, "
+                                          "anything else the Prometheus text format.")
+    args = parser.parse_args(argv)
+
+    processed = rank(args.resumes, args.jd, args.output, batch_size=args.batch_size,
+                     progress_path=args.progress, use_cache=not args.no_cache)
+    print(f"Done: {processed} resumes processed, results in {args.output}", file=sys.stderr)
+
+    if args.metrics:
+        with open(args.metrics, "w", encoding="utf-8") as f:
+            f.write(METRICS.to_json() if args.metrics.endswith(".json") else METRICS.to_prometheus())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,171 @@
+"""
+Shrinks resume and job description text before it is put into LLM prompts.
+
+PDF extraction leaves runs of spaces, blank lines and page headers or
+footers that repeat on every page, and job descriptions often end with legal
+boilerplate (equal opportunity, accommodation and recruiting agency notices)
+that carries nothing for section extraction. compact_text removes those and
+cuts what is left to a token budget, so prompts cost fewer input tokens.
+"""
+import functools
+import os
+import re
+
+from metrics import METRICS
+
+# "0" puts documents into prompts as they were read
+PROMPT_COMPACTION = os.getenv("PROMPT_COMPACTION", "1") != "0"
+# Most tokens of document text per prompt, 0 for no limit; llama3-8b-8192 has an 8192 token context
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+
+# Pre-tokenization in the style of the Llama 3 tokenizer: contractions, words
+# with their leading space, numbers of up to three digits, punctuation runs
+TOKEN_PATTERN = re.compile(r"'(?:[sdmt]|ll|ve|re)| ?[^\W\d_]+| ?\d{1,3}| ?[^\s\w]+|\s+")
+# Letters per token in words the vocabulary does not hold whole
+LETTERS_PER_TOKEN = 8
+
+# A sentence matching any of these in a job description is dropped
+BOILERPLATE_PATTERNS = [re.compile(pattern, re.I) for pattern in (
+    r"\bequal (?:employment )?opportunit(?:y|ies)\b",
+    r"\baffirmative action\b",
+    r"\bwithout regard to (?:race|color|religion|sex|age|national origin)\b",
+    r"\breasonable accommodations?\b",
+    r"\b(?:recruit(?:ment|ing)|staffing) (?:agencies|agency|firms)\b",
+    r"\bthird[- ]party recruiters\b",
+    r"\bunsolicited (?:resumes|submissions|candidates)\b",
+    r"\be-verify\b",
+    r"\b(?:applicant|candidate) privacy (?:notice|policy)\b",
+)]
+
+PAGE_NUMBER_PATTERN = re.compile(r"^(?:page\s*)?\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?$|^-\s*\d{1,3}\s*-$", re.I)
+# pdfplumber writes glyphs without a unicode mapping as "(cid:123)"
+CID_PATTERN = re.compile(r"\(cid:\d+\)")
+# Shorter lines, e.g. "Python" in several skill lists, are kept even when repeated
+MIN_DEDUPLICATED_WORDS = 3
+SENTENCE_END_PATTERN = re.compile(r"(?<=[.!?])\s+")
+# Longer sentences are kept even when they match, they carry more than a legal notice
+MAX_BOILERPLATE_WORDS = 60
+
+
+def count_tokens(text):
+    """Counts the tokens of text with a local approximation of the LLM's tokenizer."""
+    return sum(
+        1 + (len(piece.strip()) - 1) // LETTERS_PER_TOKEN if piece.strip().isalpha() else 1
+        for piece in TOKEN_PATTERN.findall(text)
+    )
+
+
+def normalize_whitespace(text):
+    """Collapses runs of spaces within lines and of blank lines between them."""
+    # splitlines() also breaks at form feeds between PDF pages, split() drops non-breaking spaces
+    text = CID_PATTERN.sub("", text)
+    lines = [" ".join(line.split()) for line in text.splitlines()]
+    return re.sub(r"\n{3,}", "\n\n", "\n".join(lines)).strip()
+
+
+def drop_repeated_lines(text):
+    """
+    Drops page numbers and keeps only the first occurrence of a repeated line,
+    such as a header or footer on every page of a PDF.
+    """
+    seen = set()
+    kept = []
+    for line in text.splitlines():
+        key = line.lower()
+        if PAGE_NUMBER_PATTERN.match(key):
+            continue
+        if len(key.split()) >= MIN_DEDUPLICATED_WORDS:
+            if key in seen:
+                continue
+            seen.add(key)
+        kept.append(line)
+    return "\n".join(kept)
+
+
+def _is_boilerplate(sentence):
+    return (len(sentence.split()) <= MAX_BOILERPLATE_WORDS
+            and any(pattern.search(sentence) for pattern in BOILERPLATE_PATTERNS))
+
+
+def strip_boilerplate(text):
+    """
+    Drops the sentences that match a BOILERPLATE_PATTERNS entry.
+
+    PDF text has no blank lines between paragraphs, so sentences are judged
+    one at a time. If that would drop most of the text, it is returned as it
+    was: a document is not mostly boilerplate, the patterns matched too much.
+    """
+    kept_lines = []
+    for line in text.split("\n"):
+        sentences = [s for s in SENTENCE_END_PATTERN.split(line) if not _is_boilerplate(s)]
+        if sentences or not line:
+            kept_lines.append(" ".join(sentences))
+    stripped = re.sub(r"\n{3,}", "\n\n", "\n".join(kept_lines)).strip()
+    if count_tokens(stripped) < count_tokens(text) / 2:
+        return text
+    return stripped
+
+
+def _truncate_line(line, budget):
+    """Keeps the tokens from the start of line that fit into budget."""
+    end = 0
+    for match in TOKEN_PATTERN.finditer(line):
+        budget -= count_tokens(match.group())
+        if budget < 0:
+            break
+        end = match.end()
+    return line[:end].rstrip()
+
+
+def truncate_to_budget(text, budget):
+    """
+    Keeps whole lines from the start of text while they fit into budget
+    tokens, and of the first line that does not fit the tokens that do.
+    """
+    if not budget:
+        return text
+    kept, used = [], 0
+    for line in text.split("\n"):
+        cost = count_tokens(line + "\n")
+        if used + cost > budget:
+            partial = _truncate_line(line, budget - used)
+            if partial:
+                kept.append(partial)
+            break
+        kept.append(line)
+        used += cost
+    return "\n".join(kept)
+
+
+def compact_text(text, budget=None, boilerplate=False):
+    """
+    Prepares a document for a prompt.
+
+    Args:
+        text: resume or job description text
+        budget: most tokens to keep, PROMPT_TOKEN_BUDGET by default and 0 for no limit
+        boilerplate: also drop legal boilerplate sentences (for job descriptions)
+
+    Returns:
+        tuple of (compacted text, tokens before, tokens after)
+    """
+    budget = PROMPT_TOKEN_BUDGET if budget is None else budget
+    compacted = drop_repeated_lines(normalize_whitespace(text))
+    if boilerplate:
+        compacted = strip_boilerplate(compacted)
+    compacted = truncate_to_budget(compacted, budget)
+    return compacted, count_tokens(text), count_tokens(compacted)
+
+
+@functools.lru_cache(maxsize=256)
+def compact_document(text, kind, budget=None):
+    """
+    compact_text for the prompt builders, with boilerplate removal for job
+    descriptions. Each document's savings are recorded once, however many
+    prompts it is put into.
+    """
+    if not PROMPT_COMPACTION:
+        return text
+    compacted, before, after = compact_text(text, budget, boilerplate=kind == "job description")
+    METRICS.increment("prompt_tokens_saved_total", before - after, kind=kind)
+    return compacted
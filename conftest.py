@@ -0,0 +1,117 @@
+import os
+import string
+import tempfile
+import uuid
+import zlib
+
+import pytest
+
+# Modules read CACHE_DIR on import, so tests never touch the app's .cache
+os.environ.setdefault("CACHE_DIR", tempfile.mkdtemp(prefix="candidate-recommender-tests-"))
+
+# Calls the Groq API and loads the embedding model at import; run it as a script
+collect_ignore = ["similarity_logic_test.py"]
+
+
+class WordHashModel:
+    """Stands in for the embedding model with word counts hashed into dim buckets."""
+
+    def __init__(self, dim):
+        self.dim = dim
+
+    @staticmethod
+    def tokenizer(words, add_special_tokens=True):
+        return {"input_ids": [[0] * len(word) for word in words]}
+
+    @staticmethod
+    def get_max_seq_length():
+        return 256
+
+    def encode(self, texts, batch_size=32):
+        import numpy as np
+
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                embeddings[row, zlib.crc32(word.encode()) % self.dim] += 1
+        return embeddings
+
+
+@pytest.fixture
+def fake_llm(monkeypatch):
+    """A local stand-in for the Groq API without latency; GROQ_BASE_URL points at it."""
+    from benchmarks.fake_llm import FakeLLMServer
+    from extraction import get_llm_client
+
+    with FakeLLMServer(latency=0, jitter=0) as server:
+        monkeypatch.setenv("GROQ_BASE_URL", server.base_url)
+        # The shared client would keep talking to the server of an earlier test
+        get_llm_client.cache_clear()
+        yield server
+
+
+@pytest.fixture
+def api_key():
+    """A key of its own per test, so no test reuses another's cached Groq client."""
+    return f"test-{uuid.uuid4().hex}"
+
+
+@pytest.fixture(scope="session")
+def tiny_sbert_path(tmp_path_factory):
+    """
+    A randomly initialized two-layer BERT Sentence-Transformer with a
+    character vocabulary, saved locally so no test downloads a model.
+    """
+    pytest.importorskip("sentence_transformers")
+    import torch
+    from sentence_transformers import SentenceTransformer, models
+    from transformers import BertConfig, BertModel, BertTokenizerFast
+
+    directory = tmp_path_factory.mktemp("tiny-sbert")
+    bert_dir = str(directory / "bert")
+    characters = string.ascii_lowercase + string.digits + string.punctuation
+    vocab = ["[PAD]", "[UNK]", "[CLS]", "[SEP]", "[MASK]", *characters, *(f"##{c}" for c in characters)]
+    os.makedirs(bert_dir)
+    with open(os.path.join(bert_dir, "vocab.txt"), "w") as f:
+        f.write("\n".join(vocab))
+    BertTokenizerFast(os.path.join(bert_dir, "vocab.txt")).save_pretrained(bert_dir)
+    torch.manual_seed(0)
+    config = BertConfig(vocab_size=len(vocab), hidden_size=32, num_hidden_layers=2, num_attention_heads=2,
+                        intermediate_size=64, max_position_embeddings=512)
+    BertModel(config).save_pretrained(bert_dir)
+
+    transformer = models.Transformer(bert_dir, max_seq_length=256)
+    pooling = models.Pooling(transformer.get_word_embedding_dimension(), "mean")
+    SentenceTransformer(modules=[transformer, pooling]).save(str(directory / "model"))
+    return str(directory / "model")
+
+
+@pytest.fixture
+def tiny_sbert(tiny_sbert_path, tmp_path, monkeypatch):
+    """The tiny model as the app's embedding model, with an embedding store of its own."""
+    import utils
+    from embedding_store import EmbeddingStore
+
+    model = utils.load_sbert_model("torch", tiny_sbert_path)
+    store = EmbeddingStore(str(tmp_path / "embeddings"), model_version=tiny_sbert_path)
+    monkeypatch.setattr(utils, "get_sbert_model", lambda: model)
+    monkeypatch.setattr(utils, "get_embedding_store", lambda: store)
+    return model
+
+
+@pytest.fixture
+def word_hash_model(tmp_path, monkeypatch):
+    """
+    Replaces the app's embedding model with a WordHashModel and an embedding
+    store of its own. Call it with another dim to switch models mid-test.
+    """
+    import utils
+    from embedding_store import EmbeddingStore
+
+    def use(dim=64):
+        store = EmbeddingStore(str(tmp_path / f"embeddings-{dim}"), model_version=f"word-hash-{dim}")
+        monkeypatch.setattr(utils, "get_sbert_model", lambda: WordHashModel(dim))
+        monkeypatch.setattr(utils, "get_embedding_store", lambda: store)
+
+    use()
+    return use
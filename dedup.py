@@ -0,0 +1,128 @@
+"""
+Near-duplicate detection for uploaded resumes.
+
+Candidates re-apply with slightly edited resumes and agencies send the same
+CV under different file names. Every resume gets a MinHash signature of its
+word shingles; locality-sensitive hashing over bands of the signature finds
+candidate pairs, and pairs whose estimated Jaccard similarity reaches
+DEDUP_THRESHOLD end up in one cluster. Resumes that share an email address
+only need DEDUP_EMAIL_THRESHOLD: an agency may send several candidates with
+its own address. Only one representative per cluster is extracted and scored.
+"""
+import collections
+import os
+import re
+import zlib
+
+import numpy as np
+
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "1") != "0"
+# Estimated Jaccard similarity of word shingles from which two resumes count as duplicates
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.8"))
+# The same for resumes with the same email address
+DEDUP_EMAIL_THRESHOLD = float(os.getenv("DEDUP_EMAIL_THRESHOLD", "0.5"))
+
+SHINGLE_WORDS = 5
+NUM_PERMUTATIONS = 64
+# 16 bands of 4 rows make pairs above about 0.5 similarity likely to share a bucket
+LSH_BANDS = 16
+
+TOKEN_PATTERN = re.compile(r"\w+")
+_MERSENNE_PRIME = np.uint64((1 << 61) - 1)
+_MAX_HASH = np.uint64((1 << 32) - 1)
+_rng = np.random.default_rng(20240601)
+_A = _rng.integers(1, 1 << 61, NUM_PERMUTATIONS, dtype=np.uint64)
+_B = _rng.integers(0, 1 << 61, NUM_PERMUTATIONS, dtype=np.uint64)
+
+
+def minhash_signature(text):
+    """MinHash signature of the word shingles of text, or None for text without words."""
+    words = TOKEN_PATTERN.findall(text.lower())
+    if not words:
+        return None
+    shingles = {" ".join(words[i:i + SHINGLE_WORDS]) for i in range(max(1, len(words) - SHINGLE_WORDS + 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    # Universal hashing; the products wrap around in uint64 like in other MinHash implementations
+    with np.errstate(over="ignore"):
+        permuted = (hashes[:, None] * _A + _B) % _MERSENNE_PRIME & _MAX_HASH
+    return permuted.min(axis=0)
+
+
+def similarity(signature_a, signature_b):
+    """Estimated Jaccard similarity of the documents behind two signatures."""
+    return float(np.mean(signature_a == signature_b))
+
+
+def _normalize_email(email):
+    return (email or "").strip(".,;:|()<>[]\"'").lower()
+
+
+def find_duplicates(resumes, threshold=None, email_threshold=None):
+    """
+    Clusters near-duplicate resumes.
+
+    Args:
+        resumes: resume records with "full_text" and "email"; their MinHash
+            signature is stored under "minhash", so later calls reuse it
+        threshold: similarity from which resumes are duplicates, DEDUP_THRESHOLD by default
+        email_threshold: the same for resumes with the same email address,
+            DEDUP_EMAIL_THRESHOLD by default
+
+    Returns:
+        list with the position of its cluster's representative for every
+        resume; the representative is the longest resume of the cluster
+    """
+    threshold = DEDUP_THRESHOLD if threshold is None else threshold
+    email_threshold = DEDUP_EMAIL_THRESHOLD if email_threshold is None else email_threshold
+    parent = list(range(len(resumes)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    signatures = []
+    for resume in resumes:
+        if "minhash" not in resume:
+            resume["minhash"] = minhash_signature(resume["full_text"])
+        signatures.append(resume["minhash"])
+
+    rows = NUM_PERMUTATIONS // LSH_BANDS
+    buckets = collections.defaultdict(list)
+    for i, signature in enumerate(signatures):
+        if signature is not None:
+            for band in range(LSH_BANDS):
+                buckets[band, signature[band * rows:(band + 1) * rows].tobytes()].append(i)
+    # Resumes with one email address are compared even when no band matched
+    emails = [_normalize_email(resume.get("email")) for resume in resumes]
+    for email, members in _group_by_email(emails).items():
+        buckets["email", email] = members
+
+    for members in buckets.values():
+        for n, i in enumerate(members):
+            for j in members[n + 1:]:
+                root_i, root_j = find(i), find(j)
+                if root_i == root_j or signatures[i] is None or signatures[j] is None:
+                    continue
+                pair_threshold = email_threshold if emails[i] and emails[i] == emails[j] else threshold
+                if similarity(signatures[i], signatures[j]) >= pair_threshold:
+                    parent[root_j] = root_i
+
+    clusters = collections.defaultdict(list)
+    for i in range(len(resumes)):
+        clusters[find(i)].append(i)
+    representatives = list(range(len(resumes)))
+    for members in clusters.values():
+        representative = max(members, key=lambda i: len(resumes[i]["full_text"]))
+        for i in members:
+            representatives[i] = representative
+    return representatives
+
+
+def _group_by_email(emails):
+    groups = collections.defaultdict(list)
+    for i, email in enumerate(emails):
+        if email:
+            groups[email].append(i)
+    return {email: members for email, members in groups.items() if len(members) > 1}
@@ -0,0 +1,250 @@
+import os
+import sqlite3
+import threading
+
+import numpy as np
+
+from cache import CACHE_DIR, content_hash
+from metrics import METRICS
+
+
+class EmbeddingStore:
+    """
+    On-disk store of text embeddings: an append-only float32 array read
+    through a memory map, plus a text-hash to row index in SQLite.
+
+    The store is tagged with a model version. Opening it with a different
+    version discards every stored vector, so embeddings from an old model are
+    never mixed with new ones. Deleted rows stay in the vector file until
+    compact() rewrites it.
+
+    Several processes may share a store, e.g. the ranking workers. Writers
+    hold SQLite's write lock while they append vectors and index them, so
+    rows are never handed out twice, and every process picks up rows and
+    compactions of the others from the index.
+    """
+
+    def __init__(self, path=None, model_version="", enabled=True):
+        self.path = path or os.path.join(CACHE_DIR, "embeddings")
+        self.model_version = model_version
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._vectors = None
+
+        os.makedirs(self.path, exist_ok=True)
+        self._conn = sqlite3.connect(os.path.join(self.path, "index.sqlite"), check_same_thread=False, timeout=30)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS rows (key TEXT PRIMARY KEY, row INTEGER NOT NULL)")
+        self._conn.commit()
+
+        meta = dict(self._conn.execute("SELECT name, value FROM meta"))
+        self.generation = int(meta.get("generation", 0))
+        self.dim = int(meta["dim"]) if meta.get("dim") else None
+        if meta.get("model_version") != model_version:
+            self._reset()
+
+        self._index = dict(self._conn.execute("SELECT key, row FROM rows"))
+
+    @property
+    def _vectors_path(self):
+        return os.path.join(self.path, f"vectors-{self.generation}.f32")
+
+    def _set_meta(self, **values):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)",
+            [(name, None if value is None else str(value)) for name, value in values.items()],
+        )
+
+    def _reset(self):
+        """Drops all vectors, e.g. because the model version changed."""
+        old_path = self._vectors_path
+        self.generation += 1
+        self.dim = None
+        self._conn.execute("DELETE FROM rows")
+        self._set_meta(model_version=self.model_version, generation=self.generation, dim=None)
+        self._conn.commit()
+        if os.path.exists(old_path):
+            os.remove(old_path)
+        self._vectors = None
+
+    def _refresh(self):
+        """Picks up the dimension and a compaction or reset from another process."""
+        meta = dict(self._conn.execute("SELECT name, value FROM meta WHERE name IN ('generation', 'dim')"))
+        self.dim = int(meta["dim"]) if meta.get("dim") else None
+        generation = int(meta.get("generation", 0))
+        if generation != self.generation:
+            self.generation = generation
+            self._index = dict(self._conn.execute("SELECT key, row FROM rows"))
+            self._vectors = None
+
+    def _lookup(self, keys):
+        """Adds the rows of keys that other processes stored to the in-memory index."""
+        keys = [key for key in keys if key not in self._index]
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            self._index.update(self._conn.execute(f"SELECT key, row FROM rows WHERE key IN ({placeholders})", chunk))
+
+    def _row_count(self):
+        if self.dim is None or not os.path.exists(self._vectors_path):
+            return 0
+        return os.path.getsize(self._vectors_path) // (4 * self.dim)
+
+    def _load_vectors(self):
+        """Returns a read-only memory map over every row written so far."""
+        rows = self._row_count()
+        if self._vectors is None or len(self._vectors) != rows:
+            self._vectors = (
+                np.memmap(self._vectors_path, dtype=np.float32, mode="r", shape=(rows, self.dim))
+                if rows else np.zeros((0, self.dim or 0), dtype=np.float32)
+            )
+        return self._vectors
+
+    @staticmethod
+    def make_key(text):
+        return content_hash(text)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, text):
+        return self.make_key(text) in self._index
+
+    def get(self, texts):
+        """
+        Looks up stored embeddings.
+
+        Returns:
+            tuple of (array with one row per text, list of indices that were missing);
+            missing rows are left as zeros
+        """
+        keys = [self.make_key(text) for text in texts]
+        with self._lock:
+            self._refresh()
+            self._lookup(keys)
+            rows = [self._index.get(key) for key in keys]
+            missing = [i for i, row in enumerate(rows) if row is None]
+            found = [i for i, row in enumerate(rows) if row is not None]
+
+            result = np.zeros((len(texts), self.dim or 0), dtype=np.float32)
+            if found:
+                vectors = self._load_vectors()
+                result[found] = vectors[[rows[i] for i in found]]
+        return result, missing
+
+    def add(self, texts, embeddings):
+        """Appends embeddings for texts that are not stored yet."""
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        with self._lock:
+            # The write lock makes the row count, the append and the index one step across processes
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._append(texts, embeddings)
+            except BaseException:
+                self._conn.rollback()
+                raise
+            self._conn.commit()
+
+    def _append(self, texts, embeddings):
+        self._refresh()
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            self._set_meta(dim=self.dim)
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Expected {self.dim}-dimensional embeddings, got {embeddings.shape[1]}")
+
+        keyed = {self.make_key(text): embedding for text, embedding in zip(texts, embeddings)}
+        self._lookup(list(keyed))
+        new_rows = {key: embedding for key, embedding in keyed.items() if key not in self._index}
+        if not new_rows:
+            return
+
+        # Vectors are flushed before the index so the index never points past the file
+        start = self._row_count()
+        with open(self._vectors_path, "ab") as f:
+            f.write(np.stack(list(new_rows.values())).tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+
+        assigned = {key: start + i for i, key in enumerate(new_rows)}
+        self._conn.executemany("INSERT OR REPLACE INTO rows (key, row) VALUES (?, ?)", assigned.items())
+        self._index.update(assigned)
+
+    def encode(self, texts, encode_fn):
+        """
+        Returns embeddings for texts, calling encode_fn once with the distinct
+        texts that are not in the store yet and storing the result.
+        """
+        result, missing = self.get(texts) if self.enabled else (None, list(range(len(texts))))
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        METRICS.increment("cache_hits_total", len(texts) - len(missing), cache="embedding")
+        METRICS.increment("cache_misses_total", len(missing), cache="embedding")
+        if not missing:
+            return result
+
+        unique_missing = list(dict.fromkeys(texts[i] for i in missing))
+        new_embeddings = np.asarray(encode_fn(unique_missing), dtype=np.float32)
+        if self.enabled:
+            self.add(unique_missing, new_embeddings)
+
+        if result is None or result.shape[1] != new_embeddings.shape[1]:
+            # The store was empty or bypassed, so nothing was found to carry over
+            result = np.zeros((len(texts), new_embeddings.shape[1]), dtype=np.float32)
+        position = {text: i for i, text in enumerate(unique_missing)}
+        result[missing] = new_embeddings[[position[texts[i]] for i in missing]]
+        return result
+
+    def delete(self, texts):
+        """Removes texts from the index; their rows are reclaimed by compact()."""
+        keys = [(self.make_key(text),) for text in texts]
+        with self._lock:
+            self._conn.executemany("DELETE FROM rows WHERE key = ?", keys)
+            self._conn.commit()
+            for (key,) in keys:
+                self._index.pop(key, None)
+
+    def compact(self):
+        """Rewrites the vector file so it only holds rows that are still indexed."""
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._refresh()
+                old_path = self._vectors_path
+                live = sorted(self._conn.execute("SELECT key, row FROM rows"), key=lambda item: item[1])
+                vectors = self._load_vectors() if live else None
+
+                self.generation += 1
+                with open(self._vectors_path, "wb") as f:
+                    for start in range(0, len(live), 4096):
+                        chunk = live[start:start + 4096]
+                        f.write(np.ascontiguousarray(vectors[[row for _, row in chunk]]).tobytes())
+                    f.flush()
+                    os.fsync(f.fileno())
+
+                # Switching the index and generation in one transaction makes compaction atomic
+                remapped = {key: i for i, (key, _) in enumerate(live)}
+                self._conn.execute("DELETE FROM rows")
+                self._conn.executemany("INSERT INTO rows (key, row) VALUES (?, ?)", remapped.items())
+                self._set_meta(generation=self.generation)
+            except BaseException:
+                self._conn.rollback()
+                self.generation -= 1
+                raise
+            self._conn.commit()
+
+            self._index = remapped
+            self._vectors = None
+            if os.path.exists(old_path):
+                os.remove(old_path)
+
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self),
+            "rows_on_disk": self._row_count(),
+            "model_version": self.model_version,
+        }
@@ -0,0 +1,311 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+import functools
+import os
+import random
+import threading
+import time
+
+from metrics import METRICS
+from utils import (
+    GROQ_API_KEY, LLM_MODEL, LLM_TEMPERATURE, complete_prompt, get_groq_client, get_llm_cache,
+    parse_structured_sections,
+)
+
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "0"))
+LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "0"))
+LLM_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "4"))
+
+
+@functools.lru_cache(maxsize=None)
+def retryable_errors():
+    """The Groq errors worth retrying; groq is only imported once the first LLM call is made."""
+    import groq
+
+    return groq.RateLimitError, groq.APIConnectionError, groq.InternalServerError
+
+
+def estimate_tokens(text):
+    """Roughly estimates the number of tokens in a text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+class RateLimiter:
+    """
+    Token-bucket limiter for requests per minute and tokens per minute.
+
+    A limit of 0 or None disables that bucket. Both buckets start full, so a
+    burst up to the per-minute budget goes out immediately and further calls
+    are paced at the refill rate.
+    """
+
+    def __init__(self, requests_per_minute=None, tokens_per_minute=None,
+                 clock=time.monotonic, sleep=time.sleep):
+        self.requests_per_minute = requests_per_minute or 0
+        self.tokens_per_minute = tokens_per_minute or 0
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._requests = float(self.requests_per_minute)
+        self._tokens = float(self.tokens_per_minute)
+        self._updated = clock()
+
+    def _refill(self, now):
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(self.requests_per_minute,
+                                 self._requests + elapsed * self.requests_per_minute / 60)
+        if self.tokens_per_minute:
+            self._tokens = min(self.tokens_per_minute,
+                               self._tokens + elapsed * self.tokens_per_minute / 60)
+
+    def acquire(self, tokens=0):
+        """Blocks until one request and the given number of tokens fit into the budget."""
+        if self.tokens_per_minute:
+            # A single request larger than the whole budget can only wait for a full bucket
+            tokens = min(tokens, self.tokens_per_minute)
+
+        waited = 0.0
+        while True:
+            with self._lock:
+                self._refill(self._clock())
+                wait = 0.0
+                if self.requests_per_minute and self._requests < 1:
+                    wait = (1 - self._requests) * 60 / self.requests_per_minute
+                if self.tokens_per_minute and self._tokens < tokens:
+                    wait = max(wait, (tokens - self._tokens) * 60 / self.tokens_per_minute)
+                if wait <= 0:
+                    if waited:
+                        METRICS.observe("llm_rate_limit_wait_seconds", waited)
+                    if self.requests_per_minute:
+                        self._requests -= 1
+                    if self.tokens_per_minute:
+                        self._tokens -= tokens
+                    return
+            self._sleep(wait)
+            waited += wait
+
+
+def _retry_after(error):
+    """Returns the server's Retry-After delay in seconds, if it sent one."""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    try:
+        return float(response.headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+def call_with_retries(func, max_retries=LLM_MAX_RETRIES, base_delay=1.0, max_delay=30.0,
+                      sleep=time.sleep):
+    """
+    Calls func, retrying rate-limit, connection and server errors with
+    exponential backoff and jitter. Other errors are raised immediately.
+    """
+    for attempt in range(max_retries + 1):
+        try:
+            return func()
+        except retryable_errors() as e:
+            if attempt == max_retries:
+                raise
+            METRICS.increment("llm_retries_total", error=type(e).__name__)
+            delay = _retry_after(e)
+            if delay is None:
+                delay = min(max_delay, base_delay * 2 ** attempt) * (0.5 + random.random() / 2)
+            sleep(delay)
+
+
+class SectionResults(dict):
+    """
+    Section summaries of one document that may be incomplete.
+
+    The dict holds every section that was extracted; errors maps each section
+    whose LLM call failed to its error message, so a caller can keep the
+    completed sections and retry only the failed ones.
+    """
+
+    def __init__(self, sections=(), errors=None):
+        super().__init__(sections)
+        self.errors = dict(errors or {})
+
+    @property
+    def complete(self):
+        return not self.errors
+
+    @property
+    def error(self):
+        """One message for all failed sections, or None when every section was extracted."""
+        if not self.errors:
+            return None
+        return "Error generating summary: " + "; ".join(
+            f"{section}: {error}" for section, error in self.errors.items()
+        )
+
+
+class LLMClient:
+    """
+    Shared entry point for chat completions.
+
+    Reuses the HTTP connections of one Groq client, caps the number of calls in
+    flight and applies the rate limits and retries across every caller in the
+    process. Concurrent requests for an identical prompt are coalesced into a
+    single call whose completion all of them receive.
+    """
+
+    def __init__(self, max_concurrency=LLM_MAX_CONCURRENCY, requests_per_minute=LLM_REQUESTS_PER_MINUTE,
+                 tokens_per_minute=LLM_TOKENS_PER_MINUTE, max_retries=LLM_MAX_RETRIES, api_key=None):
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self._api_key = api_key or GROQ_API_KEY
+        self._limiter = RateLimiter(requests_per_minute, tokens_per_minute)
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._lock = threading.Lock()
+        self._in_flight = {}
+
+    def _call(self, prompt, json_mode):
+        client = get_groq_client(self._api_key)
+
+        def attempt():
+            self._limiter.acquire(estimate_tokens(prompt))
+            with self._slots:
+                return complete_prompt(client, prompt, json_mode=json_mode)
+
+        return call_with_retries(attempt, max_retries=self.max_retries)
+
+    def complete(self, prompt, json_mode=False, cache=None):
+        """Returns the completion for prompt, from the cache, a matching call in flight or a new call."""
+        # Cache hits skip the rate limiter entirely
+        if cache is not None:
+            cached = cache.get(prompt, LLM_MODEL, LLM_TEMPERATURE)
+            if cached is not None:
+                return cached
+
+        key = (prompt, json_mode)
+        with self._lock:
+            future = self._in_flight.get(key)
+            leader = future is None
+            if leader:
+                future = self._in_flight[key] = Future()
+        if not leader:
+            METRICS.increment("llm_coalesced_total")
+            return future.result()
+
+        try:
+            completion = self._call(prompt, json_mode)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(completion)
+        finally:
+            with self._lock:
+                del self._in_flight[key]
+
+        if cache is not None:
+            cache.set(prompt, LLM_MODEL, LLM_TEMPERATURE, completion)
+        return completion
+
+
+@functools.lru_cache(maxsize=None)
+def get_llm_client():
+    """Return the LLM client shared by all extraction and summary calls."""
+    return LLMClient()
+
+
+@METRICS.timed("generate_summaries")
+def generate_summaries(prompt_sets, use_cache=True, json_mode=False, client=None):
+    """
+    Runs the section prompts of many documents at once.
+
+    Every section of every document is submitted to a thread pool, so the
+    batch is bounded by the client's concurrency and rate limits rather than
+    by the sum of call latencies.
+
+    Args:
+        prompt_sets: list of dicts mapping section names to prompts
+        use_cache: set to False to bypass the LLM completion cache
+        json_mode: constrain every completion to a JSON object
+        client: LLMClient to use instead of the shared one
+
+    Returns:
+        list with one SectionResults per prompt dict; a failed section does
+        not discard the other sections of its document
+    """
+    client = client or get_llm_client()
+    cache = get_llm_cache() if use_cache else None
+
+    with ThreadPoolExecutor(max_workers=client.max_concurrency) as executor:
+        # Identical prompts in the batch, e.g. from duplicate uploads, share one task
+        submitted = {}
+        futures = [
+            {
+                section: submitted.get(prompt) or submitted.setdefault(
+                    prompt, executor.submit(client.complete, prompt, json_mode, cache)
+                )
+                for section, prompt in prompts.items()
+            }
+            for prompts in prompt_sets
+        ]
+
+        results = []
+        for section_futures in futures:
+            result = SectionResults()
+            for section, future in section_futures.items():
+                try:
+                    result[section] = future.result()
+                except Exception as e:
+                    result.errors[section] = str(e)
+            results.append(result)
+
+    return results
+
+
+def generate_summary(prompts, use_cache=True):
+    """
+    Extracts the sections of one document, one prompt per section.
+    Returns a SectionResults; set use_cache=False to bypass the LLM completion cache.
+    """
+    return generate_summaries([prompts], use_cache=use_cache)[0]
+
+
+def generate_structured_summaries(structured_prompts, fallback_prompt_sets, **kwargs):
+    """
+    Extracts all sections of each document with one JSON-mode call per document.
+
+    Sections that are missing from or malformed in the JSON answer are
+    extracted again with their per-section prompts, so only those cost an
+    extra call.
+
+    Args:
+        structured_prompts: one JSON extraction prompt per document
+        fallback_prompt_sets: one per-section prompt dict per document; its keys
+            are the sections expected in the JSON answer
+        **kwargs: passed on to generate_summaries
+
+    Returns:
+        list with one SectionResults (in fallback key order) per document
+    """
+    completions = generate_summaries(
+        [{"Structured": prompt} for prompt in structured_prompts], json_mode=True, **kwargs
+    )
+
+    parsed, retry_sets = [], []
+    for completion, fallback_prompts in zip(completions, fallback_prompt_sets):
+        if completion.complete:
+            sections, failed = parse_structured_sections(completion["Structured"], list(fallback_prompts))
+        else:
+            sections, failed = {}, list(fallback_prompts)
+        parsed.append(sections)
+        retry_sets.append({section: fallback_prompts[section] for section in failed})
+
+    retried = generate_summaries(retry_sets, **kwargs) if any(retry_sets) else [SectionResults()] * len(parsed)
+
+    results = []
+    for sections, extra, fallback_prompts in zip(parsed, retried, fallback_prompt_sets):
+        sections.update(extra)
+        results.append(SectionResults(
+            {section: sections[section] for section in fallback_prompts if section in sections}, extra.errors
+        ))
+    return results
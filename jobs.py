@@ -0,0 +1,497 @@
+"""
+Background ranking jobs.
+
+"Find Top Candidates" submits a job to a SQLite-backed queue instead of
+ranking inside the Streamlit script run, so widget interactions and browser
+refreshes neither interrupt nor repeat it. A pool of worker processes claims
+queued jobs, runs read, extract, embed and score, and writes progress and the
+result back to the queue, where the app polls them by job id. The metrics a
+job records in its worker are stored with it and merged into the app's.
+"""
+import argparse
+import atexit
+import contextlib
+import io
+import json
+import os
+import signal
+import sqlite3
+import subprocess
+import sys
+import threading
+import time
+import uuid
+
+from cache import CACHE_DIR
+
+# Worker processes; 0 runs jobs on a thread of the app process instead
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+# A running job whose worker sent no heartbeat for this long is handed to another worker
+JOB_STALE_SECONDS = int(os.getenv("JOB_STALE_SECONDS", "120"))
+# A job whose worker went silent this many times fails instead of taking down another worker
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+JOB_HEARTBEAT_SECONDS = 10
+JOB_POLL_SECONDS = 0.5
+# Finished jobs are deleted after a week
+JOB_RETENTION_SECONDS = 7 * 24 * 3600
+# Uploads, results and sessions in the blob store outlive the jobs that point at them by a day
+BLOB_RETENTION_SECONDS = JOB_RETENTION_SECONDS + 24 * 3600
+BLOB_CLEANUP_INTERVAL_SECONDS = 3600
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+# Embedding model status of a worker; a failed load is FAILED
+LOADING, READY = "loading", "ready"
+
+
+class JobQueue:
+    """
+    Queue of jobs in SQLite, shared by the app and the worker processes.
+
+    A job carries a JSON payload and, once claimed, its latest JSON progress
+    report and finally a JSON result or an error message, and the metrics it
+    recorded. Each claim counts as an attempt.
+    """
+
+    def __init__(self, path=None, stale_seconds=JOB_STALE_SECONDS, max_attempts=JOB_MAX_ATTEMPTS):
+        self.path = path or os.path.join(CACHE_DIR, "jobs.sqlite")
+        self.stale_seconds = stale_seconds
+        self.max_attempts = max(1, max_attempts)
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        # Autocommit, so claim() can take the write lock with an explicit BEGIN IMMEDIATE
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, timeout=30, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                worker TEXT,
+                metrics TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                finished_at REAL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at)")
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        if "metrics" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN metrics TEXT")
+        if "attempts" not in columns:
+            self._conn.execute("ALTER TABLE jobs ADD COLUMN attempts INTEGER NOT NULL DEFAULT 0")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS maintenance (name TEXT PRIMARY KEY, last_run REAL NOT NULL)")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS workers (
+                name TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                error TEXT,
+                updated_at REAL NOT NULL
+            )
+            """
+        )
+
+    def submit(self, payload):
+        """Queues a job and returns its id."""
+        job_id = uuid.uuid4().hex
+        now = time.time()
+        with self._lock:
+            self._conn.execute("DELETE FROM jobs WHERE finished_at < ?", (now - JOB_RETENTION_SECONDS,))
+            self._conn.execute("DELETE FROM workers WHERE updated_at < ?", (now - JOB_RETENTION_SECONDS,))
+            self._conn.execute(
+                "INSERT INTO jobs (id, status, payload, created_at, updated_at) VALUES (?, ?, ?, ?, ?)",
+                (job_id, QUEUED, json.dumps(payload), now, now),
+            )
+        return job_id
+
+    def claim(self, worker):
+        """
+        Marks the oldest queued job, or a running job whose worker went
+        silent, as running for worker. A silent job that has used up its
+        max_attempts is marked as failed instead.
+
+        Returns:
+            tuple of (job id, payload), or None when there is nothing to do
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                while True:
+                    row = self._conn.execute(
+                        """
+                        SELECT id, payload, attempts FROM jobs
+                        WHERE status = ? OR (status = ? AND updated_at < ?)
+                        ORDER BY created_at LIMIT 1
+                        """,
+                        (QUEUED, RUNNING, now - self.stale_seconds),
+                    ).fetchone()
+                    if row is None or row[2] < self.max_attempts:
+                        break
+                    # Likely the job itself brings its workers down, e.g. by running out of memory
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, error = ?, updated_at = ?, finished_at = ? WHERE id = ?",
+                        (FAILED, f"The worker stopped responding on each of {row[2]} attempts", now, now, row[0]),
+                    )
+                if row is not None:
+                    self._conn.execute(
+                        "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                        (RUNNING, worker, now, row[0]),
+                    )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return None if row is None else (row[0], json.loads(row[1]))
+
+    def _update(self, job_id, **columns):
+        columns["updated_at"] = time.time()
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        with self._lock:
+            self._conn.execute(f"UPDATE jobs SET {assignments} WHERE id = ?", (*columns.values(), job_id))
+
+    def heartbeat(self, job_id):
+        self._update(job_id)
+
+    def report(self, job_id, progress):
+        """Stores the latest progress of a running job."""
+        self._update(job_id, progress=json.dumps(progress))
+
+    def finish(self, job_id, result, metrics=None):
+        self._update(job_id, status=DONE, result=json.dumps(result), metrics=json.dumps(metrics),
+                     finished_at=time.time())
+
+    def fail(self, job_id, error, metrics=None):
+        self._update(job_id, status=FAILED, error=error, metrics=json.dumps(metrics), finished_at=time.time())
+
+    def claim_maintenance(self, name, interval_seconds):
+        """
+        Returns True, at most once per interval_seconds across all workers,
+        to the worker that should run the maintenance task name.
+        """
+        now = time.time()
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO maintenance (name, last_run) VALUES (?, 0)", (name,))
+            claimed = self._conn.execute(
+                "UPDATE maintenance SET last_run = ? WHERE name = ? AND last_run <= ?",
+                (now, name, now - interval_seconds),
+            ).rowcount
+        return claimed == 1
+
+    def set_model_status(self, worker, status, error=None):
+        """Records whether the embedding model of a worker is LOADING, READY or FAILED."""
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO workers (name, model, error, updated_at) VALUES (?, ?, ?, ?)",
+                (worker, status, error, time.time()),
+            )
+
+    def model_status(self, workers):
+        """Returns (status, error) of the embedding model of each worker, (LOADING, None) until it reports."""
+        with self._lock:
+            rows = {
+                row[0]: (row[1], row[2])
+                for row in self._conn.execute("SELECT name, model, error FROM workers")
+            }
+        return [rows.get(worker, (LOADING, None)) for worker in workers]
+
+    def get(self, job_id):
+        """Returns the job as a dict with decoded payload, progress and result, or None if unknown."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, status, payload, progress, result, error, metrics, created_at, finished_at, attempts "
+                "FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "id": row[0],
+            "status": row[1],
+            "payload": json.loads(row[2]),
+            "progress": json.loads(row[3]) if row[3] else None,
+            "result": json.loads(row[4]) if row[4] else None,
+            "error": row[5],
+            "metrics": json.loads(row[6]) if row[6] else None,
+            "created_at": row[7],
+            "finished_at": row[8],
+            "attempts": row[9],
+        }
+
+
+def _leaderboard_rows(candidates):
+    return [{"name": c["name"], "email": c["email"], "score": c["score"]} for c in candidates]
+
+
+def _rank_role(payload, files, report):
+    """Ranks the files against one job description, reporting a live top 10."""
+    from pipeline import Leaderboard, RankingSession
+    from result_store import RankedResults
+    from utils import get_llm_cache
+
+    session = RankingSession()
+    if payload.get("session"):
+        # Continues the previous ranking of this browser session, so only new resumes are extracted
+        try:
+            session = RankingSession.load(payload["session"])
+        except FileNotFoundError:
+            pass
+    leaderboard = Leaderboard(k=10)
+    summary = None
+    for event in session.iter_update(
+        payload["job_descriptions"][0], files, top_n=payload["top_n"], use_cache=payload["use_cache"]
+    ):
+        for candidate in event["candidates"]:
+            leaderboard.push(candidate)
+        report({
+            "stage": event["stage"],
+            "done": event["done"],
+            "total": event["total"],
+            "leaderboard": _leaderboard_rows(leaderboard.top()),
+        })
+        summary = event.get("summary")
+
+    result = {
+        "results": RankedResults.from_candidates(session.ranking).save(),
+        "session": session.save(),
+        "ranked": len(session.ranking),
+        "summary": summary,
+        "llm_cache": get_llm_cache().stats(),
+        "pool_candidates": [],
+    }
+    if payload.get("save_to_pool"):
+        result["pool_candidates"] = [
+            {"name": resume["name"], "email": resume["email"], "text": resume["full_text"],
+             "sections": resume["sections"]}
+            for resume in (session.resumes[h] for h in summary["extracted"])
+        ]
+    return result
+
+
+def _rank_roles(payload, files, report):
+    """Ranks the files against several job descriptions, extracting each document once."""
+    from pipeline import make_resume, rank_for_job_descriptions
+    from result_store import RankedResults
+    from utils import read_files
+
+    report({"stage": "read", "done": 0, "total": len(files), "leaderboard": []})
+    resumes, errors = [], []
+    for (name, key), (text, error) in zip(payload["files"], read_files(files)):
+        if error:
+            errors.append((name, error))
+        else:
+            resumes.append(make_resume(name, text, key))
+
+    report({"stage": "rank", "done": 0, "total": len(resumes), "leaderboard": []})
+    rankings, best_fit, failed = rank_for_job_descriptions(
+        payload["job_descriptions"], resumes, top_n=payload["top_n"], use_cache=payload["use_cache"]
+    )
+    return {
+        "rankings": [RankedResults.from_candidates(ranking).save() for ranking in rankings],
+        "best_fit": best_fit,
+        "errors": errors + failed,
+    }
+
+
+def run_job(payload, report=lambda progress: None):
+    """
+    Runs one ranking job.
+
+    Args:
+        payload: dict with "job_descriptions", "files" as (file name, blob
+            store key) pairs, "top_n", "use_cache", and optionally
+            "save_to_pool", "profile" and "session", the key of a saved
+            RankingSession to continue
+        report: called with a progress dict as the job advances
+
+    Returns:
+        JSON-serializable result dict with the blob store key of the saved
+        RankedResults under "results", of the saved RankingSession under
+        "session", the number of ranked candidates under "ranked", "summary",
+        the worker's "llm_cache" statistics and "pool_candidates" for one job
+        description; a RankedResults key per job description under
+        "rankings", "best_fit" and "errors" for several; and the cProfile
+        report under "profile"
+    """
+    from metrics import METRICS, profile_run
+    from utils import get_blob_store
+
+    blob_store = get_blob_store()
+    files = []
+    for name, key in payload["files"]:
+        file = io.BytesIO(blob_store.get(key))
+        file.name = name
+        files.append(file)
+
+    profile = {}
+    with (profile_run(profile) if payload.get("profile") else contextlib.nullcontext()), \
+            METRICS.span("ranking_run"):
+        if len(payload["job_descriptions"]) > 1:
+            result = _rank_roles(payload, files, report)
+        else:
+            result = _rank_role(payload, files, report)
+    result["profile"] = profile.get("stats")
+    return result
+
+
+def _run_claimed(queue, job_id, payload):
+    from metrics import METRICS
+
+    stop = threading.Event()
+
+    def beat():
+        while not stop.wait(JOB_HEARTBEAT_SECONDS):
+            queue.heartbeat(job_id)
+
+    threading.Thread(target=beat, daemon=True).start()
+    before = METRICS.snapshot()
+    try:
+        result = run_job(payload, lambda progress: queue.report(job_id, progress))
+    except Exception as e:
+        queue.fail(job_id, str(e) or type(e).__name__, METRICS.since(before))
+    else:
+        queue.finish(job_id, result, METRICS.since(before))
+    finally:
+        stop.set()
+
+
+def run_worker(path, stop_event, name):
+    """
+    Claims and runs jobs from the queue at path until stop_event is set. The
+    embedding model loads in the background meanwhile; the worker reports
+    when it is ready. Once an hour one of the workers deletes blobs that no
+    job needs any more.
+    """
+    from utils import get_blob_store, start_sbert_model_loading
+
+    queue = JobQueue(path)
+    queue.set_model_status(name, LOADING)
+
+    def loaded(future):
+        if future.exception() is None:
+            queue.set_model_status(name, READY)
+        else:
+            queue.set_model_status(name, FAILED, str(future.exception()))
+
+    start_sbert_model_loading().add_done_callback(loaded)
+    while not stop_event.is_set():
+        claimed = queue.claim(name)
+        if claimed is not None:
+            _run_claimed(queue, *claimed)
+        elif queue.claim_maintenance("blob_cleanup", BLOB_CLEANUP_INTERVAL_SECONDS):
+            get_blob_store().remove_older_than(BLOB_RETENTION_SECONDS)
+        else:
+            stop_event.wait(JOB_POLL_SECONDS)
+
+
+class WorkerPool:
+    """
+    Worker processes running the jobs of one queue.
+
+    Each worker runs one job at a time and loads its own embedding model,
+    so the app process does not need one for rankings; the read stage of a job
+    still fans out over every core. With n_workers=0 jobs run on a single
+    thread of the calling process.
+
+    Workers are started as `python -m jobs` rather than with multiprocessing:
+    Streamlit replaces __main__ with the app script, which spawned processes
+    would run again on start.
+    """
+
+    def __init__(self, n_workers=JOB_WORKERS, path=None):
+        self.queue = JobQueue(path)
+        # Jobs on a thread record their metrics in this process already
+        self.merge_metrics = bool(n_workers)
+        self._merged = set()
+        self._merge_lock = threading.Lock()
+        self._stop = threading.Event()
+        if n_workers:
+            # Worker names carry the app's pid, so apps sharing CACHE_DIR keep their model status apart
+            self.names = [f"worker-{os.getpid()}-{i}" for i in range(n_workers)]
+            module_dir = os.path.dirname(os.path.abspath(__file__))
+            env = {**os.environ, "PYTHONPATH": os.pathsep.join(filter(None, [module_dir, os.getenv("PYTHONPATH")]))}
+            self.workers = [
+                subprocess.Popen([sys.executable, "-m", "jobs", "--queue", self.queue.path, "--name", name], env=env)
+                for name in self.names
+            ]
+        else:
+            self.names = [f"app-{os.getpid()}"]
+            self.workers = [
+                threading.Thread(target=run_worker, args=(self.queue.path, self._stop, self.names[0]), daemon=True)
+            ]
+            self.workers[0].start()
+        atexit.register(self.stop)
+
+    def submit(self, payload):
+        return self.queue.submit(payload)
+
+    def get(self, job_id):
+        """The job from the queue; the metrics of a finished job are merged into METRICS once."""
+        from metrics import METRICS
+
+        job = self.queue.get(job_id)
+        if job is not None and job["metrics"] and self.merge_metrics:
+            with self._merge_lock:
+                if job_id not in self._merged:
+                    self._merged.add(job_id)
+                    METRICS.merge(job["metrics"])
+        return job
+
+    @staticmethod
+    def _is_alive(worker):
+        return worker.poll() is None if isinstance(worker, subprocess.Popen) else worker.is_alive()
+
+    def model_status(self):
+        """
+        Returns (status, error) of the embedding model of each running worker;
+        a worker that exited counts as FAILED.
+        """
+        return [
+            status if self._is_alive(worker) else (FAILED, "The worker stopped")
+            for worker, status in zip(self.workers, self.queue.model_status(self.names))
+        ]
+
+    def stop(self, timeout=5.0):
+        """
+        Asks the workers to stop after their current job and kills those still
+        running after timeout seconds. The job of a killed worker is claimed
+        again once it is stale, as if the worker had crashed.
+        """
+        self._stop.set()
+        for worker in self.workers:
+            if isinstance(worker, subprocess.Popen):
+                # SIGTERM; the worker finishes its current job first
+                worker.terminate()
+        for worker in self.workers:
+            if isinstance(worker, subprocess.Popen):
+                try:
+                    worker.wait(timeout)
+                except subprocess.TimeoutExpired:
+                    worker.kill()
+                    worker.wait()
+            else:
+                worker.join(timeout)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a worker that takes ranking jobs from the queue.")
+    parser.add_argument("--queue", help="Queue database (default: jobs.sqlite in CACHE_DIR).")
+    parser.add_argument("--name", default=f"worker-{os.getpid()}", help="Worker name recorded with its jobs.")
+    args = parser.parse_args(argv)
+
+    stop = threading.Event()
+    # Stopping, also with Ctrl+C in the terminal of the app, lets the current job finish
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: stop.set())
+    run_worker(args.queue, stop, args.name)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,204 @@
+import contextlib
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+
+def _label_key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(label_key, extra=()):
+    pairs = list(label_key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for _, value in pairs)
+    return "{" + ",".join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + "}"
+
+
+class Metrics:
+    """
+    Process-wide registry of counters and latency histograms for the ranking pipeline.
+
+    Metrics are keyed by name and a set of labels and can be exported in the
+    Prometheus text format or as JSON.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._histograms = {}
+
+    def increment(self, name, value=1, **labels):
+        """Adds value to a counter."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        """Records one observation, in seconds, in a latency histogram."""
+        key = (name, _label_key(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    histogram["buckets"][i] += 1
+                    break
+            histogram["sum"] += value
+            histogram["count"] += 1
+
+    @contextlib.contextmanager
+    def span(self, name, **labels):
+        """
+        Times a block into the <name>_seconds histogram and counts it in
+        <name>_calls_total; blocks that raise are also counted in <name>_errors_total.
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        except Exception:
+            self.increment(f"{name}_errors_total", **labels)
+            raise
+        finally:
+            self.observe(f"{name}_seconds", time.perf_counter() - start, **labels)
+            self.increment(f"{name}_calls_total", **labels)
+
+    def timed(self, name, **labels):
+        """Decorator form of span()."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.span(name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+    def snapshot(self):
+        """Returns all metrics as a JSON-serializable dict."""
+        with self._lock:
+            counters = [
+                {"name": name, "labels": dict(labels), "value": value}
+                for (name, labels), value in sorted(self._counters.items())
+            ]
+            histograms = []
+            for (name, labels), histogram in sorted(self._histograms.items()):
+                cumulative, running = [], 0
+                for bound, count in zip(LATENCY_BUCKETS, histogram["buckets"]):
+                    running += count
+                    cumulative.append({"le": "+Inf" if bound == float("inf") else bound, "count": running})
+                histograms.append({
+                    "name": name,
+                    "labels": dict(labels),
+                    "count": histogram["count"],
+                    "sum": histogram["sum"],
+                    "mean": histogram["sum"] / histogram["count"] if histogram["count"] else 0.0,
+                    "buckets": cumulative,
+                })
+        return {"counters": counters, "histograms": histograms}
+
+    def since(self, earlier):
+        """Returns what was recorded after an earlier snapshot(), in the same form."""
+        current = self.snapshot()
+        counted = {(c["name"], _label_key(c["labels"])): c["value"] for c in earlier["counters"]}
+        counters = []
+        for counter in current["counters"]:
+            value = counter["value"] - counted.get((counter["name"], _label_key(counter["labels"])), 0)
+            if value:
+                counters.append({**counter, "value": value})
+
+        observed = {(h["name"], _label_key(h["labels"])): h for h in earlier["histograms"]}
+        histograms = []
+        for histogram in current["histograms"]:
+            before = observed.get((histogram["name"], _label_key(histogram["labels"])))
+            if before is None:
+                histograms.append(histogram)
+                continue
+            count = histogram["count"] - before["count"]
+            if count:
+                total = histogram["sum"] - before["sum"]
+                histograms.append({
+                    **histogram,
+                    "count": count,
+                    "sum": total,
+                    "mean": total / count,
+                    "buckets": [
+                        {"le": bucket["le"], "count": bucket["count"] - earlier_bucket["count"]}
+                        for bucket, earlier_bucket in zip(histogram["buckets"], before["buckets"])
+                    ],
+                })
+        return {"counters": counters, "histograms": histograms}
+
+    def merge(self, snapshot):
+        """Adds the metrics of a snapshot, e.g. one taken in another process."""
+        for counter in snapshot["counters"]:
+            self.increment(counter["name"], counter["value"], **counter["labels"])
+        with self._lock:
+            for histogram in snapshot["histograms"]:
+                key = (histogram["name"], _label_key(histogram["labels"]))
+                merged = self._histograms.get(key)
+                if merged is None:
+                    merged = self._histograms[key] = {"buckets": [0] * len(LATENCY_BUCKETS), "sum": 0.0, "count": 0}
+                previous = 0
+                for i, bucket in enumerate(histogram["buckets"]):
+                    merged["buckets"][i] += bucket["count"] - previous
+                    previous = bucket["count"]
+                merged["sum"] += histogram["sum"]
+                merged["count"] += histogram["count"]
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+    def to_prometheus(self):
+        """Renders all metrics in the Prometheus text exposition format."""
+        snapshot = self.snapshot()
+        lines, typed = [], set()
+        for counter in snapshot["counters"]:
+            if counter["name"] not in typed:
+                lines.append(f"# TYPE {counter['name']} counter")
+                typed.add(counter["name"])
+            label_key = _label_key(counter["labels"])
+            lines.append(f"{counter['name']}{_format_labels(label_key)} {counter['value']}")
+        for histogram in snapshot["histograms"]:
+            name = histogram["name"]
+            if name not in typed:
+                lines.append(f"# TYPE {name} histogram")
+                typed.add(name)
+            label_key = _label_key(histogram["labels"])
+            for bucket in histogram["buckets"]:
+                lines.append(f"{name}_bucket{_format_labels(label_key, [('le', str(bucket['le']))])} {bucket['count']}")
+            lines.append(f"{name}_sum{_format_labels(label_key)} {histogram['sum']}")
+            lines.append(f"{name}_count{_format_labels(label_key)} {histogram['count']}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = Metrics()
+
+
+@contextlib.contextmanager
+def profile_run(result, sort_by="cumulative", limit=40):
+    """
+    Profiles a block with cProfile and stores the formatted statistics in
+    result["stats"] when it finishes.
+    """
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        output = io.StringIO()
+        pstats.Stats(profiler, stream=output).sort_stats(sort_by).print_stats(limit)
+        result["stats"] = output.getvalue()
@@ -0,0 +1,495 @@
+import heapq
+import itertools
+import json
+import os
+
+import numpy as np
+
+from cache import content_hash
+from dedup import DEDUP_ENABLED, find_duplicates
+from extraction import SectionResults, generate_structured_summaries, generate_summaries
+from metrics import METRICS
+from prefilter import shortlist
+from section_parser import parse_resume_sections
+from utils import (
+    RESUME_SECTION_INSTRUCTIONS, extract_contact_info, get_blob_store, get_fit_summary_cache,
+    get_jd_structured_prompt, get_jd_summary_prompts, get_resume_summary_prompts, get_structured_prompt,
+    get_summary_prompt, iter_read_files, score_candidates, score_candidates_multi, section_scores_to_dict,
+)
+
+# "structured" asks for all sections of a document in one JSON call,
+# "per_section" sends one prompt per section
+LLM_EXTRACTION_MODE = os.getenv("LLM_EXTRACTION_MODE", "structured")
+# Resume sections the local heading parser finds with at least this confidence skip the LLM;
+# set LOCAL_SECTION_PARSER=0 to send every resume to the LLM
+LOCAL_SECTION_PARSER = os.getenv("LOCAL_SECTION_PARSER", "1") != "0"
+SECTION_CONFIDENCE_THRESHOLD = float(os.getenv("SECTION_CONFIDENCE_THRESHOLD", "0.75"))
+
+
+def make_resume(name, full_text, file_hash=None):
+    """
+    Builds the resume record the ranking steps work on.
+    file_hash is the blob store key of the original uploaded file, if it was kept.
+    """
+    return {
+        "name": name,
+        "email": extract_contact_info(full_text),
+        "full_text": full_text,
+        "file_hash": file_hash,
+    }
+
+
+def parse_resumes_locally(resume_texts, threshold=None):
+    """
+    Runs the local heading parser over resumes.
+
+    Returns:
+        tuple of (list of section dicts holding the confident sections, list of
+        the section names that still need the LLM), one entry per resume
+    """
+    threshold = SECTION_CONFIDENCE_THRESHOLD if threshold is None else threshold
+    local_sections, llm_sections = [], []
+    for resume_text in resume_texts:
+        sections, confidences = parse_resume_sections(resume_text)
+        confident = {section: text for section, text in sections.items() if confidences[section] >= threshold}
+        local_sections.append(confident)
+        llm_sections.append([section for section in RESUME_SECTION_INSTRUCTIONS if section not in confident])
+        METRICS.increment("local_sections_total", len(confident), outcome="parsed")
+        METRICS.increment("local_sections_total", len(llm_sections[-1]), outcome="llm")
+    return local_sections, llm_sections
+
+
+def extract_sections(jd_texts, resume_texts, use_cache=True, mode=None, local_parser=None, known_sections=None):
+    """
+    Extracts the sections of job descriptions and resumes in one concurrent batch.
+
+    Resume sections the local heading parser is confident about are used as
+    they are; only the remaining sections are extracted by the LLM.
+    known_sections optionally gives one dict per resume of sections extracted
+    earlier, e.g. by a batch where other sections failed; they are not
+    requested again.
+
+    Returns:
+        tuple of (list of JD SectionResults, list of resume SectionResults)
+    """
+    use_local = LOCAL_SECTION_PARSER if local_parser is None else local_parser
+    if use_local:
+        local_sections, llm_sections = parse_resumes_locally(resume_texts)
+    else:
+        local_sections = [{} for _ in resume_texts]
+        llm_sections = [list(RESUME_SECTION_INSTRUCTIONS) for _ in resume_texts]
+    for i, known in enumerate(known_sections or []):
+        local_sections[i] = {**local_sections[i], **known}
+        llm_sections[i] = [section for section in llm_sections[i] if section not in known]
+    llm_resumes = [i for i, sections in enumerate(llm_sections) if sections]
+
+    prompt_sets = [get_jd_summary_prompts(jd_text) for jd_text in jd_texts]
+    for i in llm_resumes:
+        resume_prompts = get_resume_summary_prompts(resume_texts[i])
+        prompt_sets.append({section: resume_prompts[section] for section in llm_sections[i]})
+
+    if (mode or LLM_EXTRACTION_MODE) == "structured":
+        structured_prompts = [get_jd_structured_prompt(jd_text) for jd_text in jd_texts] + [
+            get_structured_prompt(
+                resume_texts[i],
+                {section: RESUME_SECTION_INSTRUCTIONS[section] for section in llm_sections[i]},
+                "resume",
+            )
+            for i in llm_resumes
+        ]
+        results = generate_structured_summaries(structured_prompts, prompt_sets, use_cache=use_cache)
+    else:
+        results = generate_summaries(prompt_sets, use_cache=use_cache)
+
+    resume_results = [SectionResults(sections) for sections in local_sections]
+    for i, result in zip(llm_resumes, results[len(jd_texts):]):
+        sections = {**local_sections[i], **result}
+        resume_results[i] = SectionResults(
+            {section: sections[section] for section in RESUME_SECTION_INSTRUCTIONS if section in sections},
+            result.errors,
+        )
+    return results[:len(jd_texts)], resume_results
+
+
+def group_duplicates(resumes, enabled=None):
+    """
+    Clusters near-duplicate resumes (see dedup.find_duplicates).
+
+    Returns:
+        tuple of (positions of the cluster representatives in the order of
+        resumes, dict mapping each representative's position to the positions
+        of its duplicates)
+    """
+    enabled = DEDUP_ENABLED if enabled is None else enabled
+    if not enabled:
+        return list(range(len(resumes))), {}
+    representatives = find_duplicates(resumes)
+    duplicates = {}
+    for i, representative in enumerate(representatives):
+        if i != representative:
+            duplicates.setdefault(representative, []).append(i)
+            METRICS.increment("duplicate_resumes_total")
+    return [i for i, representative in enumerate(representatives) if i == representative], duplicates
+
+
+def make_candidate(resume, similarities):
+    """Builds the ranked candidate record from a resume and its section score dict."""
+    return {
+        "name": resume["name"],
+        "email": resume["email"],
+        "score": similarities.get("Overall Score", 0.0),
+        "text": resume["full_text"],
+        "file_hash": resume.get("file_hash"),
+        "section_scores": similarities,
+        "duplicates": resume.get("duplicates", []),
+    }
+
+
+def score_resumes(resumes, all_resume_sections, jd_sections):
+    """
+    Scores extracted resumes against one job description.
+
+    Returns:
+        list of candidate dicts in the order of resumes
+    """
+    scores, section_names = score_candidates(all_resume_sections, jd_sections)
+
+    return [
+        make_candidate(resume, section_scores_to_dict(score_row, section_names))
+        for resume, score_row in zip(resumes, scores)
+    ]
+
+
+def score_resumes_multi(resumes, all_resume_sections, all_jd_sections):
+    """
+    Scores extracted resumes against several job descriptions at once.
+
+    Returns:
+        tuple of (one candidate list per job description, best first, and one
+        best-fit dict per resume in the order of resumes with its name, email,
+        the index of the job description it fits best, that overall score and
+        its overall score for every job description)
+    """
+    scores, section_names = score_candidates_multi(all_resume_sections, all_jd_sections)
+    # Same overall score as section_scores_to_dict, for every resume and job description at once
+    overall = scores.mean(axis=2)
+
+    rankings = []
+    for jd_index in range(len(all_jd_sections)):
+        candidates = [
+            make_candidate(resume, section_scores_to_dict(scores[row, jd_index], section_names))
+            for row, resume in enumerate(resumes)
+        ]
+        candidates.sort(key=lambda x: x["score"], reverse=True)
+        rankings.append(candidates)
+
+    best = overall.argmax(axis=1)
+    best_fit = [
+        {
+            "name": resume["name"],
+            "email": resume["email"],
+            "best_fit": int(best[row]),
+            "score": float(overall[row, best[row]]),
+            "scores": overall[row].tolist(),
+            "duplicates": resume.get("duplicates", []),
+        }
+        for row, resume in enumerate(resumes)
+    ]
+    return rankings, best_fit
+
+
+def rank_for_job_descriptions(job_descriptions, resumes, top_n=None, use_cache=True):
+    """
+    Ranks resumes against several job descriptions, extracting each document once.
+
+    Each job description shortlists its own top_n resumes with the prefilter.
+    The union of the shortlists is extracted and scored against every job
+    description, so the LLM cost grows with the number of resumes plus job
+    descriptions rather than their product.
+
+    Near-duplicate resumes are only ranked once, under the longest copy; the
+    names of the others are listed in its candidates' "duplicates".
+
+    Returns:
+        tuple of (rankings and best-fit dicts as returned by score_resumes_multi,
+        list of (name, error) pairs for resumes whose extraction failed)
+    """
+    unique, duplicates = group_duplicates(resumes)
+    unique_texts = [resumes[i]["full_text"] for i in unique]
+    selected = sorted(unique[i] for i in set().union(*(
+        shortlist(job_description, unique_texts, top_n) for job_description in job_descriptions
+    )))
+
+    all_jd_sections, all_resume_sections = extract_sections(
+        job_descriptions, [resumes[i]["full_text"] for i in selected], use_cache=use_cache
+    )
+    for number, jd_sections in enumerate(all_jd_sections, 1):
+        if not jd_sections.complete:
+            raise RuntimeError(f"Could not extract sections from job description {number}: {jd_sections.error}")
+
+    extracted, failed = [], []
+    for i, sections in zip(selected, all_resume_sections):
+        if sections.complete:
+            duplicate_names = [resumes[j]["name"] for j in duplicates.get(i, [])]
+            extracted.append(({**resumes[i], "duplicates": duplicate_names}, sections))
+        else:
+            failed.append((resumes[i]["name"], sections.error))
+
+    rankings, best_fit = score_resumes_multi(
+        [resume for resume, _ in extracted], [sections for _, sections in extracted], all_jd_sections
+    )
+    return rankings, best_fit, failed
+
+
+class Leaderboard:
+    """Keeps the k best-scoring candidates seen so far in a min-heap."""
+
+    def __init__(self, k=10):
+        self.k = k
+        self._heap = []
+        self._pushed = 0
+
+    def push(self, candidate):
+        # The push counter breaks score ties, so candidate dicts are never compared
+        entry = (candidate["score"], -self._pushed, candidate)
+        self._pushed += 1
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def top(self):
+        """The kept candidates, best first."""
+        return [candidate for _, _, candidate in sorted(self._heap, key=lambda entry: entry[:2], reverse=True)]
+
+
+class RankingSession:
+    """
+    Ranking of a set of uploads against a job description that is updated
+    incrementally as either changes.
+
+    Resumes are keyed by the hash of their file content and the job
+    description by the hash of its text, so update() only reads and extracts
+    new files, drops removed ones, and scores the resumes that are not ranked
+    against the current job description yet. Near-duplicate uploads are
+    ranked once, under the longest copy. save() and load() carry a session
+    from one ranking job to the next.
+    """
+
+    def __init__(self):
+        self.resumes = {}        # file hash -> resume record, with "sections" once extracted
+        self.read_errors = {}    # file hash -> (file name, error message)
+        self.duplicates = {}     # representative file hash -> file hashes of its near-duplicates
+        self.jd_hash = None
+        self.jd_sections = None
+        self.ranking = []        # candidate dicts for the current job description, best first
+
+    def save(self, blob_store=None):
+        """Stores the session in the blob store and returns the key to load() it with."""
+        resumes = {
+            file_hash: {**resume, "minhash": resume["minhash"].tolist()} if resume.get("minhash") is not None else resume
+            for file_hash, resume in self.resumes.items()
+        }
+        state = {
+            "resumes": resumes,
+            "read_errors": self.read_errors,
+            "duplicates": self.duplicates,
+            "jd_hash": self.jd_hash,
+            "jd_sections": self.jd_sections,
+            # Candidate texts are the resumes' full texts, which are stored once
+            "ranking": [{k: v for k, v in candidate.items() if k != "text"} for candidate in self.ranking],
+        }
+        return (blob_store or get_blob_store()).put(json.dumps(state))
+
+    @classmethod
+    def load(cls, key, blob_store=None):
+        state = json.loads((blob_store or get_blob_store()).get(key))
+        session = cls()
+        session.resumes = state["resumes"]
+        for resume in session.resumes.values():
+            if resume.get("minhash") is not None:
+                resume["minhash"] = np.array(resume["minhash"], dtype=np.uint64)
+        session.read_errors = {h: tuple(error) for h, error in state["read_errors"].items()}
+        session.duplicates = state["duplicates"]
+        session.jd_hash = state["jd_hash"]
+        session.jd_sections = state["jd_sections"]
+        session.ranking = [
+            {**candidate, "text": session.resumes[candidate["file_hash"]]["full_text"]} for candidate in state["ranking"]
+        ]
+        return session
+
+    def duplicate_names(self, file_hash):
+        """File names of the near-duplicates folded into the resume with this hash."""
+        return [self.resumes[h]["name"] for h in self.duplicates.get(file_hash, [])]
+
+    def update(self, job_description, files, top_n=None, use_cache=True, batch_size=16):
+        """
+        Brings the ranking up to date with the uploaded files and the job description.
+
+        Returns:
+            dict with the number of readable, near-duplicate and shortlisted
+            resumes, the number of files read, resumes scored and files removed
+            in this update, the hashes of newly extracted resumes, and
+            (name, error) pairs for files that could not be processed
+        """
+        for event in self.iter_update(job_description, files, top_n, use_cache, batch_size):
+            pass
+        return event["summary"]
+
+    def iter_update(self, job_description, files, top_n=None, use_cache=True, batch_size=16):
+        """
+        Generator form of update() that reports progress as it goes.
+
+        New files are read first. Once the shortlist is known, its resumes are
+        extracted and scored in batches of batch_size, in prefilter order, so
+        the likely best candidates are ranked first. With the sbert and hybrid
+        prefilter methods, the shortlist needs a full-text embedding of every
+        resume, so no "rank" dict is yielded until all of them are encoded;
+        resumes encoded in earlier updates come from the embedding store.
+
+        Yields:
+            dicts with "stage" ("read" or "rank"), "done" and "total" counts for
+            that stage, and "candidates" scored since the previous dict. The
+            first "rank" dict carries the candidates kept from earlier updates,
+            and the last dict also has "summary", the dict update() returns.
+        """
+        blob_store = get_blob_store()
+        uploads = {blob_store.put(file.getvalue()): file for file in files}
+
+        removed = [file_hash for file_hash in self.resumes if file_hash not in uploads]
+        for file_hash in removed:
+            del self.resumes[file_hash]
+        self.read_errors = {h: error for h, error in self.read_errors.items() if h in uploads}
+
+        new = [(h, file) for h, file in uploads.items() if h not in self.resumes and h not in self.read_errors]
+        for done, (i, text, error) in enumerate(iter_read_files([file for _, file in new]), 1):
+            file_hash, file = new[i]
+            if error:
+                self.read_errors[file_hash] = (file.name, error)
+            else:
+                self.resumes[file_hash] = make_resume(file.name, text, file_hash)
+            yield {"stage": "read", "done": done, "total": len(new), "candidates": []}
+
+        jd_hash = content_hash(job_description)
+        jd_changed = jd_hash != self.jd_hash
+        if jd_changed:
+            self.ranking = []
+
+        hashes = list(self.resumes)
+        unique, duplicates = group_duplicates([self.resumes[h] for h in hashes])
+        self.duplicates = {hashes[i]: [hashes[j] for j in members] for i, members in duplicates.items()}
+        unique = [hashes[i] for i in unique]
+        shortlisted = [
+            unique[i] for i in shortlist(job_description, [self.resumes[h]["full_text"] for h in unique], top_n)
+        ]
+
+        # Keep the ranked candidates that are still shortlisted; the rest are extracted and scored
+        keep = set(shortlisted)
+        self.ranking = [candidate for candidate in self.ranking if candidate["file_hash"] in keep]
+        for candidate in self.ranking:
+            candidate["duplicates"] = self.duplicate_names(candidate["file_hash"])
+        ranked = {candidate["file_hash"] for candidate in self.ranking}
+        pending = [h for h in shortlisted if h not in ranked]
+        yield {"stage": "rank", "done": 0, "total": len(pending), "candidates": list(self.ranking)}
+
+        extracted, failed, n_scored = [], [], 0
+        # A changed job description is extracted with the first batch, even when no resume is pending
+        batches = [pending[start:start + batch_size] for start in range(0, len(pending), batch_size)] or [[]]
+        for done, batch in zip(itertools.accumulate(map(len, batches)), batches):
+            to_extract = [h for h in batch if "sections" not in self.resumes[h]]
+            extract_jd = self.jd_hash != jd_hash
+            all_jd_sections, all_resume_sections = extract_sections(
+                [job_description] if extract_jd else [],
+                [self.resumes[h]["full_text"] for h in to_extract],
+                use_cache=use_cache,
+                known_sections=[self.resumes[h].get("partial_sections", {}) for h in to_extract],
+            )
+            if extract_jd:
+                if not all_jd_sections[0].complete:
+                    raise RuntimeError(
+                        f"Could not extract sections from the job description: {all_jd_sections[0].error}"
+                    )
+                self.jd_hash, self.jd_sections = jd_hash, all_jd_sections[0]
+
+            for file_hash, sections in zip(to_extract, all_resume_sections):
+                resume = self.resumes[file_hash]
+                if sections.complete:
+                    resume.pop("partial_sections", None)
+                    resume["sections"] = dict(sections)
+                    extracted.append(file_hash)
+                else:
+                    # Kept as "partial_sections", so the next update only asks for the sections that failed
+                    resume["partial_sections"] = dict(sections)
+                    failed.append((resume["name"], sections.error))
+
+            to_score = [h for h in batch if "sections" in self.resumes[h]]
+            scored = score_resumes(
+                [self.resumes[h] for h in to_score], [self.resumes[h]["sections"] for h in to_score],
+                self.jd_sections,
+            )
+            for candidate in scored:
+                candidate["duplicates"] = self.duplicate_names(candidate["file_hash"])
+            scored.sort(key=lambda x: x["score"], reverse=True)
+            self.ranking = list(heapq.merge(self.ranking, scored, key=lambda x: x["score"], reverse=True))
+            n_scored += len(scored)
+            yield {"stage": "rank", "done": done, "total": len(pending), "candidates": scored}
+
+        yield {
+            "stage": "rank",
+            "done": len(pending),
+            "total": len(pending),
+            "candidates": [],
+            "summary": {
+                "resumes": len(self.resumes),
+                "duplicates": len(self.resumes) - len(unique),
+                "shortlisted": len(shortlisted),
+                "read": len(new),
+                "extracted": extracted,
+                "scored": n_scored,
+                "removed": len(removed),
+                "errors": list(self.read_errors.values()) + failed,
+            },
+        }
+
+
+def get_cached_fit_summaries(jd_text, resume_texts):
+    """
+    Looks up stored fit summaries without calling the LLM.
+
+    Returns:
+        dict mapping positions in resume_texts to their stored summary
+    """
+    cache = get_fit_summary_cache()
+    summaries = {}
+    for i, resume_text in enumerate(resume_texts):
+        summary = cache.get(jd_text, resume_text)
+        if summary is not None:
+            summaries[i] = summary
+    return summaries
+
+
+def generate_fit_summaries(jd_text, resume_texts, use_cache=True):
+    """
+    Returns a fit summary for every resume, generating the ones that are not
+    stored yet with concurrent LLM calls.
+
+    Returns:
+        list of (summary, error message or None) tuples in the order of resume_texts
+    """
+    cached = get_cached_fit_summaries(jd_text, resume_texts) if use_cache else {}
+    missing = [i for i in range(len(resume_texts)) if i not in cached]
+
+    generated = generate_summaries(
+        [get_summary_prompt(jd_text, resume_texts[i]) for i in missing], use_cache=use_cache
+    )
+
+    results = [(cached.get(i), None) for i in range(len(resume_texts))]
+    cache = get_fit_summary_cache()
+    for i, summary in zip(missing, generated):
+        if summary.complete:
+            results[i] = (summary["Summary"], None)
+            if use_cache:
+                cache.set(jd_text, resume_texts[i], summary["Summary"])
+        else:
+            results[i] = (None, summary.error)
+    return results
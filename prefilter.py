@@ -0,0 +1,97 @@
+"""
+Cheap full-text scoring of resumes against a job description, used to pick
+the shortlist that goes through LLM section extraction and section scoring.
+"""
+import collections
+import os
+import re
+
+import numpy as np
+
+from metrics import METRICS
+from utils import embed_texts, normalize_rows
+
+# Resumes kept for LLM extraction per job description, 0 keeps all of them
+PREFILTER_TOP_N = int(os.getenv("PREFILTER_TOP_N", "50"))
+# "bm25", "sbert" (one full-text embedding per document) or "hybrid" (rank fusion of both)
+PREFILTER_METHOD = os.getenv("PREFILTER_METHOD", "hybrid")
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#]*")
+# Damps the influence of the very top ranks in reciprocal rank fusion
+RRF_K = 60
+# Share of a hybrid shortlist kept for each method's own best resumes, so a
+# strong keyword match is not outvoted by middling ranks on both lists
+HYBRID_RESERVED_SHARE = 0.25
+
+
+def tokenize(text):
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def bm25_scores(query, documents, k1=1.5, b=0.75):
+    """Okapi BM25 score of every document for the distinct terms of query."""
+    term_counts = [collections.Counter(tokenize(document)) for document in documents]
+    lengths = np.array([sum(counts.values()) for counts in term_counts], dtype=np.float32)
+    length_norm = k1 * (1 - b + b * lengths / max(lengths.mean(), 1.0))
+
+    scores = np.zeros(len(documents), dtype=np.float32)
+    for term in set(tokenize(query)):
+        tf = np.array([counts.get(term, 0) for counts in term_counts], dtype=np.float32)
+        df = np.count_nonzero(tf)
+        if not df:
+            continue
+        idf = np.log(1 + (len(documents) - df + 0.5) / (df + 0.5))
+        scores += idf * tf * (k1 + 1) / (tf + length_norm)
+    return scores
+
+
+def embedding_scores(query, documents):
+    """Cosine similarity between one full-text embedding of query and of each document."""
+    embeddings = normalize_rows(embed_texts([query, *documents]))
+    return embeddings[1:] @ embeddings[0]
+
+
+def _ranks(scores):
+    ranks = np.empty(len(scores), dtype=np.int64)
+    ranks[np.argsort(-scores, kind="stable")] = np.arange(len(scores))
+    return ranks
+
+
+def prefilter_scores(jd_text, resume_texts, method=None, reserved=0):
+    """
+    Scores every resume against the job description with the chosen cheap method.
+    With the hybrid method, the reserved best resumes of each ranking score above all others.
+    """
+    method = method or PREFILTER_METHOD
+    if method == "bm25":
+        return bm25_scores(jd_text, resume_texts)
+    if method == "sbert":
+        return embedding_scores(jd_text, resume_texts)
+    if method == "hybrid":
+        bm25_ranks = _ranks(bm25_scores(jd_text, resume_texts))
+        embedding_ranks = _ranks(embedding_scores(jd_text, resume_texts))
+        fused = 1.0 / (RRF_K + bm25_ranks) + 1.0 / (RRF_K + embedding_ranks)
+        # Fused scores stay below 2 / RRF_K, so the reserved resumes rank first
+        return fused + ((bm25_ranks < reserved) | (embedding_ranks < reserved))
+    raise ValueError(f"Unknown prefilter method: {method}")
+
+
+@METRICS.timed("prefilter")
+def shortlist(jd_text, resume_texts, top_n=None, method=None):
+    """
+    Picks the resumes worth a full LLM extraction. The hybrid method keeps
+    the best HYBRID_RESERVED_SHARE of top_n by each ranking on its own and
+    fills the rest by rank fusion.
+
+    Returns:
+        list of positions in resume_texts, best first; all positions in their
+        original order when top_n is 0 or not smaller than the number of resumes
+    """
+    top_n = PREFILTER_TOP_N if top_n is None else top_n
+    if not top_n or top_n >= len(resume_texts):
+        return list(range(len(resume_texts)))
+
+    reserved = max(1, int(top_n * HYBRID_RESERVED_SHARE))
+    scores = prefilter_scores(jd_text, resume_texts, method, reserved)
+    METRICS.increment("prefilter_dropped_total", len(resume_texts) - top_n)
+    return np.argsort(-scores, kind="stable")[:top_n].tolist()
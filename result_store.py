@@ -0,0 +1,89 @@
+"""
+Compact representation of a ranked candidate list.
+
+Keeping every ranked candidate as a dict with its full resume text in the
+Streamlit session makes memory grow with batch size times concurrent users.
+RankedResults keeps only a NumPy structured array of scores and record keys;
+names, emails, file hashes and duplicates are spilled as one small JSON
+record per candidate, and resume texts as separate blobs, to the
+content-addressed blob store. Records are read a page at a time and texts
+only when they are needed.
+"""
+import io
+import json
+
+import numpy as np
+
+from utils import get_blob_store
+
+OVERALL_SCORE = "Overall Score"
+
+
+class RankedResults:
+    """Ranked candidates, best first, backed by a structured array and the blob store."""
+
+    def __init__(self, scores, section_names, blob_store=None):
+        self.scores = scores
+        self.section_names = list(section_names)
+        self._blob_store = blob_store or get_blob_store()
+
+    @classmethod
+    def from_candidates(cls, candidates, blob_store=None):
+        """Builds the compact form of candidate dicts as returned by the ranking steps, keeping their order."""
+        blob_store = blob_store or get_blob_store()
+        section_names = list(dict.fromkeys(
+            name for candidate in candidates for name in candidate["section_scores"] if name != OVERALL_SCORE
+        ))
+        scores = np.zeros(len(candidates), dtype=[
+            ("score", "<f4"),
+            ("sections", "<f4", (len(section_names),)),
+            ("record", "S64"),
+        ])
+        for row, candidate in enumerate(candidates):
+            record = {
+                "name": candidate["name"],
+                "email": candidate["email"],
+                "file_hash": candidate.get("file_hash"),
+                "duplicates": candidate.get("duplicates", []),
+                "text_key": blob_store.put(candidate["text"]),
+            }
+            scores["score"][row] = candidate["score"]
+            scores["sections"][row] = [candidate["section_scores"].get(name, 0.0) for name in section_names]
+            scores["record"][row] = blob_store.put(json.dumps(record)).encode("ascii")
+        return cls(scores, section_names, blob_store)
+
+    def save(self):
+        """Stores the array in the blob store and returns the key to load() it with."""
+        buffer = io.BytesIO()
+        np.savez(buffer, scores=self.scores, section_names=np.array(self.section_names, dtype=str))
+        return self._blob_store.put(buffer.getvalue())
+
+    @classmethod
+    def load(cls, key, blob_store=None):
+        blob_store = blob_store or get_blob_store()
+        with np.load(io.BytesIO(blob_store.get(key))) as data:
+            return cls(data["scores"], data["section_names"].tolist(), blob_store)
+
+    def __len__(self):
+        return len(self.scores)
+
+    def page(self, start, count):
+        """
+        Candidate dicts for ranks start to start + count, without their resume
+        text; its blob store key is under "text_key" (see text()).
+        """
+        candidates = []
+        for row in self.scores[start:start + count]:
+            record = json.loads(self._blob_store.get(row["record"].decode("ascii")))
+            section_scores = {name: float(score) for name, score in zip(self.section_names, row["sections"])}
+            section_scores[OVERALL_SCORE] = float(row["score"])
+            candidates.append({**record, "score": float(row["score"]), "section_scores": section_scores})
+        return candidates
+
+    def text(self, candidate):
+        """Reads the resume text of a candidate returned by page()."""
+        return self._blob_store.get(candidate["text_key"]).decode("utf-8")
+
+    def with_texts(self, candidates):
+        """Copies of candidates from page() with their resume text under "text"."""
+        return [{**candidate, "text": self.text(candidate)} for candidate in candidates]
@@ -0,0 +1,146 @@
+"""
+Local, rule-based extraction of resume sections from their headings.
+
+Most resumes separate their content under headings such as "Education",
+"Skills" or "Work Experience". parse_resume_sections finds those headings
+with a keyword lexicon and text layout cues (short standalone lines, upper
+case, a trailing colon) and returns the same sections as
+get_resume_summary_prompts, each with a confidence between 0 and 1, so that
+only low-confidence sections need to be sent to the LLM.
+"""
+import re
+
+# Heading keywords per resume section, in normalized form (lower case, letters and spaces only)
+RESUME_SECTION_HEADINGS = {
+    "Qualifications and Education": [
+        "education", "educational background", "education and training", "academic background",
+        "academic qualifications", "educational qualifications", "qualifications", "academics",
+        "academic history", "degrees", "relevant coursework", "coursework",
+    ],
+    "Skills and Certifications": [
+        "skills", "technical skills", "key skills", "core skills", "skill set", "skillset",
+        "core competencies", "competencies", "areas of expertise", "expertise", "technologies",
+        "tools and technologies", "tech stack", "technical proficiencies", "certifications",
+        "certificates", "certification", "licenses and certifications", "licenses",
+        "skills and certifications",
+    ],
+    "Projects and Work Experience": [
+        "experience", "work experience", "professional experience", "relevant experience",
+        "employment", "employment history", "work history", "career history", "professional background",
+        "projects", "personal projects", "academic projects", "key projects", "selected projects",
+        "internships", "internship", "internship experience", "projects and experience",
+    ],
+}
+
+# Headings that end a section without belonging to any of the extracted ones
+OTHER_HEADINGS = [
+    "summary", "professional summary", "profile", "professional profile", "objective", "career objective",
+    "about me", "contact", "contact information", "personal details", "personal information", "interests",
+    "hobbies", "references", "awards", "honors", "achievements", "accomplishments", "publications",
+    "volunteering", "volunteer experience", "languages", "activities", "extracurricular activities",
+]
+
+MAX_HEADING_WORDS = 5
+MAX_HEADING_CHARS = 40
+# Match strength of an upper-case line that is not in the lexicon; it may be a heading or a job title
+UNKNOWN_HEADING_STRENGTH = 0.5
+
+_HEADING_LOOKUP = {
+    heading: section for section, headings in RESUME_SECTION_HEADINGS.items() for heading in headings
+}
+_HEADING_LOOKUP.update({heading: None for heading in OTHER_HEADINGS})
+
+
+def _normalize(text):
+    return " ".join(re.sub(r"[^a-z ]+", " ", text.lower().replace("&", " and ")).split())
+
+
+def _looks_like_heading(line):
+    """Layout cues of a heading line: upper case or a trailing colon."""
+    letters = [c for c in line if c.isalpha()]
+    return line.endswith(":") or (len(letters) >= 3 and all(c.isupper() for c in letters))
+
+
+def match_heading(line):
+    """
+    Classifies a line as a section heading.
+
+    Returns:
+        None for ordinary lines, or a tuple of (section name or None for a
+        heading outside the extracted sections, match strength between 0 and 1,
+        text after the heading on the same line)
+    """
+    stripped = line.strip().lstrip("#*•-=_ ").rstrip("*=_ ")
+    head, separator, rest = stripped.partition(":")
+    if separator and rest.strip() and len(head) <= MAX_HEADING_CHARS:
+        # "Skills: Python, SQL" carries its content on the heading line
+        normalized = _normalize(head)
+        if normalized in _HEADING_LOOKUP:
+            return _HEADING_LOOKUP[normalized], 1.0, rest.strip()
+        return None
+
+    if not stripped or len(stripped) > MAX_HEADING_CHARS or stripped.endswith((".", ",", ";")):
+        return None
+    normalized = _normalize(stripped)
+    words = normalized.split()
+    if not words or len(words) > MAX_HEADING_WORDS:
+        return None
+
+    if normalized in _HEADING_LOOKUP:
+        return _HEADING_LOOKUP[normalized], 1.0, ""
+    if not _looks_like_heading(stripped):
+        return None
+    # e.g. "TECHNICAL SKILLS & TOOLS" or "Projects (selected):"; the longest contained heading wins
+    contained = [heading for heading in _HEADING_LOOKUP if re.search(rf"\b{heading}\b", normalized)]
+    if contained:
+        return _HEADING_LOOKUP[max(contained, key=len)], 0.8, ""
+    # Other upper-case lines only count as headings when they cannot be a list of
+    # acronyms such as "SQL, AWS" inside a skills section
+    if (stripped.endswith(":") or len(words) > 1) and not re.search(r"[\d,|/()]", stripped):
+        return None, UNKNOWN_HEADING_STRENGTH, ""
+    return None
+
+
+def parse_resume_sections(resume_text):
+    """
+    Splits a resume into the sections of get_resume_summary_prompts by its headings.
+
+    Text under several matching headings (e.g. "Skills" and "Certifications")
+    is joined. A section found under an exact heading with content scores 1.0,
+    one found under a partial match 0.8, one whose heading has no content 0.3,
+    and a section without any heading 0. An upper-case line that may or may not
+    be a heading, such as "DATA ANALYST GLOBEX" in a work history, does not end
+    a section; it is kept as content and the section scores at most 0.5.
+
+    Returns:
+        tuple of (dict of section texts, dict of confidences), both keyed by
+        every section name in RESUME_SECTION_HEADINGS
+    """
+    lines = {section: [] for section in RESUME_SECTION_HEADINGS}
+    strength = dict.fromkeys(RESUME_SECTION_HEADINGS, 0.0)
+    ceiling = dict.fromkeys(RESUME_SECTION_HEADINGS, 1.0)
+    current = None
+
+    for line in resume_text.splitlines():
+        heading = match_heading(line)
+        if heading is None:
+            if current is not None and line.strip():
+                lines[current].append(line.strip())
+            continue
+        section, match_strength, rest = heading
+        if section is None and match_strength <= UNKNOWN_HEADING_STRENGTH and current is not None:
+            lines[current].append(line.strip())
+            ceiling[current] = UNKNOWN_HEADING_STRENGTH
+            continue
+        current = section
+        if current is not None:
+            strength[current] = max(strength[current], match_strength)
+            if rest:
+                lines[current].append(rest)
+
+    sections = {section: "\n".join(section_lines) for section, section_lines in lines.items()}
+    confidences = {
+        section: min(strength[section], ceiling[section]) if sections[section] else min(strength[section], 0.3)
+        for section in RESUME_SECTION_HEADINGS
+    }
+    return sections, confidences
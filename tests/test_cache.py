@@ -0,0 +1,50 @@
+import time
+
+import cache
+from cache import LLMCache
+
+
+def test_entries_expire_after_max_age(tmp_path, monkeypatch):
+    llm_cache = LLMCache(str(tmp_path / "llm.sqlite"), max_age_seconds=60)
+    now = time.time()
+    monkeypatch.setattr(cache.time, "time", lambda: now)
+    llm_cache.set("prompt", "model", 0, "answer")
+
+    monkeypatch.setattr(cache.time, "time", lambda: now + 59)
+    assert llm_cache.get("prompt", "model", 0) == "answer"
+    monkeypatch.setattr(cache.time, "time", lambda: now + 61)
+    assert llm_cache.get("prompt", "model", 0) is None
+    assert (llm_cache.hits, llm_cache.misses) == (1, 1)
+
+    llm_cache.evict()
+    assert len(llm_cache) == 0
+
+
+def test_eviction_keeps_the_most_recently_used_entries(tmp_path, monkeypatch):
+    llm_cache = LLMCache(str(tmp_path / "llm.sqlite"), max_entries=2)
+    now = time.time()
+    for i, prompt in enumerate(["first", "second", "third"]):
+        monkeypatch.setattr(cache.time, "time", lambda i=i: now + i)
+        llm_cache.set(prompt, "model", 0, prompt.upper())
+    monkeypatch.setattr(cache.time, "time", lambda: now + 3)
+    llm_cache.get("first", "model", 0)
+
+    llm_cache.evict()
+
+    assert len(llm_cache) == 2
+    assert llm_cache.get("first", "model", 0) == "FIRST"
+    assert llm_cache.get("second", "model", 0) is None
+    assert llm_cache.get("third", "model", 0) == "THIRD"
+
+
+def test_a_disabled_cache_neither_stores_nor_returns_entries(tmp_path):
+    path = str(tmp_path / "llm.sqlite")
+    LLMCache(path).set("prompt", "model", 0, "answer")
+    disabled = LLMCache(path, enabled=False)
+
+    assert disabled.get("prompt", "model", 0) is None
+    disabled.set("other prompt", "model", 0, "other answer")
+
+    assert len(disabled) == 1
+    assert disabled.stats() == {"hits": 0, "misses": 0, "entries": 1, "enabled": False}
+    assert LLMCache(path).get("prompt", "model", 0) == "answer"
@@ -0,0 +1,58 @@
+import numpy as np
+
+import candidate_pool
+import utils
+from candidate_pool import CandidatePool, IVFIndex
+from extraction import SectionResults
+from utils import SECTION_PAIRS, normalize_rows
+
+CANDIDATES = [
+    {"name": "dev.pdf", "email": "dev@example.com", "text": "dev",
+     "sections": {"Skills and Certifications": "Python Django REST APIs"}},
+    {"name": "nurse.pdf", "email": "nurse@example.com", "text": "nurse",
+     "sections": {"Skills and Certifications": "triage patient care"}},
+]
+
+
+def test_ingest_skips_resumes_whose_extraction_partly_failed(tmp_path, monkeypatch):
+    complete = SectionResults({"Skills and Certifications": "Python", "Projects and Work Experience": "APIs"})
+    partial = SectionResults({"Skills and Certifications": "Triage"},
+                             errors={"Projects and Work Experience": "rate limited"})
+    monkeypatch.setattr(candidate_pool, "extract_sections", lambda jds, resumes, use_cache: ([], [complete, partial]))
+    pool = CandidatePool(str(tmp_path))
+    added = []
+    monkeypatch.setattr(pool, "add", lambda candidates: added.extend(candidates) or list(range(len(candidates))))
+
+    pool.ingest([("dev.pdf", "dev@example.com Python APIs"), ("nurse.pdf", "nurse@example.com triage")])
+
+    assert [candidate["name"] for candidate in added] == ["dev.pdf"]
+    assert added[0]["sections"] == dict(complete)
+
+
+def test_ivf_index_finds_stored_vectors_after_training_and_reloading(tmp_path):
+    vectors = normalize_rows(np.random.default_rng(0).normal(size=(600, 16)))
+    index = IVFIndex(16, n_probe=4)
+    index.add(np.arange(600), vectors)
+    index.remove([7])
+
+    path = str(tmp_path / "index.npz")
+    index.save(path)
+    loaded = IVFIndex.load(path, n_probe=4)
+
+    assert loaded.n_lists > 1 and len(loaded) == 599
+    ids, scores = loaded.search(vectors[42], k=3)
+    assert ids[0] == 42 and scores[0] > 0.99
+    assert 7 not in loaded.search(vectors[7], k=10)[0]
+
+
+def test_a_pool_opened_with_another_embedding_model_is_re_embedded(tmp_path, word_hash_model):
+    word_hash_model(16)
+    CandidatePool(str(tmp_path / "pool"), model_version="word-hash-16").add(CANDIDATES)
+
+    word_hash_model(8)
+    pool = CandidatePool(str(tmp_path / "pool"), model_version="word-hash-8")
+    results = pool.search({"Required Skills and Technologies": "Python REST APIs"}, k=2)
+
+    assert pool.index.dim == 8 * len(SECTION_PAIRS)
+    assert [candidate["name"] for candidate in results] == ["dev.pdf", "nurse.pdf"]
+    assert CandidatePool(str(tmp_path / "pool"), model_version="word-hash-8").index.dim == 8 * len(SECTION_PAIRS)
@@ -0,0 +1,76 @@
+import csv
+import json
+
+import pytest
+
+import cli
+
+RESUMES = [
+    {"name": "dev", "text": "Alex Smith alex@example.com Python developer building REST APIs with Django."},
+    {"name": "analyst", "text": "Jamie Okafor jamie@example.com Data analyst reporting sales figures in SQL."},
+    {"name": "nurse", "text": "Sam Lee sam@example.com ICU nurse with five years of triage and patient care."},
+]
+
+
+@pytest.fixture
+def batch_run(tmp_path, fake_llm, api_key, word_hash_model, monkeypatch):
+    monkeypatch.setattr("extraction.GROQ_API_KEY", api_key)
+    resumes = tmp_path / "resumes.jsonl"
+    resumes.write_text("".join(json.dumps(record) + "\n" for record in RESUMES), encoding="utf-8")
+    jd = tmp_path / "jd.txt"
+    jd.write_text("Python developer with Django and REST API experience.", encoding="utf-8")
+    return [str(resumes)], [str(jd)]
+
+
+def read_rows(path):
+    with open(path, newline="", encoding="utf-8") as f:
+        return list(csv.DictReader(f))
+
+
+def test_a_run_stopped_before_recording_progress_does_not_duplicate_rows(batch_run, tmp_path, monkeypatch):
+    sources, jds = batch_run
+    output = str(tmp_path / "results.csv")
+    mark_done = cli.Progress.mark_done
+    calls = []
+
+    def crash_once(self, names):
+        calls.append(names)
+        if len(calls) == 1:
+            raise KeyboardInterrupt
+        mark_done(self, names)
+
+    monkeypatch.setattr(cli.Progress, "mark_done", crash_once)
+    with pytest.raises(KeyboardInterrupt):
+        cli.rank(sources, jds, output, batch_size=2, log=lambda *args, **kwargs: None)
+    assert len(read_rows(output)) == 2
+
+    processed = cli.rank(sources, jds, output, batch_size=2, log=lambda *args, **kwargs: None)
+
+    assert processed == 3
+    assert sorted(row["name"] for row in read_rows(output)) == ["analyst", "dev", "nurse"]
+
+
+def test_a_cut_off_last_line_is_dropped_on_resume(batch_run, tmp_path):
+    sources, jds = batch_run
+    output = tmp_path / "results.jsonl"
+    output.write_text(json.dumps({"job_description": jds[0], "name": "dev"}) + '\n{"job_descr', encoding="utf-8")
+
+    cli.rank(sources, jds, str(output), log=lambda *args, **kwargs: None)
+
+    rows = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert sorted(row["name"] for row in rows) == ["analyst", "dev", "nurse"]
+
+
+def test_a_text_file_that_is_not_utf8_is_skipped(batch_run, tmp_path):
+    _, jds = batch_run
+    resumes = tmp_path / "resumes"
+    resumes.mkdir()
+    (resumes / "dev.txt").write_text(RESUMES[0]["text"], encoding="utf-8")
+    (resumes / "latin1.txt").write_bytes("Zoë Müller, développeuse Python".encode("latin-1"))
+    output = str(tmp_path / "results.csv")
+    messages = []
+
+    cli.rank([str(resumes)], jds, output, log=lambda message, **kwargs: messages.append(message))
+
+    assert [row["name"] for row in read_rows(output)] == [str(resumes / "dev.txt")]
+    assert f"Skipping {resumes / 'latin1.txt'}: Not UTF-8 text" in messages
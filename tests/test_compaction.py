@@ -0,0 +1,78 @@
+from compaction import compact_document, compact_text, count_tokens, strip_boilerplate, truncate_to_budget
+from metrics import METRICS
+
+# pdfplumber output: one line per text line, no blank lines between paragraphs
+PDF_JOB_DESCRIPTION = """Senior Python Engineer
+Acme Analytics - Chicago, IL
+We build data tools for retail banks. You will design ingestion pipelines and APIs.
+Requirements: Python, SQL, Airflow, 5+ years of backend experience.
+Nice to have: Spark, Kubernetes, AWS.
+Acme is an equal opportunity employer. All qualified applicants will be considered without regard to race, color or religion.
+Acme provides reasonable accommodations for candidates with disabilities. We value your interest in Acme.
+Note to recruitment agencies: unsolicited resumes will not be accepted."""
+
+
+def test_boilerplate_is_dropped_per_sentence_in_pdf_text():
+    compacted, before, after = compact_text(PDF_JOB_DESCRIPTION, budget=0, boilerplate=True)
+
+    assert "Requirements: Python, SQL, Airflow" in compacted
+    assert "Nice to have: Spark" in compacted
+    assert "We value your interest in Acme." in compacted
+    assert "equal opportunity" not in compacted
+    assert "reasonable accommodations" not in compacted
+    assert "unsolicited" not in compacted
+    assert 0 < after < before
+
+
+def test_one_boilerplate_sentence_does_not_drop_the_job_description():
+    text = ("Senior Python Engineer\nWe build data tools.\nRequirements: Python, SQL...\n"
+            "Acme is an equal opportunity employer.")
+
+    compacted, _, after = compact_text(text, boilerplate=True)
+
+    assert compacted == "Senior Python Engineer\nWe build data tools.\nRequirements: Python, SQL..."
+    assert after > 0
+
+
+def test_boilerplate_stripping_never_drops_most_of_the_text():
+    text = "Equal opportunity employer. Reasonable accommodation available.\nPython developer."
+
+    assert strip_boilerplate(text) == text
+
+
+def test_long_sentences_are_kept_even_when_they_match():
+    sentence = "You will work on payments with an equal opportunity mindset " + "and ship features " * 20 + "every week."
+
+    assert strip_boilerplate(sentence) == sentence
+
+
+def test_a_line_longer_than_the_budget_is_cut_at_token_level():
+    compacted, before, after = compact_text(" ".join(["word"] * 5000))
+
+    assert before == 5000
+    assert 0 < after <= 3000
+    assert compacted.startswith("word word")
+
+
+def test_truncation_keeps_whole_lines_then_part_of_the_next():
+    text = "Python developer\n" + " ".join(["skill"] * 100)
+
+    truncated = truncate_to_budget(text, 20)
+
+    first, second = truncated.split("\n")
+    assert first == "Python developer"
+    assert second.split() == ["skill"] * len(second.split())
+    assert count_tokens(truncated) <= 20
+
+
+def test_truncation_keeps_characters_the_tokenizer_skips():
+    assert truncate_to_budget("snake_case_name " * 10, 4) == "snake_case_name snake"
+
+
+def test_saved_tokens_are_counted_but_not_recorded_as_a_timing():
+    before = METRICS.snapshot()
+    compact_document(PDF_JOB_DESCRIPTION + "\n\n\n\n1", "job description")
+    recorded = METRICS.since(before)
+
+    assert any(c["name"] == "prompt_tokens_saved_total" and c["value"] > 0 for c in recorded["counters"])
+    assert not any(h["name"].startswith("prompt_tokens") for h in recorded["histograms"])
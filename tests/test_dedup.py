@@ -0,0 +1,48 @@
+from dedup import find_duplicates
+
+AGENCY = "cvs@talent-agency.com"
+PYTHON_DEVELOPER = """Alex Smith
+cvs@talent-agency.com
+Python Developer
+Built REST APIs with Django and FastAPI serving forty thousand users.
+Designed PostgreSQL schemas and Celery task queues for billing.
+Migrated a monolith to Docker containers running on Kubernetes.
+Skills: Python, Django, FastAPI, PostgreSQL, Redis, Docker, Kubernetes."""
+ICU_NURSE = """Jamie Okafor
+cvs@talent-agency.com
+Registered Nurse, Intensive Care Unit
+Provided patient care for up to three ventilated patients per shift.
+Administered medication and titrated vasoactive drips under protocol.
+Charted assessments in Epic and trained new graduate nurses on triage.
+Certifications: BLS, ACLS, CCRN."""
+
+
+def resume(text, email):
+    return {"full_text": text, "email": email}
+
+
+def test_unrelated_candidates_sharing_an_agency_email_are_kept_apart():
+    resumes = [resume(PYTHON_DEVELOPER, AGENCY), resume(ICU_NURSE, AGENCY)]
+
+    assert find_duplicates(resumes) == [0, 1]
+
+
+def test_shared_email_lowers_the_threshold_for_edited_resumes():
+    edited = PYTHON_DEVELOPER.replace("forty thousand", "fifty thousand").replace("billing", "invoicing")
+    same_email = [resume(PYTHON_DEVELOPER, AGENCY), resume(edited, AGENCY)]
+    other_email = [resume(PYTHON_DEVELOPER, AGENCY), resume(edited, "alex.smith@example.com")]
+
+    assert find_duplicates(same_email, threshold=0.9, email_threshold=0.5) == [1, 1]
+    assert find_duplicates(other_email, threshold=0.9, email_threshold=0.5) == [0, 1]
+
+
+def test_near_duplicates_keep_the_longest_copy():
+    longer = PYTHON_DEVELOPER + "\nLanguages: English, Spanish."
+    resumes = [resume(PYTHON_DEVELOPER, "a@example.com"), resume(ICU_NURSE, "b@example.com"),
+               resume(longer, "c@example.com")]
+
+    assert find_duplicates(resumes) == [2, 1, 2]
+
+
+def test_resumes_without_text_are_not_merged():
+    assert find_duplicates([resume("", AGENCY), resume("", AGENCY)]) == [0, 1]
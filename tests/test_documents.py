@@ -0,0 +1,39 @@
+import io
+
+import utils
+from benchmarks.corpus import write_pdf
+from utils import read_files
+
+
+def make_file(name, data):
+    file = io.BytesIO(data)
+    file.name = name
+    return file
+
+
+def test_a_text_file_that_is_not_utf8_is_reported_and_the_others_are_read():
+    files = [make_file("latin1.txt", "José Núñez, Señor Developer".encode("latin-1")),
+             make_file("dev.txt", "Alex Smith, Python developer".encode("utf-8"))]
+
+    assert read_files(files, max_workers=1) == [("", "Not UTF-8 text"), ("Alex Smith, Python developer", None)]
+
+
+def test_pdfs_are_parsed_in_spawned_processes(monkeypatch):
+    start_methods = []
+
+    class RecordingPool(utils.ProcessPoolExecutor):
+        def __init__(self, *args, mp_context=None, **kwargs):
+            start_methods.append(mp_context and mp_context.get_start_method())
+            super().__init__(*args, mp_context=mp_context, **kwargs)
+
+    monkeypatch.setattr(utils, "ProcessPoolExecutor", RecordingPool)
+    files = [
+        make_file(f"cv{i}.pdf", write_pdf([f"Candidate {i}", f"candidate{i}@example.com", "Python developer"]))
+        for i in range(3)
+    ]
+
+    results = read_files(files, max_workers=2)
+
+    assert start_methods == ["spawn"]
+    assert [error for _, error in results] == [None] * 3
+    assert [text.splitlines()[0] for text, _ in results] == ["Candidate 0", "Candidate 1", "Candidate 2"]
@@ -0,0 +1,68 @@
+import multiprocessing
+import zlib
+
+import numpy as np
+
+from embedding_store import EmbeddingStore
+
+DIM = 8
+
+
+def embedding_of(text):
+    """A vector that can be traced back to its text."""
+    return np.random.default_rng(zlib.crc32(text.encode())).random(DIM, dtype=np.float32)
+
+
+def add_texts(path, texts):
+    store = EmbeddingStore(path, model_version="test")
+    for start in range(0, len(texts), 7):
+        chunk = texts[start:start + 7]
+        store.add(chunk, np.stack([embedding_of(text) for text in chunk]))
+
+
+def test_stored_embeddings_are_returned_and_missing_ones_reported(tmp_path):
+    store = EmbeddingStore(str(tmp_path), model_version="test")
+    store.add(["python", "sql"], np.stack([embedding_of("python"), embedding_of("sql")]))
+
+    embeddings, missing = store.get(["sql", "java", "python"])
+
+    assert missing == [1]
+    np.testing.assert_array_equal(embeddings[[0, 2]], np.stack([embedding_of("sql"), embedding_of("python")]))
+
+
+def test_processes_appending_at_once_keep_every_row_with_its_text(tmp_path):
+    path = str(tmp_path)
+    # Every process adds its own texts and the shared ones, in interleaved batches
+    shared = [f"shared {i}" for i in range(50)]
+    text_sets = [[f"process {p} text {i}" for i in range(150)] + shared for p in range(6)]
+    context = multiprocessing.get_context("spawn")
+    processes = [context.Process(target=add_texts, args=(path, texts)) for texts in text_sets]
+    for process in processes:
+        process.start()
+    for process in processes:
+        process.join(60)
+        assert process.exitcode == 0
+
+    texts = sorted({text for texts in text_sets for text in texts})
+    store = EmbeddingStore(path, model_version="test")
+    embeddings, missing = store.get(texts)
+
+    assert missing == []
+    assert len(store) == len(texts)
+    np.testing.assert_array_equal(embeddings, np.stack([embedding_of(text) for text in texts]))
+
+
+def test_a_store_picks_up_rows_and_compaction_of_another_process(tmp_path):
+    first = EmbeddingStore(str(tmp_path), model_version="test")
+    second = EmbeddingStore(str(tmp_path), model_version="test")
+    first.add(["python", "sql", "java"], np.stack([embedding_of(t) for t in ("python", "sql", "java")]))
+
+    assert second.get(["sql"])[1] == []
+    first.delete(["python"])
+    first.compact()
+
+    embeddings, missing = second.get(["java", "sql"])
+    assert missing == []
+    np.testing.assert_array_equal(embeddings, np.stack([embedding_of("java"), embedding_of("sql")]))
+    second.add(["go"], embedding_of("go")[None])
+    np.testing.assert_array_equal(first.get(["go"])[0][0], embedding_of("go"))
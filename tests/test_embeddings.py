@@ -0,0 +1,58 @@
+import pytest
+
+import utils
+from benchmarks import embedding_parity
+from benchmarks.corpus import make_section_corpus
+from utils import chunk_text, load_sbert_model, score_candidates
+
+
+def count_characters(words):
+    return [len(word) for word in words]
+
+
+def test_parity_check_does_not_download_a_model(tmp_path, monkeypatch):
+    monkeypatch.delenv("SBERT_MODEL_PATH", raising=False)
+
+    with pytest.raises(SystemExit):
+        embedding_parity.main(["--candidates", "5"])
+    with pytest.raises(SystemExit):
+        embedding_parity.main(["--model-path", str(tmp_path / "missing")])
+
+
+def test_int8_backend_keeps_the_embeddings_of_the_float_model(tiny_sbert_path):
+    resumes, jd_sections = make_section_corpus(20, 0)
+
+    report = embedding_parity.compare_backends(
+        load_sbert_model("torch", tiny_sbert_path), load_sbert_model("torch-int8", tiny_sbert_path),
+        resumes, jd_sections, top_k=5,
+    )
+
+    assert report["embedding_cosine"].min() > 0.99
+    assert report["drift"].max() < 0.05
+
+
+def test_chunks_are_bounded_by_tokens_and_overlap():
+    url = "https://example.com/very/long/path"
+    text = f"a bb ccc dddd eeeee {url} ff"
+
+    chunks = chunk_text(text, max_tokens=12, count_tokens=count_characters, overlap=4)
+
+    assert chunks == ["a bb ccc dddd", "dddd eeeee", url, "ff"]
+    assert chunk_text("a bb ccc", max_tokens=12, count_tokens=count_characters) == ["a bb ccc"]
+
+
+def test_a_long_section_scores_its_best_chunk(tiny_sbert, monkeypatch):
+    # The tiny model's tokenizer splits every word into one word piece per character
+    monkeypatch.setattr(utils, "SBERT_CHUNK_TOKENS", 40)
+    skills = " ".join(f"k{i:02d}" for i in range(13))
+    resume = {"Skills and Certifications": skills + " " + " ".join(f"h{i:02d}" for i in range(30))}
+    jd = {"Required Skills and Technologies": skills}
+
+    monkeypatch.setattr(utils, "SECTION_POOLING", "max")
+    max_scores, section_names = score_candidates([resume], jd)
+    monkeypatch.setattr(utils, "SECTION_POOLING", "mean")
+    mean_scores, _ = score_candidates([resume], jd)
+
+    column = section_names.index("Required Skills and Technologies")
+    assert max_scores[0, column] == pytest.approx(1.0, abs=1e-5)
+    assert mean_scores[0, column] < max_scores[0, column]
@@ -0,0 +1,130 @@
+import threading
+
+import groq
+import pytest
+
+from extraction import (
+    LLMClient, RateLimiter, call_with_retries, generate_structured_summaries, generate_summaries,
+)
+from utils import complete_prompt, get_groq_client, parse_structured_sections
+
+SECTIONS = ["Skills and Certifications", "Projects and Work Experience"]
+PROMPT = "Extract the sections of this resume:\n" + "-" * 20 + "\nPython, SQL\nBuilt APIs\n" + "-" * 20
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+def test_rate_limiter_sends_a_burst_then_paces_at_the_refill_rate():
+    clock = FakeClock()
+    limiter = RateLimiter(requests_per_minute=60, clock=clock, sleep=clock.sleep)
+
+    for _ in range(60):
+        limiter.acquire()
+    assert clock.sleeps == []
+
+    limiter.acquire()
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_rate_limiter_waits_for_tokens():
+    clock = FakeClock()
+    limiter = RateLimiter(tokens_per_minute=600, clock=clock, sleep=clock.sleep)
+
+    limiter.acquire(tokens=600)
+    limiter.acquire(tokens=300)
+
+    assert sum(clock.sleeps) == pytest.approx(30.0)
+
+
+def test_groq_client_leaves_retries_to_call_with_retries(fake_llm, api_key):
+    fake_llm.requests_per_minute = 1
+    client = LLMClient(max_retries=0, requests_per_minute=0, api_key=api_key)
+
+    assert get_groq_client(api_key).max_retries == 0
+    client.complete(PROMPT)
+    with pytest.raises(groq.RateLimitError):
+        client.complete(PROMPT + " again")
+    # The SDK's default of two retries would have sent three requests past the limiter
+    assert fake_llm.rate_limited == 1
+
+
+def test_call_with_retries_honours_retry_after(fake_llm, api_key):
+    fake_llm.requests_per_minute = 1
+    client = get_groq_client(api_key)
+    complete_prompt(client, PROMPT)
+    sleeps = []
+
+    with pytest.raises(groq.RateLimitError):
+        call_with_retries(lambda: complete_prompt(client, PROMPT), max_retries=2, sleep=sleeps.append)
+
+    assert fake_llm.rate_limited == 3
+    assert len(sleeps) == 2 and all(50 < delay <= 60 for delay in sleeps)
+
+
+def test_parse_structured_sections():
+    completion = 'Here you go: {"Skills and Certifications": ["Python", "SQL"], "Projects and Work Experience": 3}'
+
+    sections, failed = parse_structured_sections(completion, SECTIONS)
+
+    assert sections == {"Skills and Certifications": "Python\nSQL"}
+    assert failed == ["Projects and Work Experience"]
+    assert parse_structured_sections("not json {", SECTIONS) == ({}, SECTIONS)
+
+
+def test_structured_summaries_fall_back_per_section(fake_llm, api_key):
+    client = LLMClient(api_key=api_key)
+    structured = PROMPT + '\nAnswer with JSON:\n  "Skills and Certifications": "..."\n'
+    fallback = {section: f"{PROMPT}\nList the {section}." for section in SECTIONS}
+
+    [result] = generate_structured_summaries([structured], [fallback], use_cache=False, client=client)
+
+    assert result.complete
+    assert list(result) == SECTIONS
+    assert result["Skills and Certifications"]
+    # One JSON call, and one per-section call for the section missing from the answer
+    assert fake_llm.requests == 2
+
+
+def test_concurrent_identical_prompts_share_one_call(fake_llm, api_key):
+    fake_llm.latency = 0.3
+    client = LLMClient(requests_per_minute=0, api_key=api_key)
+    start = threading.Barrier(2)
+    completions = []
+
+    def complete():
+        start.wait()
+        completions.append(client.complete(PROMPT))
+
+    threads = [threading.Thread(target=complete) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert fake_llm.requests == 1
+    assert len(completions) == 2 and completions[0] == completions[1]
+
+
+def test_a_failed_section_keeps_the_other_sections(fake_llm, api_key):
+    fake_llm.requests_per_minute = 1
+    # One call at a time, so the first section gets the only request the server allows
+    client = LLMClient(max_concurrency=1, max_retries=0, requests_per_minute=0, api_key=api_key)
+    prompts = {section: f"{PROMPT}\nList the {section}." for section in SECTIONS}
+
+    [result] = generate_summaries([prompts], use_cache=False, client=client)
+
+    assert not result.complete
+    assert list(result) == [SECTIONS[0]]
+    assert list(result.errors) == [SECTIONS[1]]
+    assert SECTIONS[1] in result.error
@@ -0,0 +1,152 @@
+import time
+
+import pytest
+
+from jobs import DONE, FAILED, LOADING, QUEUED, READY, RUNNING, JobQueue, WorkerPool, run_job
+from metrics import METRICS, Metrics
+from result_store import RankedResults
+from utils import get_blob_store
+
+RESUMES = {
+    "dev.txt": "Alex Smith alex@example.com Python developer building REST APIs with Django and PostgreSQL.",
+    "analyst.txt": "Jamie Okafor jamie@example.com Data analyst reporting sales figures in SQL and Tableau.",
+    "nurse.txt": "Sam Lee sam@example.com ICU nurse with five years of triage and patient care.",
+}
+
+
+def test_a_job_is_claimed_once_and_keeps_its_result(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    job_id = queue.submit({"top_n": 5})
+
+    assert queue.get(job_id)["status"] == QUEUED
+    assert queue.claim("worker-0") == (job_id, {"top_n": 5})
+    assert queue.claim("worker-1") is None
+
+    queue.report(job_id, {"stage": "rank", "done": 1, "total": 2})
+    assert queue.get(job_id)["status"] == RUNNING
+    assert queue.get(job_id)["progress"]["done"] == 1
+
+    queue.finish(job_id, {"ranked": 2}, {"counters": [], "histograms": []})
+    job = queue.get(job_id)
+    assert (job["status"], job["result"], job["metrics"]) == (DONE, {"ranked": 2}, {"counters": [], "histograms": []})
+    assert queue.get("unknown") is None
+
+
+def test_a_job_of_a_silent_worker_is_claimed_again(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), stale_seconds=0.05)
+    job_id = queue.submit({})
+    queue.claim("worker-0")
+
+    time.sleep(0.1)
+
+    assert queue.claim("worker-1") == (job_id, {})
+    queue.fail(job_id, "boom")
+    assert queue.get(job_id)["status"] == FAILED
+
+
+def test_a_job_that_keeps_stopping_its_workers_fails(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"), stale_seconds=0.05, max_attempts=2)
+    crashing = queue.submit({"crashes": True})
+    queue.claim("worker-0")
+    time.sleep(0.1)
+    assert queue.claim("worker-1") == (crashing, {"crashes": True})
+    assert queue.get(crashing)["attempts"] == 2
+
+    next_job = queue.submit({})
+    time.sleep(0.1)
+
+    assert queue.claim("worker-2") == (next_job, {})
+    job = queue.get(crashing)
+    assert job["status"] == FAILED
+    assert job["error"] == "The worker stopped responding on each of 2 attempts"
+    assert job["finished_at"] is not None
+
+
+def test_workers_report_their_embedding_model(tmp_path):
+    queue = JobQueue(str(tmp_path / "jobs.sqlite"))
+    queue.set_model_status("worker-0", READY)
+    queue.set_model_status("worker-1", FAILED, "No such model")
+
+    assert queue.model_status(["worker-0", "worker-1", "worker-2"]) == [
+        (READY, None), (FAILED, "No such model"), (LOADING, None),
+    ]
+
+
+def test_metrics_recorded_since_a_snapshot_merge_into_another_registry():
+    worker = Metrics()
+    worker.increment("llm_request_calls_total", 2)
+    worker.observe("llm_request_seconds", 0.2)
+    before = worker.snapshot()
+    worker.increment("llm_request_calls_total", 3)
+    worker.increment("cache_hits_total", cache="disk")
+    worker.observe("llm_request_seconds", 0.003)
+    worker.observe("llm_request_seconds", 20.0)
+
+    app = Metrics()
+    app.observe("llm_request_seconds", 0.2)
+    app.merge(worker.since(before))
+
+    snapshot = app.snapshot()
+    counters = {(c["name"], tuple(c["labels"].items())): c["value"] for c in snapshot["counters"]}
+    assert counters == {("cache_hits_total", (("cache", "disk"),)): 1, ("llm_request_calls_total", ()): 3}
+    [histogram] = snapshot["histograms"]
+    assert histogram["count"] == 3
+    assert histogram["sum"] == pytest.approx(20.203)
+    assert [bucket["count"] for bucket in histogram["buckets"]][:4] == [0, 1, 1, 1]
+    assert histogram["buckets"][-1]["count"] == 3
+
+
+def test_worker_processes_report_their_metrics_to_the_app(tmp_path, fake_llm, monkeypatch):
+    monkeypatch.setenv("GROQ_API_KEY", "test")
+    pool = WorkerPool(n_workers=1, path=str(tmp_path / "jobs.sqlite"))
+    try:
+        # An unsupported file is skipped, so the job runs without the embedding model
+        key = get_blob_store().put(b"not a resume")
+        job_id = pool.submit({"job_descriptions": ["Python developer"], "files": [["cv.docx", key]],
+                              "top_n": 10, "use_cache": False})
+        runs = [h["count"] for h in METRICS.snapshot()["histograms"] if h["name"] == "ranking_run_seconds"]
+        deadline = time.monotonic() + 60
+        while pool.get(job_id)["status"] not in (DONE, FAILED) and time.monotonic() < deadline:
+            time.sleep(0.1)
+        job = pool.get(job_id)
+        pool.get(job_id)
+        while pool.model_status()[0][0] == LOADING and time.monotonic() < deadline:
+            time.sleep(0.1)
+        model_status = pool.model_status()
+    finally:
+        pool.stop()
+
+    assert job["status"] == DONE
+    # Without a model available offline the load fails, but it is reported either way
+    assert model_status[0][0] in (READY, FAILED)
+    assert job["result"]["summary"]["errors"] == [["cv.docx", "Unsupported file type: docx"]]
+    assert fake_llm.requests == 1
+    merged = [h["count"] for h in METRICS.snapshot()["histograms"] if h["name"] == "ranking_run_seconds"]
+    assert merged == [sum(runs) + 1]
+
+
+def test_maintenance_is_claimed_by_one_worker_per_interval(tmp_path):
+    path = str(tmp_path / "jobs.sqlite")
+    first, second = JobQueue(path), JobQueue(path)
+
+    assert first.claim_maintenance("blob_cleanup", 3600)
+    assert not second.claim_maintenance("blob_cleanup", 3600)
+    assert second.claim_maintenance("blob_cleanup", 0)
+
+
+def test_a_job_continuing_the_previous_one_extracts_only_new_resumes(word_hash_model, fake_llm, api_key, monkeypatch):
+    monkeypatch.setattr("extraction.GROQ_API_KEY", api_key)
+    keys = {name: get_blob_store().put(text) for name, text in RESUMES.items()}
+    payload = {"job_descriptions": ["Python developer who builds REST APIs"], "top_n": 10, "use_cache": False,
+               "files": [[name, keys[name]] for name in ("dev.txt", "analyst.txt")]}
+
+    first = run_job(payload)
+    first_requests = fake_llm.requests
+    again = run_job({**payload, "session": first["session"]})
+    assert fake_llm.requests == first_requests
+
+    added = run_job({**payload, "session": again["session"], "files": [[name, key] for name, key in keys.items()]})
+    assert fake_llm.requests > first_requests
+    assert added["summary"]["extracted"] == [keys["nurse.txt"]]
+    names = [candidate["name"] for candidate in RankedResults.load(added["results"]).page(0, 10)]
+    assert sorted(names) == sorted(RESUMES)
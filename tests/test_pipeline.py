@@ -0,0 +1,98 @@
+import io
+
+import numpy as np
+
+import pipeline
+from cache import FitSummaryCache
+from dedup import minhash_signature
+from pipeline import Leaderboard, RankingSession, generate_fit_summaries, get_cached_fit_summaries, make_resume
+
+RESUMES = {
+    "dev.txt": "Alex Smith alex@example.com Python developer building REST APIs with Django and PostgreSQL.",
+    "analyst.txt": "Jamie Okafor jamie@example.com Data analyst reporting sales figures in SQL and Tableau.",
+    "nurse.txt": "Sam Lee sam@example.com ICU nurse with five years of triage and patient care.",
+}
+JD = "Python developer with Django, REST APIs and SQL."
+
+
+def make_file(name, text):
+    file = io.BytesIO(text.encode("utf-8"))
+    file.name = name
+    return file
+
+
+def test_a_saved_ranking_session_loads_with_its_extractions_and_ranking():
+    session = RankingSession()
+    resume = make_resume("dev.txt", "Alex Smith\nalex@example.com\nPython developer building REST APIs", "a" * 64)
+    resume["sections"] = {"Skills and Certifications": "Python"}
+    resume["minhash"] = minhash_signature(resume["full_text"])
+    partial = make_resume("nurse.txt", "Jamie Okafor\nICU nurse", "b" * 64)
+    partial["partial_sections"] = {"Skills and Certifications": "Triage"}
+    session.resumes = {resume["file_hash"]: resume, partial["file_hash"]: partial}
+    session.read_errors = {"c" * 64: ("cv.docx", "Unsupported file type: docx")}
+    session.duplicates = {resume["file_hash"]: []}
+    session.jd_hash, session.jd_sections = "d" * 64, {"Required Skills and Technologies": "Python"}
+    session.ranking = [{"name": "dev.txt", "email": "alex@example.com", "score": 0.8, "text": resume["full_text"],
+                        "file_hash": resume["file_hash"], "section_scores": {"Overall Score": 0.8}, "duplicates": []}]
+
+    loaded = RankingSession.load(session.save())
+
+    assert loaded.resumes[partial["file_hash"]] == partial
+    assert loaded.resumes[resume["file_hash"]]["sections"] == resume["sections"]
+    np.testing.assert_array_equal(loaded.resumes[resume["file_hash"]]["minhash"], resume["minhash"])
+    assert loaded.resumes[resume["file_hash"]]["minhash"].dtype == np.uint64
+    assert loaded.read_errors == session.read_errors
+    assert (loaded.jd_hash, loaded.jd_sections) == (session.jd_hash, session.jd_sections)
+    assert loaded.ranking == session.ranking
+
+
+def test_leaderboard_keeps_the_best_candidates_and_the_first_of_equal_scores():
+    leaderboard = Leaderboard(k=3)
+    for name, score in [("a", 0.5), ("b", 0.9), ("c", 0.5), ("d", 0.1), ("e", 0.7), ("f", 0.5)]:
+        leaderboard.push({"name": name, "score": score})
+
+    assert [candidate["name"] for candidate in leaderboard.top()] == ["b", "e", "a"]
+
+
+def test_an_update_reports_reading_then_ranking_in_batches(fake_llm, api_key, word_hash_model, monkeypatch):
+    monkeypatch.setattr("extraction.GROQ_API_KEY", api_key)
+    files = [make_file(name, text) for name, text in RESUMES.items()]
+    session = RankingSession()
+
+    events = list(session.iter_update(JD, files, top_n=0, use_cache=False, batch_size=2))
+
+    assert [(e["stage"], e["done"], e["total"], len(e["candidates"])) for e in events] == [
+        ("read", 1, 3, 0), ("read", 2, 3, 0), ("read", 3, 3, 0),
+        ("rank", 0, 3, 0), ("rank", 2, 3, 2), ("rank", 3, 3, 1), ("rank", 3, 3, 0),
+    ]
+    assert events[-1]["summary"]["scored"] == 3
+    ranked = [candidate["name"] for event in events for candidate in event["candidates"]]
+    assert sorted(ranked) == sorted(RESUMES)
+
+    # Nothing is read or scored again; the first rank dict carries the kept ranking
+    again = list(session.iter_update(JD, files, top_n=0, use_cache=False, batch_size=2))
+
+    assert [(e["stage"], e["done"], e["total"]) for e in again] == [("rank", 0, 0)] * 3
+    assert again[0]["candidates"] == session.ranking and len(session.ranking) == 3
+    assert again[-1]["summary"]["scored"] == 0
+
+
+def test_fit_summaries_are_stored_and_only_generated_when_missing(fake_llm, api_key, tmp_path, monkeypatch):
+    monkeypatch.setattr("extraction.GROQ_API_KEY", api_key)
+    fit_summary_cache = FitSummaryCache(str(tmp_path / "fit_summaries.sqlite"))
+    monkeypatch.setattr(pipeline, "get_fit_summary_cache", lambda: fit_summary_cache)
+    texts = list(RESUMES.values())
+
+    first = generate_fit_summaries(JD, texts[:2], use_cache=True)
+    assert fake_llm.requests == 2
+    assert all(summary and error is None for summary, error in first)
+    assert get_cached_fit_summaries(JD, texts) == {0: first[0][0], 1: first[1][0]}
+
+    # Only the third resume is missing; the others come from the store
+    assert generate_fit_summaries(JD, texts, use_cache=True)[:2] == first
+    assert fake_llm.requests == 3
+
+    # Without the cache every summary is generated again and nothing is stored
+    generate_fit_summaries(JD, texts[:1] + ["A new resume."], use_cache=False)
+    assert fake_llm.requests == 5
+    assert len(fit_summary_cache) == 3
@@ -0,0 +1,36 @@
+import prefilter
+from prefilter import shortlist
+
+JD = "Platform engineer to run our Terraform and Kubernetes infrastructure."
+
+
+def filler_resumes(n):
+    return [
+        f"Candidate {i}: engineer and team player who likes to run projects and improve our processes."
+        for i in range(n)
+    ]
+
+
+def test_an_exact_keyword_match_stays_on_the_shortlist(word_hash_model, monkeypatch):
+    resumes = filler_resumes(30)
+    resumes.insert(17, "Ops specialist, Terraform modules for cloud accounts.")
+    monkeypatch.setattr(prefilter, "PREFILTER_TOP_N", 3)
+
+    for method in ("bm25", "hybrid"):
+        assert 17 in shortlist(JD, resumes, method=method)
+
+
+def test_hybrid_order_is_deterministic_and_ties_keep_upload_order(word_hash_model):
+    resumes = [
+        "Kubernetes operator and Terraform author.",
+        "Accountant preparing quarterly reports.",
+        "Kubernetes operator and Terraform author.",
+        "Engineer who runs Kubernetes clusters.",
+        "Accountant preparing quarterly reports.",
+    ]
+
+    first = shortlist(JD, resumes, top_n=4, method="hybrid")
+
+    assert first == shortlist(JD, resumes, top_n=4, method="hybrid")
+    # Identical resumes score the same and are listed in the order they were uploaded
+    assert first == [0, 2, 3, 1]
@@ -0,0 +1,46 @@
+import os
+import time
+
+from cache import BlobStore
+from result_store import OVERALL_SCORE, RankedResults
+
+
+def make_candidate(name, score):
+    return {
+        "name": name,
+        "email": f"{name.lower()}@example.com",
+        "text": f"{name} has five years of SQL experience.",
+        "score": score,
+        "section_scores": {"Skills and Certifications": score / 2, OVERALL_SCORE: score},
+    }
+
+
+def test_results_are_read_back_a_page_at_a_time(tmp_path):
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    key = RankedResults.from_candidates(
+        [make_candidate("Ada", 0.9), make_candidate("Bob", 0.5)], blob_store
+    ).save()
+
+    results = RankedResults.load(key, blob_store)
+    page = results.page(1, 10)
+
+    assert len(results) == 2
+    assert [candidate["name"] for candidate in page] == ["Bob"]
+    assert page[0]["section_scores"] == {"Skills and Certifications": 0.25, OVERALL_SCORE: 0.5}
+    assert results.text(page[0]) == "Bob has five years of SQL experience."
+
+
+def test_blobs_that_were_not_put_again_are_removed(tmp_path):
+    blob_store = BlobStore(str(tmp_path / "blobs"))
+    old_key = blob_store.put("ranked a week ago")
+    reused_key = blob_store.put("ranked a week ago and again today")
+    week_ago = time.time() - 7 * 24 * 3600
+    for key in (old_key, reused_key):
+        os.utime(blob_store.blob_path(key), (week_ago, week_ago))
+
+    blob_store.put("ranked a week ago and again today")
+    new_key = blob_store.put("ranked today")
+
+    assert blob_store.remove_older_than(24 * 3600) == 1
+    assert old_key not in blob_store
+    assert reused_key in blob_store and new_key in blob_store
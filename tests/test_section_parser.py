@@ -0,0 +1,53 @@
+from section_parser import match_heading, parse_resume_sections
+
+EDUCATION = "Qualifications and Education"
+SKILLS = "Skills and Certifications"
+EXPERIENCE = "Projects and Work Experience"
+
+TWO_JOBS = """Jordan Kim
+jordan.kim@example.com
+EDUCATION
+B.S. in Statistics, State University, 2016
+SKILLS
+SQL, Python, Tableau, Excel
+EXPERIENCE
+SENIOR DATA ANALYST ACME CORP
+- Built Tableau dashboards for the sales team.
+DATA ANALYST GLOBEX
+- Automated weekly reporting with Python and SQL.
+"""
+
+
+def test_clear_headings_are_parsed_with_full_confidence():
+    sections, confidences = parse_resume_sections(TWO_JOBS.replace("DATA ANALYST", "Data Analyst"))
+
+    assert sections[EDUCATION] == "B.S. in Statistics, State University, 2016"
+    assert sections[SKILLS] == "SQL, Python, Tableau, Excel"
+    assert "Automated weekly reporting" in sections[EXPERIENCE]
+    assert confidences == {EDUCATION: 1.0, SKILLS: 1.0, EXPERIENCE: 1.0}
+
+
+def test_upper_case_job_titles_do_not_end_the_experience_section():
+    sections, confidences = parse_resume_sections(TWO_JOBS)
+
+    assert sections[EXPERIENCE].splitlines() == [
+        "SENIOR DATA ANALYST ACME CORP",
+        "- Built Tableau dashboards for the sales team.",
+        "DATA ANALYST GLOBEX",
+        "- Automated weekly reporting with Python and SQL.",
+    ]
+    # The title lines might have been headings, so the LLM checks the section
+    assert confidences[EXPERIENCE] < 0.75
+    assert confidences[EDUCATION] == confidences[SKILLS] == 1.0
+
+
+def test_known_headings_still_end_a_section():
+    sections, _ = parse_resume_sections("SKILLS\nPython, SQL\nINTERESTS\nChess\nEXPERIENCE\n- Built APIs.")
+
+    assert sections[SKILLS] == "Python, SQL"
+    assert sections[EXPERIENCE] == "- Built APIs."
+
+
+def test_heading_with_content_on_the_same_line():
+    assert match_heading("Skills: Python, SQL") == (SKILLS, 1.0, "Python, SQL")
+    assert match_heading("SQL, AWS, GCP") is None
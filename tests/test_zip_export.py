@@ -0,0 +1,38 @@
+import threading
+import zipfile
+
+from utils import create_zip_file_for_resumes
+
+SHORTLIST = [
+    {"name": f"candidate{i}.pdf", "email": f"c{i}@example.com", "text": f"Resume {i}",
+     "section_scores": {"Overall Score": 0.9 - i / 10}}
+    for i in range(3)
+]
+
+
+def test_concurrent_exports_of_one_shortlist(tmp_path):
+    barrier = threading.Barrier(8)
+    paths, errors = [], []
+
+    def export():
+        barrier.wait()
+        try:
+            paths.append(create_zip_file_for_resumes(SHORTLIST, export_dir=str(tmp_path)))
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=export) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(set(paths)) == 1
+    with zipfile.ZipFile(paths[0]) as zip_file:
+        assert sorted(zip_file.namelist()) == [
+            "0.70_c2@example.com_candidate2.txt",
+            "0.80_c1@example.com_candidate1.txt",
+            "0.90_c0@example.com_candidate0.txt",
+        ]
+    assert [p.name for p in tmp_path.iterdir()] == [paths[0].rsplit("/", 1)[1]]
@@ -1,54 +1,336 @@
-from sentence_transformers import SentenceTransformer
-from sklearn.metrics.pairwise import cosine_similarity
+# sentence_transformers, groq and pdfplumber are slow to import and only
+# imported where they are first used, so importing this module stays fast
 from dotenv import load_dotenv
-from groq import Groq
-import streamlit as st
 import numpy as np
-import pdfplumber
 import os
 import io
 import zipfile
+import functools
+import json
+import multiprocessing
+import sys
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
+
+from cache import CACHE_DIR, BlobStore, DocumentTextCache, FitSummaryCache, LLMCache, content_hash
+from compaction import PROMPT_TOKEN_BUDGET, compact_document
+from embedding_store import EmbeddingStore
+from metrics import METRICS
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+LLM_MODEL = "llama3-8b-8192"
+LLM_TEMPERATURE = 0.5
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "1") != "0"
+SBERT_MODEL_NAME = 'all-MiniLM-L6-v2'
+# Local model directory to load instead of downloading SBERT_MODEL_NAME
+SBERT_MODEL_PATH = os.getenv("SBERT_MODEL_PATH") or SBERT_MODEL_NAME
+# "torch", "torch-int8" (dynamically quantized linear layers), "onnx" or "onnx-int8"
+SBERT_BACKEND = os.getenv("SBERT_BACKEND", "torch")
+# ONNX file inside the model directory used by the onnx-int8 backend
+SBERT_ONNX_INT8_FILE = os.getenv("SBERT_ONNX_INT8_FILE", "onnx/model_qint8_avx512_vnni.onnx")
+# CPU threads used for encoding, 0 keeps the library default
+SBERT_THREADS = int(os.getenv("SBERT_THREADS", "0"))
+SBERT_BACKENDS = ("torch", "torch-int8", "onnx", "onnx-int8")
+# Tags stored embeddings, so those of another model or backend are never mixed with new ones
+SBERT_MODEL_VERSION = f"{SBERT_MODEL_PATH}:{SBERT_BACKEND}"
+# Longer texts are split into overlapping chunks of at most this many word pieces of the
+# model's tokenizer, 0 for the model's input limit; pooling combines the chunk scores of a section
+SBERT_CHUNK_TOKENS = int(os.getenv("SBERT_CHUNK_TOKENS", "0"))
+SBERT_CHUNK_OVERLAP_TOKENS = 32
+SECTION_POOLING = os.getenv("SECTION_POOLING", "max")
+EMBEDDING_STORE_ENABLED = os.getenv("EMBEDDING_STORE_ENABLED", "1") != "0"
+PDF_MAX_PAGES = int(os.getenv("PDF_MAX_PAGES", "0")) or None
+PDF_MAX_CHARS = int(os.getenv("PDF_MAX_CHARS", "0")) or None
+
+@functools.lru_cache(maxsize=None)
+def load_sbert_model(backend=None, model_path=None):
+    """
+    Load the Sentence-Transformer model for generating embeddings.
+
+    The backend defaults to SBERT_BACKEND and the model to SBERT_MODEL_PATH.
+    The ONNX backends need onnxruntime and a model directory with the exported
+    ONNX files (see benchmarks/embedding_parity.py --export).
+    """
+    backend = backend or SBERT_BACKEND
+    model_path = model_path or SBERT_MODEL_PATH
+    if backend not in SBERT_BACKENDS:
+        raise ValueError(f"Unknown SBERT backend: {backend}. Choose one of {', '.join(SBERT_BACKENDS)}.")
+
+    from sentence_transformers import SentenceTransformer
+
+    if backend.startswith("onnx"):
+        import onnxruntime
+
+        session_options = onnxruntime.SessionOptions()
+        if SBERT_THREADS:
+            session_options.intra_op_num_threads = SBERT_THREADS
+        model_kwargs = {"provider": "CPUExecutionProvider", "session_options": session_options}
+        if backend == "onnx-int8":
+            model_kwargs["file_name"] = SBERT_ONNX_INT8_FILE
+        return SentenceTransformer(model_path, device="cpu", backend="onnx", model_kwargs=model_kwargs)
+
+    import torch
+
+    if SBERT_THREADS:
+        torch.set_num_threads(SBERT_THREADS)
+    if backend == "torch-int8":
+        model = SentenceTransformer(model_path, device="cpu")
+        return torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+    return SentenceTransformer(model_path)
+
+
+_sbert_loading = None
+_sbert_loading_lock = threading.Lock()
+
+
+def start_sbert_model_loading():
+    """
+    Starts loading the default SBERT model in a background thread, once.
+
+    Returns:
+        concurrent.futures.Future that resolves to the model
+    """
+    global _sbert_loading
+    with _sbert_loading_lock:
+        if _sbert_loading is None:
+            future = _sbert_loading = Future()
 
-@st.cache_resource
-def load_sbert_model():
-    """Load the Sentence-Transformer model for generating embeddings."""
-    return SentenceTransformer('all-MiniLM-L6-v2')
+            def load():
+                try:
+                    future.set_result(load_sbert_model())
+                except BaseException as e:
+                    future.set_exception(e)
 
+            threading.Thread(target=load, name="sbert-model-loading", daemon=True).start()
+        return _sbert_loading
 
-@st.cache_resource
+
+def get_sbert_model():
+    """
+    Returns the default SBERT model, waiting for the background load if it is
+    still running. A failed load is started again on the next call.
+    """
+    global _sbert_loading
+    future = start_sbert_model_loading()
+    try:
+        return future.result()
+    except Exception:
+        with _sbert_loading_lock:
+            if _sbert_loading is future:
+                _sbert_loading = None
+        raise
+
+
+@functools.lru_cache(maxsize=None)
+def get_embedding_store():
+    """Return the shared on-disk embedding store, tagged with the current model and backend."""
+    return EmbeddingStore(
+        model_version=SBERT_MODEL_VERSION, enabled=EMBEDDING_STORE_ENABLED
+    )
+
+
+def embed_texts(texts, batch_size=64):
+    """
+    Returns embeddings for texts, encoding only the texts missing from the
+    embedding store in a single batch.
+    """
+    def encode(missing):
+        METRICS.increment("sbert_encoded_texts_total", len(missing))
+        # Batches of similar length need the least padding
+        order = sorted(range(len(missing)), key=lambda i: len(missing[i]), reverse=True)
+        with METRICS.span("sbert_encode"):
+            encoded = get_sbert_model().encode([missing[i] for i in order], batch_size=batch_size)
+        embeddings = np.empty_like(encoded)
+        embeddings[order] = encoded
+        return embeddings
+
+    return get_embedding_store().encode(texts, encode)
+
+
+@functools.lru_cache(maxsize=None)
 def get_groq_client(api_key):
-    """Initialize and return a Groq client."""
+    """
+    Initialize and return a Groq client.
+
+    Set GROQ_BASE_URL to point the client at a compatible local chat-completions server.
+    The SDK's own retries are turned off: call_with_retries retries through the
+    rate limiter and honours Retry-After.
+    """
     if not api_key:
         raise ValueError("Groq API key is not set. Please add it to your .env file.")
-    return Groq(api_key=api_key)
+    from groq import Groq
 
+    return Groq(api_key=api_key, max_retries=0)
 
 
-def read_pdf_file(file):
-    """Reads the content of a PDF file using pdfplumber."""
-    text = ""
+@functools.lru_cache(maxsize=None)
+def get_llm_cache():
+    """Return the shared on-disk cache of LLM completions."""
+    return LLMCache(enabled=LLM_CACHE_ENABLED)
+
+
+@functools.lru_cache(maxsize=None)
+def get_fit_summary_cache():
+    """Return the shared on-disk cache of candidate fit summaries."""
+    return FitSummaryCache()
+
+
+@functools.lru_cache(maxsize=None)
+def get_blob_store():
+    """Return the shared content-addressed store of original uploaded files."""
+    return BlobStore()
+
+
+@functools.lru_cache(maxsize=None)
+def get_document_text_cache():
+    """Return the shared on-disk cache of text extracted from uploaded files."""
+    return DocumentTextCache()
+
+
+def read_pdf_file(file, max_pages=None, max_chars=None):
+    """
+    Reads the content of a PDF file using pdfplumber.
+    Stops after max_pages pages or once max_chars characters were extracted.
+    """
+    import pdfplumber
+
+    pages = []
+    n_chars = 0
     try:
         with pdfplumber.open(file) as pdf:
-            for page in pdf.pages:
-                text += page.extract_text() or ""
-        return text
+            for page in pdf.pages[:max_pages]:
+                page_text = page.extract_text() or ""
+                pages.append(page_text)
+                n_chars += len(page_text)
+                if max_chars and n_chars >= max_chars:
+                    break
+        text = "\n".join(pages)
+        return text[:max_chars] if max_chars else text
     except Exception as e:
         return f"An unexpected error occurred while processing PDF with pdfplumber: {e}"
 
 
-def read_text_file(file):
-    """Reads the content of an uploaded file, handling both PDF and TXT."""
-    file_ext = file.name.split('.')[-1].lower()
+def read_document(name, data, max_pages=None, max_chars=None):
+    """
+    Extracts the text of a TXT or PDF document from its raw bytes.
+
+    Returns:
+        tuple of (text, error message or None)
+    """
+    file_ext = name.split('.')[-1].lower()
 
     if file_ext == 'txt':
-        return file.getvalue().decode("utf-8")
+        try:
+            return data.decode("utf-8"), None
+        except UnicodeDecodeError:
+            return "", "Not UTF-8 text"
     elif file_ext == 'pdf':
-        return read_pdf_file(file)
+        text = read_pdf_file(io.BytesIO(data), max_pages=max_pages, max_chars=max_chars)
+        if text.startswith("An unexpected error occurred"):
+            return "", text
+        return text, None
+    else:
+        return "", f"Unsupported file type: {file_ext}"
+
+
+def _timed_read_document(name, data, max_pages=None, max_chars=None):
+    """Runs read_document and also returns how long it took, so pool workers can report it."""
+    start = time.perf_counter()
+    text, error = read_document(name, data, max_pages, max_chars)
+    return text, error, time.perf_counter() - start
+
+
+def _record_document_read(name, seconds, error):
+    file_format = name.split('.')[-1].lower()
+    METRICS.observe("document_read_seconds", seconds, format=file_format)
+    METRICS.increment("document_read_calls_total", format=file_format)
+    if error:
+        METRICS.increment("document_read_errors_total", format=file_format)
+
+
+def read_text_file(file, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    """Reads the content of an uploaded file, handling both PDF and TXT."""
+    text, error = read_files([file], max_workers=1, max_pages=max_pages, max_chars=max_chars)[0]
+    return error or text
+
+
+def _can_spawn_readers():
+    """
+    Spawned processes import the main script again. While the app runs jobs
+    on a thread of its own (JOB_WORKERS=0), that script is the Streamlit app,
+    which must not run in a reader process.
+    """
+    streamlit = sys.modules.get("streamlit")
+    return streamlit is None or not streamlit.runtime.exists()
+
+
+def iter_read_files(files, max_workers=None, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    """
+    Extracts the text of many uploaded files, yielding (index, text, error)
+    as each file finishes.
+
+    Files whose content was extracted before are served from the document text
+    cache. PDFs are parsed in a process pool when more than one needs parsing
+    and more than one worker is available. Its processes are spawned, not
+    forked, since the callers run other threads whose locks a forked child
+    could inherit while they are held.
+    """
+    cache = get_document_text_cache()
+    pending = []
+
+    for i, file in enumerate(files):
+        data = file.getvalue()
+        if file.name.lower().endswith('.pdf'):
+            cached = cache.get(data, max_pages, max_chars)
+            if cached is not None:
+                yield i, cached, None
+            else:
+                pending.append((i, file.name, data))
+        else:
+            text, error, seconds = _timed_read_document(file.name, data)
+            _record_document_read(file.name, seconds, error)
+            yield i, text, error
+
+    # A process pool only pays off with more than one core and more than one PDF to parse
+    max_workers = max_workers or os.cpu_count() or 1
+    executor = None
+    if max_workers == 1 or len(pending) <= 1 or not _can_spawn_readers():
+        results = (
+            (i, name, data, _timed_read_document(name, data, max_pages, max_chars))
+            for i, name, data in pending
+        )
     else:
-        return f"Unsupported file type: {file_ext}"
+        executor = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"))
+        futures = {
+            executor.submit(_timed_read_document, name, data, max_pages, max_chars): (i, name, data)
+            for i, name, data in pending
+        }
+        results = ((*futures[future], future.result()) for future in as_completed(futures))
+
+    try:
+        for i, name, data, (text, error, seconds) in results:
+            _record_document_read(name, seconds, error)
+            if error is None:
+                cache.set(data, text, max_pages, max_chars)
+            yield i, text, error
+    finally:
+        if executor is not None:
+            executor.shutdown(cancel_futures=True)
+
+
+def read_files(files, max_workers=None, max_pages=PDF_MAX_PAGES, max_chars=PDF_MAX_CHARS):
+    """
+    Extracts the text of many uploaded files in parallel.
+
+    Returns:
+        list of (text, error message or None) tuples in the order of files
+    """
+    results = [None] * len(files)
+    for i, text, error in iter_read_files(files, max_workers, max_pages, max_chars):
+        results[i] = (text, error)
+    return results
 
 
 import re
@@ -68,6 +350,7 @@ def get_resume_summary_prompts(resume_text):
     Generates and returns a dictionary of prompts for extracting structured
     information from a resume.
     """
+    resume_text = compact_document(resume_text, "resume")
 
     resume_prompts = {
         "Qualifications and Education": (
@@ -112,6 +395,7 @@ def get_jd_summary_prompts(jd_text):
     Generates and returns a dictionary of prompts for extracting structured
     information from a job description.
     """
+    jd_text = compact_document(jd_text, "job description")
 
     jd_prompts = {
         "About Company": (
@@ -172,77 +456,325 @@ def get_jd_summary_prompts(jd_text):
     return jd_prompts
 
 
-def generate_summary(prompts):
+RESUME_SECTION_INSTRUCTIONS = {
+    "Qualifications and Education": "all the sections which indicate qualifications or education of the candidate",
+    "Skills and Certifications": "all the sections which indicate skills and certifications of the candidate",
+    "Projects and Work Experience": "all the sections which indicate projects and work experience of the candidate",
+}
+
+JD_SECTION_INSTRUCTIONS = {
+    "About Company": "the company information",
+    "Role Overview": "the role overview",
+    "Required Skills and Technologies": "all the required skills and technologies",
+    "Qualifications and Education": "all the required qualifications or education",
+    "Responsibilities and Duties": "all the responsibilities and duties",
+}
+
+
+def get_structured_prompt(document_text, section_instructions, document_kind):
     """
-    Extracts structured sections from a job description using guided prompts.
-    Returns a dictionary with extracted information.
+    Generates a single prompt that asks for every section of a document at once
+    as a JSON object keyed by section name.
     """
+    document_text = compact_document(document_text, document_kind)
+    keys = "\n".join(
+        f'            "{section}": {instruction}' for section, instruction in section_instructions.items()
+    )
+    return f"""
+            You are an ATS (Applicant Tracking System) that extracts structured information from {document_kind}s.
+            Given the following {document_kind} text:
+            --------------------
+            {document_text}
+            --------------------
+            Directly extract the following from the above {document_kind} and return them as a JSON object
+            with exactly these keys. Each value must be a single string; use an empty string if nothing is given.
+{keys}
+            """
 
-    section_summaries = {}
-    client = get_groq_client(GROQ_API_KEY)
 
-    for section, prompt in prompts.items():
-        try:
-            response = client.chat.completions.create(
-                model="llama3-8b-8192",
-                messages=[{"role": "user", "content": prompt}],
-                temperature=0.5,
-            )
-            section_summaries[section] = response.choices[0].message.content.strip()
-        except Exception as e:
-            return f"Error generating summary: {e}"
+def get_resume_structured_prompt(resume_text):
+    """Generates the single-call JSON extraction prompt for a resume."""
+    return get_structured_prompt(resume_text, RESUME_SECTION_INSTRUCTIONS, "resume")
 
-    return section_summaries
 
+def get_jd_structured_prompt(jd_text):
+    """Generates the single-call JSON extraction prompt for a job description."""
+    return get_structured_prompt(jd_text, JD_SECTION_INSTRUCTIONS, "job description")
 
-def compute_section_similarity(resume_sections, jd_sections):
+
+def parse_structured_sections(completion, section_names):
     """
-    Computes cosine similarity between relevant resume and job description sections.
+    Parses a JSON extraction completion into a section dict.
 
-    Args:
-        resume_sections: dict with resume section names and text
-        job_sections: dict with job section names and text
+    Lists are joined into one string per section. Sections that are missing
+    or hold anything other than text are reported as failed.
 
     Returns:
-        dict of section-wise similarity and overall average similarity
+        tuple of (dict of parsed sections, list of section names that failed to parse)
     """
-    model = load_sbert_model()
+    start, end = completion.find("{"), completion.rfind("}")
+    try:
+        data = json.loads(completion[start:end + 1]) if start != -1 else None
+    except json.JSONDecodeError:
+        data = None
+    if not isinstance(data, dict):
+        return {}, list(section_names)
+
+    sections, failed = {}, []
+    for section in section_names:
+        value = data.get(section)
+        if isinstance(value, list) and all(isinstance(item, str) for item in value):
+            value = "\n".join(value)
+        if isinstance(value, str):
+            sections[section] = value.strip()
+        else:
+            failed.append(section)
+    return sections, failed
+
+
+def complete_prompt(client, prompt, cache=None, json_mode=False):
+    """
+    Sends a single prompt to the LLM and returns the stripped completion text.
+    When a cache is given, a cached completion is returned without calling the LLM.
+    With json_mode the model is constrained to return a JSON object.
+    """
+    if cache is not None:
+        cached = cache.get(prompt, LLM_MODEL, LLM_TEMPERATURE)
+        if cached is not None:
+            return cached
+
+    mode = "json" if json_mode else "text"
+    with METRICS.span("llm_request", mode=mode):
+        response = client.chat.completions.create(
+            model=LLM_MODEL,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=LLM_TEMPERATURE,
+            **({"response_format": {"type": "json_object"}} if json_mode else {}),
+        )
+    if response.usage is not None:
+        METRICS.increment("llm_prompt_tokens_total", response.usage.prompt_tokens, mode=mode)
+        METRICS.increment("llm_completion_tokens_total", response.usage.completion_tokens, mode=mode)
+    completion = response.choices[0].message.content.strip()
+
+    if cache is not None:
+        cache.set(prompt, LLM_MODEL, LLM_TEMPERATURE, completion)
+    return completion
+
+
+# Section mappings (resume → job description)
+SECTION_PAIRS = {
+    "Qualifications and Education": "Qualifications and Education",
+    "Skills and Certifications": "Required Skills and Technologies",
+    "Projects and Work Experience": "Responsibilities and Duties",
+}
+
+
+def normalize_rows(embeddings):
+    """L2-normalizes each row so cosine similarity becomes a dot product."""
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(embeddings, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return embeddings / norms
+
+
+def chunk_budget(model):
+    """Word pieces per chunk: SBERT_CHUNK_TOKENS, at most the model's input limit without its two special tokens."""
+    limit = model.get_max_seq_length() - 2
+    return min(SBERT_CHUNK_TOKENS, limit) if SBERT_CHUNK_TOKENS else limit
+
+
+def count_word_tokens(model, words):
+    """Number of word pieces the model's tokenizer splits each word into."""
+    unique = list(dict.fromkeys(words))
+    if not unique:
+        return []
+    counts = dict(zip(unique, map(len, model.tokenizer(unique, add_special_tokens=False)["input_ids"])))
+    return [counts[word] for word in words]
+
+
+def chunk_text(text, max_tokens, count_tokens, overlap=SBERT_CHUNK_OVERLAP_TOKENS):
+    """
+    Splits a text into overlapping chunks of whole words with at most
+    max_tokens word pieces each, so the encoder does not cut off the end of a
+    long section. count_tokens returns the word piece count of each word in a
+    list. A single word longer than max_tokens becomes a chunk of its own.
+    """
+    # A word piece covers at least one character, so short texts need no tokenizing
+    if len(text) < max_tokens:
+        return [text]
+    words = text.split()
+    counts = count_tokens(words)
+    if sum(counts) <= max_tokens:
+        return [text]
+
+    chunks, start = [], 0
+    while True:
+        end, used = start, 0
+        while end < len(words) and (end == start or used + counts[end] <= max_tokens):
+            used += counts[end]
+            end += 1
+        chunks.append(" ".join(words[start:end]))
+        if end == len(words):
+            return chunks
+        # The next chunk repeats up to overlap word pieces from the end of this one, if the next word still fits
+        next_start, repeated = end, 0
+        while next_start - 1 > start and repeated + counts[next_start - 1] <= min(overlap, max_tokens - counts[end]):
+            next_start -= 1
+            repeated += counts[next_start]
+        start = next_start
+
+
+def embed_chunks(texts, batch_size=64):
+    """
+    Chunks every text and encodes all chunks in one batch.
 
-    # Define section mappings (resume → job description)
-    section_pairs = {
-        "Qualifications and Education": "Qualifications and Education",
-        "Skills and Certifications": "Required Skills and Technologies",
-        "Projects and Work Experience": "Responsibilities and Duties",
-    }
+    Returns:
+        tuple of (normalized chunk embeddings, array with the position in texts of each chunk)
+    """
+    model = get_sbert_model()
+    max_tokens = chunk_budget(model)
+    chunks, owners = [], []
+    for i, text in enumerate(texts):
+        text_chunks = chunk_text(text, max_tokens, functools.partial(count_word_tokens, model))
+        chunks.extend(text_chunks)
+        owners.extend([i] * len(text_chunks))
+    return normalize_rows(embed_texts(chunks, batch_size=batch_size)), np.asarray(owners, dtype=np.int64)
+
+
+def pool_chunk_scores(chunk_scores, owners, n_texts, pooling=None):
+    """
+    Combines per-chunk scores into one score per text by their maximum or mean.
+    chunk_scores may have further axes after the chunk axis, e.g. one column per job description.
+    """
+    pooling = pooling or SECTION_POOLING
+    shape = (n_texts, *chunk_scores.shape[1:])
+    if pooling == "max":
+        pooled = np.full(shape, -np.inf, dtype=np.float32)
+        np.maximum.at(pooled, owners, chunk_scores)
+        return pooled
+    if pooling == "mean":
+        sums = np.zeros(shape, dtype=np.float32)
+        np.add.at(sums, owners, chunk_scores)
+        counts = np.bincount(owners, minlength=n_texts).reshape(-1, *[1] * (len(shape) - 1))
+        return sums / counts
+    raise ValueError(f"Unknown section pooling: {pooling}")
+
+
+@METRICS.timed("score_candidates")
+def score_candidates_multi(resume_sections_list, jd_sections_list, batch_size=64):
+    """
+    Scores many resumes against many job descriptions in a single batched pass.
 
-    similarities = {}
+    Long sections are split into chunks that fit the encoder. Every job
+    description section is encoded once as the mean of its chunks, and all
+    chunks of all resume sections of all candidates are encoded once,
+    sorted by length so batches carry little padding, however many job
+    descriptions there are. Each resume section scores the maximum (or, with
+    SECTION_POOLING=mean, the mean) cosine similarity of its chunks.
 
-    for resume_key, job_key in section_pairs.items():
-        resume_text = resume_sections.get(resume_key, "")
-        job_text = jd_sections.get(job_key, "")
+    Args:
+        resume_sections_list: list of dicts with resume section names and text
+        jd_sections_list: list of dicts with job section names and text
+        batch_size: batch size passed to the encoder
 
-        if not resume_text or not job_text:
-            similarities[f"{resume_key} ↔ {job_key}"] = 0.0
+    Returns:
+        tuple of (candidates × job descriptions × sections float32 score tensor,
+        list of job section names)
+    """
+    section_names = list(SECTION_PAIRS.values())
+    scores = np.zeros((len(resume_sections_list), len(jd_sections_list), len(SECTION_PAIRS)), dtype=np.float32)
+
+    # Job sections as (job description, column, text); columns no job description has are skipped
+    job_positions, job_texts = [], []
+    for jd_index, jd_sections in enumerate(jd_sections_list):
+        for col, job_key in enumerate(section_names):
+            if jd_sections.get(job_key):
+                job_positions.append((jd_index, col))
+                job_texts.append(jd_sections[job_key])
+    job_columns = sorted({col for _, col in job_positions})
+    if not resume_sections_list or not job_columns:
+        return scores, section_names
+
+    # Collect every non-empty resume section as (row, column, text)
+    rows, cols, texts = [], [], []
+    for col, resume_key in enumerate(SECTION_PAIRS):
+        if col not in job_columns:
             continue
+        for row, resume_sections in enumerate(resume_sections_list):
+            resume_text = resume_sections.get(resume_key, "")
+            if resume_text:
+                rows.append(row)
+                cols.append(col)
+                texts.append(resume_text)
+
+    if not texts:
+        return scores, section_names
+
+    # job description × section embeddings; absent sections stay zero and score 0
+    job_chunks, job_owners = embed_chunks(job_texts, batch_size=batch_size)
+    section_embeddings = np.zeros((len(job_texts), job_chunks.shape[1]), dtype=np.float32)
+    np.add.at(section_embeddings, job_owners, job_chunks)
+    job_embeddings = np.zeros((len(jd_sections_list), len(section_names), job_chunks.shape[1]), dtype=np.float32)
+    job_embeddings[tuple(np.asarray(job_positions).T)] = normalize_rows(section_embeddings)
+
+    chunk_embeddings, owners = embed_chunks(texts, batch_size=batch_size)
+    chunk_cols = np.asarray(cols)[owners]
+    chunk_scores = np.zeros((len(owners), len(jd_sections_list)), dtype=np.float32)
+    for col in job_columns:
+        mask = chunk_cols == col
+        chunk_scores[mask] = chunk_embeddings[mask] @ job_embeddings[:, col, :].T
+
+    scores[np.asarray(rows), :, np.asarray(cols)] = pool_chunk_scores(chunk_scores, owners, len(texts))
+    return scores, section_names
+
+
+def score_candidates(resume_sections_list, jd_sections, batch_size=64):
+    """
+    Scores many resumes against one job description in a single batched pass.
 
-        # Generate embeddings
-        embeddings = model.encode([resume_text, job_text])
-        sim_score = cosine_similarity([embeddings[0]], [embeddings[1]])[0][0]
+    Args:
+        resume_sections_list: list of dicts with resume section names and text
+        jd_sections: dict with job section names and text
+        batch_size: batch size passed to the encoder
 
-        similarities[f"{job_key}"] = sim_score
+    Returns:
+        tuple of (candidates × sections float32 score matrix, list of job section names)
+    """
+    scores, section_names = score_candidates_multi(resume_sections_list, [jd_sections], batch_size)
+    return scores[:, 0, :], section_names
 
-    # Calculate average similarity
-    average_similarity = np.mean(list(similarities.values()))
-    similarities["Overall Score"] = average_similarity
 
+def section_scores_to_dict(score_row, section_names):
+    """Converts one row of the score matrix into the section-wise score dict."""
+    similarities = {name: float(score) for name, score in zip(section_names, score_row)}
+    similarities["Overall Score"] = float(np.mean(score_row)) if len(score_row) else 0.0
     return similarities
 
 
+@METRICS.timed("compute_section_similarity")
+def compute_section_similarity(resume_sections, jd_sections):
+    """
+    Computes cosine similarity between relevant resume and job description sections.
+
+    Args:
+        resume_sections: dict with resume section names and text
+        job_sections: dict with job section names and text
+
+    Returns:
+        dict of section-wise similarity and overall average similarity
+    """
+    scores, section_names = score_candidates([resume_sections], jd_sections)
+    return section_scores_to_dict(scores[0], section_names)
+
+
 def get_summary_prompt(jd_text, resume_text):
     """
     Generate an AI-powered summary for why a candidate is a good fit
     using a Groq LLM.
+    The job description and the resume share the prompt's token budget.
     """
+    jd_text = compact_document(jd_text, "job description", PROMPT_TOKEN_BUDGET // 2)
+    resume_text = compact_document(resume_text, "resume", PROMPT_TOKEN_BUDGET // 2)
     summary_prompt = {
             "Summary": (
                 f"""
@@ -263,20 +795,60 @@ def get_summary_prompt(jd_text, resume_text):
     return summary_prompt
 
 
-def create_zip_file_for_resumes(resumes):
+@METRICS.timed("zip_export")
+def create_zip_file_for_resumes(resumes, export_dir=None, keep_exports=20):
     """
-    Creates a zip file of top candidates resumes
-    """
-    zip_buffer = io.BytesIO()
-
-    with zipfile.ZipFile(zip_buffer, "a", zipfile.ZIP_DEFLATED, False) as zip_file:
-        for i, resume_data in enumerate(resumes):
-            score = f"{resume_data['section_scores']['Overall Score']:.2f}"
-            email = resume_data['email']
-            name = resume_data['name']
+    Creates a zip file of top candidates resumes on disk and returns its path.
 
-            filename = f"{score}_{email}_{name}.pdf"
-
-            zip_file.writestr(filename, resume_data.get('text', ''))
+    Resumes with a file_hash are added from their original uploaded bytes;
+    PDFs are stored as-is because they are already compressed. Resumes
+    without one are added as extracted .txt files. The archive is cached by
+    the identity of the result set, so the same shortlist is only zipped once.
+    """
+    export_dir = export_dir or os.path.join(CACHE_DIR, "exports")
+    os.makedirs(export_dir, exist_ok=True)
+
+    entries = []
+    for resume_data in resumes:
+        score = f"{resume_data['section_scores']['Overall Score']:.2f}"
+        email = resume_data['email']
+        name = os.path.basename(resume_data['name'])
+        file_hash = resume_data.get('file_hash')
+
+        if not file_hash:
+            name = f"{os.path.splitext(name)[0]}.txt"
+        entries.append((f"{score}_{email}_{name}", file_hash, resume_data.get('text', '')))
+
+    export_key = content_hash(*(
+        f"{filename}\0{file_hash or content_hash(text)}" for filename, file_hash, text in entries
+    ))
+    zip_path = os.path.join(export_dir, f"{export_key}.zip")
+    if os.path.exists(zip_path):
+        METRICS.increment("cache_hits_total", cache="zip_export")
+        return zip_path
+    METRICS.increment("cache_misses_total", cache="zip_export")
+
+    blob_store = get_blob_store()
+    # Streamlit sessions are threads of one process and may export the same shortlist at once
+    tmp_path = f"{zip_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with zipfile.ZipFile(tmp_path, "w", zipfile.ZIP_DEFLATED, False) as zip_file:
+        for filename, file_hash, text in entries:
+            if file_hash:
+                compress_type = zipfile.ZIP_STORED if filename.lower().endswith(".pdf") else zipfile.ZIP_DEFLATED
+                zip_file.write(blob_store.blob_path(file_hash), filename, compress_type=compress_type)
+            else:
+                zip_file.writestr(filename, text)
+    os.replace(tmp_path, zip_path)
+
+    # Only the most recent exports are kept
+    exports = sorted(
+        (os.path.join(export_dir, f) for f in os.listdir(export_dir) if f.endswith(".zip")),
+        key=os.path.getmtime,
+    )
+    for old_export in exports[:-keep_exports]:
+        try:
+            os.remove(old_export)
+        except FileNotFoundError:
+            pass  # Removed by a concurrent export
 
-    return zip_buffer.getvalue()
\ No newline at end of file
+    return zip_path